@@ -0,0 +1,137 @@
+"""Synthetic provider payloads shaped like the recorded responses in fixtures/.
+
+Record `i` always describes the same paper: the OpenAlex work and the Semantic
+Scholar item for one index share a title, authors, date and DOI, so mixing the
+two produces the cross-provider duplicates that dedup has to merge.
+"""
+import copy
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+from pulse.models import Paper
+from pulse.providers.openalex import OpenAlexProvider
+from pulse.providers.semantic_scholar import SemanticScholarProvider
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+VOCABULARY = """
+digital twin building information modeling bim construction compliance automation
+checking regulation code rule semantic ontology ifc model infrastructure bridge
+tunnel structural health monitoring sensor network deep learning neural vision
+point cloud laser scanning photogrammetry drone uav safety hazard worker site
+progress schedule cost estimation lifecycle asset management maintenance energy
+performance simulation thermal hvac facility smart city urban planning gis
+geospatial interoperability data exchange graph knowledge language processing
+large framework approach method evaluation case study review survey benchmark
+automated intelligent real-time integrated collaborative parametric generative
+design optimization reinforcement probabilistic uncertainty risk resilience
+sustainability carbon emission circular material timber concrete steel modular
+prefabrication robotics additive manufacturing printing inspection defect crack
+detection segmentation classification retrieval reasoning verification validation
+""".split()
+
+GIVEN_NAMES = """
+Anna Ben Chen Daria Elif Farid Grace Hiro Ines Jonas Kofi Lena Mateo Nadia Omar
+Priya Quentin Rosa Sven Tariq Uma Viktor Wen Ximena Yusuf Zara
+""".split()
+
+SURNAME_SYLLABLES = "ka lo mi ra ten sor vel an bri du fen gar hol ir jun kes".split()
+
+DAY_ZERO = date(2010, 1, 1)
+
+def load_fixture(name: str) -> dict:
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+class PayloadFactory:
+    """Builds OpenAlex works and Semantic Scholar items from the fixture templates."""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+        self._works = load_fixture("openalex_works.json")["results"]
+        self._items = load_fixture("semantic_scholar_search.json")["data"]
+
+    def openalex_work(self, i: int) -> dict:
+        record = self._record(i)
+        work = copy.deepcopy(self._works[i % len(self._works)])
+        work.update(
+            id=f"https://openalex.org/W{4000000000 + i}",
+            doi=f"https://doi.org/{record['doi']}" if record["doi"] else None,
+            title=record["title"],
+            display_name=record["title"],
+            publication_year=record["date"].year,
+            publication_date=record["date"].isoformat(),
+            cited_by_count=record["citations"],
+            abstract_inverted_index=_inverted_index(record["abstract"]),
+        )
+        template = work["authorships"][0]
+        work["authorships"] = [
+            {**template, "author": {**template["author"], "id": f"https://openalex.org/A{i}{n}", "display_name": name},
+             "raw_author_name": name}
+            for n, name in enumerate(record["authors"])
+        ]
+        work["keywords"] = [
+            {"id": f"https://openalex.org/keywords/{keyword.replace(' ', '-')}", "display_name": keyword, "score": 0.5}
+            for keyword in record["keywords"]
+        ]
+        return work
+
+    def semantic_scholar_item(self, i: int) -> dict:
+        record = self._record(i)
+        item = copy.deepcopy(self._items[i % len(self._items)])
+        item.update(
+            paperId=f"{i:040x}",
+            url=f"https://www.semanticscholar.org/paper/{i:040x}",
+            title=record["title"],
+            abstract=record["abstract"],
+            citationCount=record["citations"],
+            publicationDate=record["date"].isoformat(),
+            authors=[{"authorId": str(i * 10 + n), "name": name} for n, name in enumerate(record["authors"])],
+        )
+        item["externalIds"] = {"CorpusId": i}
+        if record["doi"]:
+            item["externalIds"]["DOI"] = record["doi"]
+        return item
+
+    def openalex_page(self, count: int, total: int, cursor: str | None) -> bytes:
+        body = {"meta": {"count": total, "per_page": count, "next_cursor": cursor},
+                "results": [self.openalex_work(i) for i in range(count)]}
+        return json.dumps(body).encode()
+
+    def semantic_scholar_items(self, count: int) -> bytes:
+        """A JSON array of `count` items, for splicing into search responses."""
+        return json.dumps([self.semantic_scholar_item(i) for i in range(count)]).encode()
+
+    def papers(self, n: int) -> list[Paper]:
+        """`n` papers as the providers would parse them, about one in ten a cross-provider duplicate."""
+        openalex, semantic_scholar = OpenAlexProvider(), SemanticScholarProvider()
+        from_openalex = n - n // 5
+        overlap = n // 10
+        papers = [openalex._to_paper(self.openalex_work(i)) for i in range(from_openalex)]
+        papers.extend(
+            semantic_scholar._to_paper(self.semantic_scholar_item(i))
+            for i in range(from_openalex - overlap, n - overlap)
+        )
+        return papers
+
+    def _record(self, i: int) -> dict:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        surnames = ["".join(rng.choices(SURNAME_SYLLABLES, k=3)).capitalize() for _ in range(rng.randint(1, 6))]
+        return {
+            "title": " ".join(rng.sample(VOCABULARY, rng.randint(6, 12))).capitalize(),
+            "authors": [f"{rng.choice(GIVEN_NAMES)} {surname}" for surname in surnames],
+            "abstract": " ".join(rng.choices(VOCABULARY, k=rng.randint(80, 250))).capitalize() + ".",
+            "date": DAY_ZERO + timedelta(days=rng.randrange(15 * 365)),
+            "doi": f"10.{5000 + i % 4000}/bench.{i}" if rng.random() < 0.9 else None,
+            "citations": min(int(rng.paretovariate(1.2)) - 1, 50_000),
+            "keywords": rng.sample(VOCABULARY, rng.randint(0, 5)),
+        }
+
+def _inverted_index(text: str) -> dict[str, list[int]]:
+    """`text` the way OpenAlex sends abstracts: each word mapped to its positions."""
+    index = {}
+    for i, word in enumerate(text.split()):
+        index.setdefault(word, []).append(i)
+    return index
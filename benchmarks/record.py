@@ -0,0 +1,43 @@
+"""Refresh fixtures/ with one live response page from each provider.
+
+    python -m benchmarks.record ["digital twin compliance"]
+
+The benchmarks only take the shape of these records (fields, nesting, string
+lengths) and generate their own text, so a re-recording changes payload sizes
+but not which papers exist. Responses are written exactly as received.
+"""
+import json
+import os
+import sys
+
+import httpx
+
+from pulse.providers.openalex import OpenAlexProvider
+from pulse.providers.semantic_scholar import SemanticScholarProvider
+
+from .payloads import FIXTURES
+
+RECORDED_RECORDS = 25
+
+def record(query: str = "digital twin compliance checking") -> None:
+    with httpx.Client(timeout=30) as client:
+        openalex = client.get(OpenAlexProvider().base_url, params={
+            "search": query, "per_page": RECORDED_RECORDS, "cursor": "*", "mailto": os.getenv("OPENALEX_EMAIL", "")})
+        openalex.raise_for_status()
+        _write("openalex_works.json", openalex.json())
+
+        api_key = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
+        semantic_scholar = client.get(f"{SemanticScholarProvider().base_url}/search", params={
+            "query": query, "offset": 0, "limit": RECORDED_RECORDS,
+            "fields": "title,authors,abstract,externalIds,url,openAccessPdf,citationCount,publicationDate",
+        }, headers={"x-api-key": api_key} if api_key else {})
+        semantic_scholar.raise_for_status()
+        _write("semantic_scholar_search.json", semantic_scholar.json())
+
+def _write(name: str, data: dict) -> None:
+    path = FIXTURES / name
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Recorded {path}")
+
+if __name__ == "__main__":
+    record(*sys.argv[1:2])
@@ -0,0 +1,311 @@
+"""Offline benchmarks for fetch-parse, dedup, rank, cache, storage and export.
+
+    python -m benchmarks.run                              # 100, 1k and 10k papers
+    python -m benchmarks.run --sizes 1000000 --only dedup,rank --no-memory
+    python -m benchmarks.run --compare benchmarks/results/<baseline>.json
+
+Provider responses are replayed through httpx.MockTransport from the payloads in
+benchmarks/fixtures, so nothing touches the network. Each benchmark reports
+throughput (papers per second) and peak Python heap; results are written as JSON
+to benchmarks/results/ and --compare flags anything slower than a baseline file.
+"""
+import argparse
+import asyncio
+import functools
+import gc
+import importlib.metadata
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+from pulse import columnar, storage
+from pulse.cache import ResponseCache
+from pulse.config import RankingConfig
+from pulse.dedup import deduplicate
+from pulse.embeddings import EmbeddingStore, HashingEmbedder, np
+from pulse.export import FORMATS, export_many
+from pulse.models import Paper, Query
+from pulse.providers.openalex import PAGE_SIZE as OPENALEX_PAGE_SIZE, OpenAlexProvider
+from pulse.providers.semantic_scholar import PAGE_SIZE as S2_PAGE_SIZE, SemanticScholarProvider
+from pulse.serialization import SERIALIZERS, msgpack
+from pulse.service import rank_papers
+
+from .payloads import PayloadFactory
+
+RESULTS_DIRECTORY = Path(__file__).parent / "results"
+DEFAULT_SIZES = (100, 1_000, 10_000)
+# /search/bulk returns up to this many items per call
+S2_BULK_PAGE_SIZE = 1000
+QUERY = Query(keywords=["digital twin", "compliance checking"], categories=[], max_results=20)
+
+@dataclass
+class Result:
+    benchmark: str
+    size: int
+    seconds: float
+    papers_per_second: float
+    peak_bytes: int | None
+
+@dataclass
+class Workload:
+    size: int
+    directory: Path
+    factory: PayloadFactory
+
+    @functools.cached_property
+    def papers(self) -> list[Paper]:
+        return self.factory.papers(self.size)
+
+    def scratch(self) -> Path:
+        return Path(tempfile.mkdtemp(dir=self.directory))
+
+# A benchmark prepares its inputs from a workload and returns the call to time
+Benchmark = Callable[[Workload], Callable[[], object]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+@benchmark("fetch_openalex")
+def fetch_openalex(workload: Workload):
+    page = workload.factory.openalex_page(OPENALEX_PAGE_SIZE, workload.size, "next")
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=page,
+                                                                   headers={"Content-Type": "application/json"}))
+    return functools.partial(_fetch, OpenAlexProvider, transport, workload.size)
+
+@benchmark("fetch_semantic_scholar")
+def fetch_semantic_scholar(workload: Workload):
+    relevance = workload.factory.semantic_scholar_items(S2_PAGE_SIZE)
+    bulk = workload.factory.semantic_scholar_items(S2_BULK_PAGE_SIZE)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/bulk"):
+            body = b'{"total":%d,"token":"next","data":%s}' % (workload.size, bulk)
+        else:
+            offset = int(request.url.params["offset"])
+            limit = int(request.url.params["limit"])
+            body = b'{"total":%d,"offset":%d,"next":%d,"data":%s}' % (workload.size, offset, offset + limit, relevance)
+        return httpx.Response(200, content=body, headers={"Content-Type": "application/json"})
+
+    return functools.partial(_fetch, SemanticScholarProvider, httpx.MockTransport(handler), workload.size)
+
+def _fetch(provider_class, transport: httpx.MockTransport, size: int) -> list[Paper]:
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await provider_class(client=client).search(QUERY.model_copy(update={"max_results": size}))
+    return asyncio.run(run())
+
+@benchmark("dedup")
+def dedup(workload: Workload):
+    return functools.partial(deduplicate, workload.papers)
+
+@benchmark("rank")
+def rank(workload: Workload):
+    return functools.partial(rank_papers, workload.papers, QUERY, RankingConfig())
+
+@benchmark("rank_top20")
+def rank_top20(workload: Workload):
+    return functools.partial(rank_papers, workload.papers, QUERY, RankingConfig(), top_n=20)
+
+@benchmark("rank_bm25")
+def rank_bm25(workload: Workload):
+    return functools.partial(rank_papers, workload.papers, QUERY, RankingConfig(keyword_scorer="bm25"))
+
+def _semantic_benchmark() -> None:
+    """Re-ranking with the semantic stage once every paper's embedding is stored."""
+    @benchmark("rank_semantic_cached")
+    def rank_semantic_cached(workload: Workload):
+        config = RankingConfig(weight_semantic=0.3)
+        store = EmbeddingStore(workload.scratch(), HashingEmbedder())
+        rank_papers(workload.papers, QUERY, config, embeddings=store)
+        return functools.partial(rank_papers, workload.papers, QUERY, config, embeddings=store)
+
+if np is not None:
+    _semantic_benchmark()
+
+def _cache_benchmarks(serializer: str) -> None:
+    """Cache save/load of the raw OpenAlex pages that hold `size` works."""
+    def pages(workload: Workload) -> tuple[list[str], dict]:
+        page = json.loads(workload.factory.openalex_page(OPENALEX_PAGE_SIZE, workload.size, "next"))
+        count = max(1, workload.size // OPENALEX_PAGE_SIZE)
+        return [ResponseCache.key("https://api.openalex.org/works", {"cursor": n}) for n in range(count)], page
+
+    def open_cache(workload: Workload) -> ResponseCache:
+        return ResponseCache(workload.scratch() / "responses.sqlite", max_bytes=2**62, serializer=serializer)
+
+    @benchmark(f"cache_save_{serializer}")
+    def save(workload: Workload):
+        keys, page = pages(workload)
+        cache = open_cache(workload)
+
+        def run():
+            for key in keys:
+                cache.set(key, page)
+        return run
+
+    @benchmark(f"cache_load_{serializer}")
+    def load(workload: Workload):
+        keys, page = pages(workload)
+        cache = open_cache(workload)
+        for key in keys:
+            cache.set(key, page)
+        return lambda: [cache.get(key) for key in keys]
+
+for _serializer in SERIALIZERS:
+    if _serializer != "msgpack" or msgpack is not None:
+        _cache_benchmarks(_serializer)
+
+@benchmark("storage_save")
+def storage_save(workload: Workload):
+    storage.DATA_FILE = workload.scratch() / "papers.json"
+    return functools.partial(storage.upsert_papers, workload.papers)
+
+@benchmark("storage_load")
+def storage_load(workload: Workload):
+    storage.DATA_FILE = workload.scratch() / "papers.json"
+    storage.upsert_papers(workload.papers)
+    return storage.load_papers
+
+def _export_benchmark(fmt: str) -> None:
+    @benchmark(f"export_{fmt}")
+    def export(workload: Workload):
+        output = workload.scratch() / f"digest.{fmt}"
+        return lambda: asyncio.run(export_many(workload.papers, [fmt], str(output)))
+
+for _fmt in FORMATS:
+    if _fmt == "pdf":
+        # Downloads are network-bound; the download tests cover them
+        continue
+    if _fmt in columnar.COLUMNAR_FORMATS:
+        try:
+            columnar._require_pyarrow()
+        except ImportError:
+            continue
+    _export_benchmark(_fmt)
+
+def measure(name: str, workload: Workload, memory: bool = True) -> Result:
+    """Time one run of a benchmark, then repeat it under tracemalloc for its peak heap."""
+    run = BENCHMARKS[name](workload)
+    gc.collect()
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        # A fresh setup, so the traced run does the same work as the timed one
+        run = BENCHMARKS[name](workload)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return Result(name, workload.size, seconds, workload.size / seconds if seconds else float("inf"), peak)
+
+def run_benchmarks(sizes=DEFAULT_SIZES, names=None, memory: bool = True, seed: int = 0,
+                   progress: Callable[[Result], None] | None = None) -> list[Result]:
+    names = list(names or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark: {', '.join(unknown)}")
+    original_data_file = storage.DATA_FILE
+    results = []
+    try:
+        for size in sizes:
+            directory = Path(tempfile.mkdtemp(prefix="pulse-bench-"))
+            try:
+                workload = Workload(size, directory, PayloadFactory(seed))
+                for name in names:
+                    result = measure(name, workload, memory)
+                    results.append(result)
+                    if progress:
+                        progress(result)
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+    finally:
+        storage.DATA_FILE = original_data_file
+    return results
+
+def report(results: list[Result]) -> dict:
+    return {
+        "version": _version(),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "results": [asdict(result) for result in results],
+    }
+
+def compare(baseline: dict, current: dict, threshold: float = 1.1) -> list[tuple[str, int, float]]:
+    """(benchmark, size, slowdown) for each result more than `threshold` times slower than the baseline."""
+    before = {(r["benchmark"], r["size"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get((r["benchmark"], r["size"]))
+        if old and r["seconds"] / old > threshold:
+            regressions.append((r["benchmark"], r["size"], r["seconds"] / old))
+    return regressions
+
+def _version() -> str | None:
+    try:
+        return importlib.metadata.version("scholar-pulse")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+def _print_result(result: Result) -> None:
+    peak = f"{result.peak_bytes / 2**20:9.1f} MiB" if result.peak_bytes is not None else "        -    "
+    print(f"{result.benchmark:<24} {result.size:>9} {result.seconds:9.3f} s {result.papers_per_second:>12,.0f}/s {peak}")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma separated paper counts")
+    parser.add_argument("--only", help=f"comma separated benchmarks: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass (halves run time)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.1, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = args.only.split(",") if args.only else None
+    results = run_benchmarks(sizes, names, memory=not args.no_memory, seed=args.seed, progress=_print_result)
+    current = report(results)
+
+    output = args.output or RESULTS_DIRECTORY / f"{current['commit'] or 'local'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(current, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), current, args.threshold)
+        for name, size, slowdown in regressions:
+            print(f"REGRESSION {name} at {size}: {slowdown:.2f}x slower than {args.compare.name}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from .config import CacheConfig
+from .serialization import decode, encode, get_serializer
+
+# Query params that identify the caller rather than change the response
+IGNORED_PARAMS = {"mailto"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    value BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at, size);
+CREATE INDEX IF NOT EXISTS responses_created ON responses (created_at);
+-- Running byte total kept by triggers, so eviction never sums the whole table.
+-- Seeded once from the rows already present when an older cache file is opened
+CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO totals (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses
+BEGIN UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS responses_resized AFTER UPDATE OF size ON responses
+BEGIN UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END;
+CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses
+BEGIN UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0; END;
+"""
+
+class ResponseCache:
+    """Raw provider responses keyed by (url, normalized params), with TTL and an LRU byte cap.
+
+    Entries live in a single SQLite file, so lookups, expiry and eviction are
+    index queries rather than directory scans.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float = 3600, max_bytes: int = 256 * 1024 * 1024,
+                 serializer: str = "auto"):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.serializer = get_serializer(serializer)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: CacheConfig) -> "ResponseCache":
+        directory = Path(config.directory).expanduser()
+        return cls(directory / "responses.sqlite", config.ttl_seconds, config.max_bytes, config.serializer)
+
+    @staticmethod
+    def key(url: str, params: dict[str, Any] | None = None) -> str:
+        normalized = {k: str(v) for k, v in (params or {}).items() if k not in IGNORED_PARAMS}
+        raw = json.dumps([url, normalized], sort_keys=True).encode()
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if now - created_at > self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            return decode(value)
+        except ValueError:
+            # Corrupt, or written by a codec or format version this build can't read
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        blob = encode(value, self.serializer)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        # An upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the delete trigger
+        self._conn.execute(
+            "INSERT INTO responses (key, size, created_at, accessed_at, value) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET size = excluded.size, created_at = excluded.created_at, "
+            "accessed_at = excluded.accessed_at, value = excluded.value",
+            (key, len(blob), now, now, blob),
+        )
+        self._evict()
+
+    def purge_expired(self) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+
+    def total_bytes(self) -> int:
+        return self._conn.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+    def _evict(self) -> None:
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,74 @@
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from .config import HttpConfig
+
+def create_client(config: HttpConfig | None = None) -> httpx.AsyncClient:
+    """Build the pooled client shared by every provider and the PDF downloader."""
+    config = config or HttpConfig()
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    http2 = config.http2 and importlib.util.find_spec("h2") is not None
+    transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    return httpx.AsyncClient(
+        transport=HostLimitedTransport(transport, config.max_connections_per_host),
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        follow_redirects=True,
+    )
+
+@asynccontextmanager
+async def borrow_client(client: httpx.AsyncClient | None = None,
+                        config: HttpConfig | None = None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield `client` untouched, or a short-lived one when the caller has none."""
+    if client is not None:
+        yield client
+        return
+    async with create_client(config) as owned:
+        yield owned
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Caps in-flight requests per host; a slot is held until the response is closed."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._slots: dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._slots.setdefault(request.url.host, asyncio.Semaphore(self._max_per_host))
+        await slot.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            slot.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, slot)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, slot: asyncio.Semaphore):
+        self._stream = stream
+        self._slot = slot
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._slot.release()
@@ -0,0 +1,114 @@
+import itertools
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence
+
+from .models import Paper
+
+# pyarrow is optional and takes longer to import than the rest of the CLI, so it
+# loads on first use; see _require_pyarrow
+pa = pq = None
+
+# Rows per Parquet row group / Arrow record batch; bounds writer memory
+ROW_GROUP_SIZE = 10_000
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+PARQUET_MAGIC = b"PAR1"
+ARROW_MAGIC = b"ARROW1"
+
+def paper_schema() -> "pa.Schema":
+    _require_pyarrow()
+    return pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("authors", pa.list_(pa.string())),
+        ("abstract", pa.string()),
+        ("doi", pa.string()),
+        ("arxiv_id", pa.string()),
+        ("openalex_id", pa.string()),
+        ("url", pa.string()),
+        ("pdf_url", pa.string()),
+        ("published_date", pa.date32()),
+        ("citation_count", pa.int64()),
+        ("keywords", pa.list_(pa.string())),
+        ("source_provider", pa.string()),
+        ("relevance_score", pa.float64()),
+        ("sources", pa.list_(pa.string())),
+        ("saved_at", pa.timestamp("us")),
+    ])
+
+class ColumnarWriter:
+    """Writes papers as typed columns to a Parquet or Arrow IPC file, one row group at a time."""
+
+    def __init__(self, path: Path, format: str, row_group_size: int = ROW_GROUP_SIZE):
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {format}")
+        self.schema = paper_schema()
+        self.row_group_size = row_group_size
+        self._pending: list[Paper] = []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            # The IPC file format (Feather v2) is what pyarrow.memory_map can read without copying
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, papers: Sequence[Paper]) -> None:
+        self._pending.extend(papers)
+        while len(self._pending) >= self.row_group_size:
+            self._flush(self._pending[:self.row_group_size])
+            del self._pending[:self.row_group_size]
+
+    def close(self) -> None:
+        if self._pending:
+            self._flush(self._pending)
+            self._pending = []
+        self._writer.close()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _flush(self, papers: Sequence[Paper]) -> None:
+        columns = {name: [getattr(paper, name) for paper in papers] for name in self.schema.names}
+        self._writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=self.schema))
+
+def write_columnar(papers: Iterable[Paper], path: Path, format: str) -> Path:
+    with ColumnarWriter(path, format) as writer:
+        for batch in itertools.batched(papers, ROW_GROUP_SIZE):
+            writer.write(batch)
+    return path
+
+def read_columnar(path: Path) -> Iterator[List[Paper]]:
+    """Yield papers from a Parquet or Arrow IPC file one record batch at a time."""
+    _require_pyarrow()
+    with open(path, "rb") as f:
+        magic = f.read(len(ARROW_MAGIC))
+    if magic.startswith(PARQUET_MAGIC):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=ROW_GROUP_SIZE)
+        for batch in batches:
+            yield _to_papers(batch)
+    elif magic == ARROW_MAGIC:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield _to_papers(reader.get_batch(i))
+    else:
+        raise ValueError(f"{path} is neither a Parquet nor an Arrow IPC file")
+
+def _to_papers(batch: "pa.RecordBatch") -> List[Paper]:
+    return [Paper.model_validate(row) for row in batch.to_pylist()]
+
+def _require_pyarrow() -> None:
+    global pa, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:  # pragma: no cover - exercised only without the optional extra
+        raise ImportError("Parquet/Arrow support needs pyarrow: install the columnar extra, e.g. uv sync --extra columnar") from None
+    pa, pq = pyarrow, pyarrow.parquet
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Literal
 import tomllib
 from pathlib import Path
 from dotenv import load_dotenv
@@ -15,26 +16,103 @@ class SearchConfig(BaseModel):
         "construction"
     ]
     max_results_per_provider: int = 20
+    # Search each keyword separately and fuse the lists with reciprocal-rank fusion
+    fan_out: bool = False
+    max_concurrent_searches: int = 4
+    rrf_k: int = 60
+    # Days re-fetched before the last incremental digest's watermark, for late-indexed papers
+    watermark_overlap_days: int = 2
 
 class RankingConfig(BaseModel):
     weight_citation: float = 0.4
     weight_recency: float = 0.3
     weight_keyword: float = 0.3
+    # "exact" matches query keywords against the paper's keyword list; "bm25"
+    # scores title and abstract text, so papers without keywords can match too
+    keyword_scorer: Literal["exact", "bm25"] = "exact"
+    # Term statistics for bm25: the ranked "candidates" only, or the whole saved "library"
+    bm25_corpus: Literal["candidates", "library"] = "candidates"
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
+    # Cosine similarity of title and abstract embeddings to the query; 0 skips embedding entirely
+    weight_semantic: float = 0.0
+    # PageRank over the citation graph around the best candidates; needs graph.enabled
+    weight_graph: float = 0.0
+
+class RateLimitConfig(BaseModel):
+    requests_per_second: float | None = None
+    burst: int = 1
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
 
 class ProviderConfig(BaseModel):
     enabled: list[str] = [
         "semantic_scholar",
         "openalex"
     ]
+    rate_limits: dict[str, RateLimitConfig] = {
+        "semantic_scholar": RateLimitConfig(requests_per_second=1.0),
+        "openalex": RateLimitConfig(requests_per_second=10.0, burst=10),
+    }
 
 class OutputConfig(BaseModel):
     default_format: str = "md"
 
+class HttpConfig(BaseModel):
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    max_connections: int = 20
+    max_connections_per_host: int = 6
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+
+class CacheConfig(BaseModel):
+    enabled: bool = True
+    directory: str = "~/.scholar-pulse/cache"
+    ttl_seconds: int = 3600
+    max_bytes: int = 256 * 1024 * 1024
+    # "auto" (msgpack when installed, else JSON), "msgpack" or "json" for readable entries
+    serializer: str = "auto"
+
+class DownloadConfig(BaseModel):
+    max_concurrent: int = 8
+    max_per_host: int = 2
+    chunk_size: int = 64 * 1024
+    timeout: float = 120.0
+    max_retries: int = 3
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    store_directory: str = "~/.scholar-pulse/pdfs"
+
+class EmbeddingConfig(BaseModel):
+    # "hashing" (built in, deterministic) or a sentence-transformers model name, run on the CPU
+    model: str = "hashing"
+    directory: str = "~/.scholar-pulse/embeddings"
+    # Inverted lists scanned per nearest-neighbour query once the store is indexed
+    nprobe: int = 32
+
+class GraphConfig(BaseModel):
+    # Fetch references and citations of the best candidates after ranking
+    enabled: bool = False
+    # Top candidates whose references and citations are fetched
+    seeds: int = 20
+    # Citations and references fetched per seed and provider, each way
+    neighbours_per_paper: int = 100
+    # Neighbouring papers added to the candidates, by co-citation and shared references
+    related: int = 10
+    damping: float = 0.85
+
 class Settings(BaseModel):
     search: SearchConfig = SearchConfig()
     ranking: RankingConfig = RankingConfig()
     providers: ProviderConfig = ProviderConfig()
     export: OutputConfig = OutputConfig()
+    http: HttpConfig = HttpConfig()
+    cache: CacheConfig = CacheConfig()
+    download: DownloadConfig = DownloadConfig()
+    embeddings: EmbeddingConfig = EmbeddingConfig()
+    graph: GraphConfig = GraphConfig()
 
     semantic_scholar_api_key: str | None = None
     openalex_email: str | None = None
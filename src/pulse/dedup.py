@@ -0,0 +1,289 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterable
+
+from .models import Paper
+
+# Character n-gram Jaccard above which two titles in the same block are the same work
+TITLE_SIMILARITY = 0.85
+NGRAM = 3
+
+# Identifier kinds that name one work; two records disagreeing on one are never merged
+STRONG_IDENTIFIERS = ("doi", "arxiv", "openalex")
+
+# Fields compared when picking the base record; the base supplies every field
+# without a rule in merge_papers (id, url, published_date, source_provider, ...)
+MERGE_FIELDS = (
+    "title", "authors", "abstract", "doi", "arxiv_id", "openalex_id",
+    "url", "pdf_url", "citation_count", "keywords",
+)
+
+# Fields taken from the first record (base first, then sighting order) that has one
+FIRST_FILLED_FIELDS = ("title", "authors", "doi", "arxiv_id", "openalex_id", "url", "pdf_url")
+
+class Deduplicator:
+    """Incremental cross-provider deduplication.
+
+    Papers sharing any identifier (DOI, arXiv id, OpenAlex id, provider id) are
+    unioned. Papers without a shared identifier are compared only within their
+    block (first-author surname or leading title word, +/- one year) and merged
+    when their titles are near-identical and no identifier contradicts.
+
+    Each cluster keeps a running merge rather than its members, so memory grows
+    with the clusters and identifiers seen, not with every record added.
+    """
+
+    def __init__(self):
+        self._parent: dict[int, int] = {}
+        # A lone record stands for its own cluster until something merges into it
+        self._merges: dict[int, Paper | _Merge] = {}
+        # Only the identifiers that can contradict a title match; see _conflicts()
+        self._identifiers: dict[int, set[tuple[str, str]]] = {}
+        self._id_index: dict[tuple[str, str], int] = {}
+        # (block, year) -> nodes whose titles later papers are compared against
+        self._blocks: dict[tuple[str, int], list[int]] = {}
+        # Titles are shingled only once something in a neighbouring block needs them
+        self._titles: dict[int, str] = {}
+        self._shingles: dict[int, frozenset[int]] = {}
+        self._order: list[int] = []
+
+    def add(self, paper: Paper) -> tuple[int, list[int]]:
+        """Add a paper; returns its cluster and any clusters that were folded into it."""
+        node = entry = len(self._parent)
+        identifiers = _identifiers(paper)
+        self._parent[node] = node
+        self._merges[node] = paper
+        if strong := {token for token in identifiers if token[0] in STRONG_IDENTIFIERS}:
+            self._identifiers[node] = strong
+        self._order.append(node)
+
+        absorbed = []
+        for token in identifiers:
+            if token in self._id_index:
+                root, gone = self._union(self._id_index[token], node)
+                absorbed.extend(gone)
+                node = root
+            else:
+                self._id_index[token] = node
+
+        block = _block_token(paper)
+        if block:
+            year = paper.published_date.year
+            neighbours = [other for y in (year - 1, year, year + 1) for other in self._blocks.get((block, y), ())]
+            matched = False
+            if neighbours:
+                shingles = self._shingles[entry] = _title_shingles(paper.title)
+                # `node` is always its cluster's root here
+                for other in neighbours if shingles else ():
+                    root = self._find(other)
+                    if root == node or not _similar(shingles, self._title_shingles(other)):
+                        continue
+                    matched = True
+                    if self._conflicts(root, node):
+                        continue
+                    root, gone = self._union(root, node)
+                    absorbed.extend(gone)
+                    node = root
+            else:
+                self._titles[entry] = paper.title
+            # A title already indexed under a near-identical one adds nothing new to match against
+            if not matched:
+                self._blocks.setdefault((block, year), []).append(entry)
+
+        root = self._find(node)
+        return root, [n for n in absorbed if n != root]
+
+    def merged(self, cluster: int) -> Paper:
+        merge = self._merges[self._find(cluster)]
+        return merge if isinstance(merge, Paper) else merge.paper()
+
+    def clusters(self) -> list[int]:
+        seen = set()
+        roots = []
+        for node in self._order:
+            root = self._find(node)
+            if root not in seen:
+                seen.add(root)
+                roots.append(root)
+        return roots
+
+    def papers(self) -> list[Paper]:
+        return [self.merged(root) for root in self.clusters()]
+
+    def _title_shingles(self, node: int) -> frozenset[int]:
+        shingles = self._shingles.get(node)
+        if shingles is None:
+            shingles = self._shingles[node] = _title_shingles(self._titles.pop(node))
+        return shingles
+
+    def _find(self, node: int) -> int:
+        while self._parent[node] != node:
+            self._parent[node] = self._parent[self._parent[node]]
+            node = self._parent[node]
+        return node
+
+    def _union(self, a: int, b: int) -> tuple[int, list[int]]:
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a, []
+        # Keep the earlier cluster as root so output order follows first sighting
+        if b < a:
+            a, b = b, a
+        self._parent[b] = a
+        merge, later = self._merges[a], self._merges.pop(b)
+        if isinstance(merge, Paper):
+            merge = self._merges[a] = _Merge.of(merge)
+        merge.absorb(_Merge.of(later) if isinstance(later, Paper) else later)
+        if b in self._identifiers:
+            self._identifiers.setdefault(a, set()).update(self._identifiers.pop(b))
+        return a, [b]
+
+    def _conflicts(self, a: int, b: int) -> bool:
+        ids_a, ids_b = self._identifiers.get(a, set()), self._identifiers.get(b, set())
+        # A kind both carry without a single value in common
+        shared_kinds = {kind for kind, _ in ids_a} & {kind for kind, _ in ids_b}
+        return bool(shared_kinds - {kind for kind, _ in ids_a & ids_b})
+
+@dataclass(slots=True)
+class _Merge:
+    """merge_papers() state folded one record at a time, in sighting order."""
+    base: Paper
+    filled: int
+    size: int
+    # First non-empty value of each FIRST_FILLED_FIELDS field
+    first: dict[str, object]
+    abstract: str
+    citation_count: int
+    # Lower-cased keyword -> first spelling seen
+    keywords: dict[str, str]
+    sources: dict[str, None]
+
+    @classmethod
+    def of(cls, paper: Paper) -> "_Merge":
+        return cls(
+            base=paper,
+            filled=_filled_field_count(paper),
+            size=1,
+            first={field: value for field in FIRST_FILLED_FIELDS if not _is_empty(value := getattr(paper, field))},
+            abstract=paper.abstract,
+            citation_count=paper.citation_count,
+            keywords=_keyword_index([paper.keywords]),
+            sources=dict.fromkeys(paper.sources or [paper.source_provider]),
+        )
+
+    def absorb(self, later: "_Merge") -> None:
+        # Ties keep the earlier record as the base
+        if later.filled > self.filled:
+            self.base, self.filled = later.base, later.filled
+        self.size += later.size
+        for field, value in later.first.items():
+            self.first.setdefault(field, value)
+        if len(later.abstract) > len(self.abstract):
+            self.abstract = later.abstract
+        self.citation_count = max(self.citation_count, later.citation_count)
+        for key, keyword in later.keywords.items():
+            self.keywords.setdefault(key, keyword)
+        self.sources.update(later.sources)
+
+    def paper(self) -> Paper:
+        base = self.base
+        if self.size == 1:
+            return base
+        updates = {field: value for field, value in self.first.items() if _is_empty(getattr(base, field))}
+        if len(self.abstract) > len(base.abstract):
+            updates["abstract"] = self.abstract
+        if self.citation_count > base.citation_count:
+            updates["citation_count"] = self.citation_count
+        # The base's own spellings and sources come first
+        keywords = _union_keywords([base.keywords, list(self.keywords.values())])
+        if len(keywords) > len(base.keywords):
+            updates["keywords"] = keywords
+        updates["sources"] = list(dict.fromkeys([*(base.sources or [base.source_provider]), *self.sources]))
+        return base.model_copy(update=updates)
+
+def deduplicate(papers: Iterable[Paper]) -> list[Paper]:
+    deduplicator = Deduplicator()
+    for paper in papers:
+        deduplicator.add(paper)
+    return deduplicator.papers()
+
+def merge_papers(papers: list[Paper]) -> Paper:
+    """Combine duplicate records field by field.
+
+    The most complete record is the base. Identifiers, links and authors come
+    from the first record that has them, the abstract is the longest one,
+    citation counts take the maximum and keywords are unioned. `sources` lists
+    every provider that contributed.
+    """
+    merge = _Merge.of(papers[0])
+    for paper in papers[1:]:
+        merge.absorb(_Merge.of(paper))
+    return merge.paper()
+
+def _union_keywords(keyword_lists: Iterable[list[str]]) -> list[str]:
+    return list(_keyword_index(keyword_lists).values())
+
+def _keyword_index(keyword_lists: Iterable[list[str]]) -> dict[str, str]:
+    # Case-insensitive, keeping the first spelling seen
+    seen = {}
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            seen.setdefault(keyword.lower(), keyword)
+    return seen
+
+def normalize_doi(doi: str | None) -> str | None:
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "doi:"):
+        doi = doi.removeprefix(prefix)
+    return doi or None
+
+def _identifiers(paper: Paper) -> list[tuple[str, str]]:
+    found = []
+    if doi := normalize_doi(paper.doi):
+        found.append(("doi", doi))
+    if paper.arxiv_id:
+        found.append(("arxiv", re.sub(r"v\d+$", "", paper.arxiv_id.strip().lower())))
+    if paper.openalex_id:
+        found.append(("openalex", paper.openalex_id.strip().removeprefix("https://openalex.org/").upper()))
+    found.append((f"id:{paper.source_provider}", paper.id))
+    return found
+
+def _filled_field_count(paper: Paper) -> int:
+    return sum(1 for field in MERGE_FIELDS if not _is_empty(getattr(paper, field)))
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == 0
+
+def _normalize_text(text: str) -> str:
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+def _title_shingles(title: str) -> frozenset[int]:
+    # Hashed character n-grams: int sets intersect faster than sets of fresh substrings
+    text = _normalize_text(title).replace(" ", "")
+    if len(text) < NGRAM:
+        return frozenset([hash(text)]) if text else frozenset()
+    return frozenset(map(hash, zip(*(text[i:] for i in range(NGRAM)))))
+
+def _block_token(paper: Paper) -> str | None:
+    if paper.authors:
+        words = _normalize_text(paper.authors[0]).split()
+        if words:
+            # "Smith, J." and "J. Smith" both block on "smith": take the longest word
+            return max(words, key=len)
+    words = _normalize_text(paper.title).split()
+    return words[0] if words else None
+
+def _similar(a: frozenset[int], b: frozenset[int]) -> bool:
+    if not a or not b:
+        return False
+    smaller, larger = (a, b) if len(a) <= len(b) else (b, a)
+    # Size bound: Jaccard can't reach the threshold if the sets differ too much in size
+    if len(smaller) < TITLE_SIMILARITY * len(larger):
+        return False
+    intersection = len(smaller & larger)
+    return intersection / (len(a) + len(b) - intersection) >= TITLE_SIMILARITY
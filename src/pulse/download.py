@@ -0,0 +1,200 @@
+import asyncio
+import itertools
+import os
+import random
+from pathlib import Path
+from typing import Awaitable, Iterable, Literal
+
+import httpx
+from pydantic import BaseModel
+
+from .client import borrow_client
+from .config import DownloadConfig, HttpConfig
+from .models import Paper
+from .pdfstore import PdfStore
+from .ratelimit import RETRY_STATUSES, retry_after
+
+# Use a standard User-Agent to prevent 403 Forbidden errors from publishers
+PDF_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+PART_SUFFIX = ".part"
+# Beside a `.part` file: the validator of the response it came from, sent back as If-Range
+VALIDATOR_SUFFIX = ".validator"
+
+class DownloadResult(BaseModel):
+    url: str
+    path: Path
+    status: Literal["downloaded", "resumed", "not_modified", "skipped", "failed"]
+    paper_id: str | None = None
+    bytes_written: int = 0
+    etag: str | None = None
+    last_modified: str | None = None
+    error: str | None = None
+
+class _RetryableStatus(Exception):
+    def __init__(self, status_code: int, delay: float | None):
+        super().__init__(f"HTTP {status_code}")
+        self.delay = delay
+
+async def download_papers(papers: Iterable[Paper], output_dir: Path, client: httpx.AsyncClient | None = None,
+                          config: DownloadConfig | None = None, store: PdfStore | None = None,
+                          http: HttpConfig | None = None) -> list[DownloadResult]:
+    """Fetch every paper's PDF into the store and link it into `output_dir`."""
+    config = config or DownloadConfig()
+    if store is None:
+        store = PdfStore.from_config(config)
+        try:
+            return await download_papers(papers, output_dir, client, config, store, http)
+        finally:
+            store.close()
+    async with borrow_client(client, http) as client:
+        downloader = PdfDownloader(client, output_dir, store, config)
+        return await asyncio.gather(*(downloader.fetch(paper) for paper in papers if paper.pdf_url))
+
+class PdfDownloader:
+    """Downloads PDFs into a store and links them into one export directory.
+
+    At most `max_concurrent` downloads run at a time and `max_per_host` per
+    publisher. PDFs already in the store are revalidated with a conditional GET,
+    so an unchanged file costs no body bytes and no extra disk space.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, output_dir: Path, store: PdfStore,
+                 config: DownloadConfig | None = None):
+        self.client = client
+        self.output_dir = output_dir
+        self.store = store
+        self.config = config or DownloadConfig()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self._semaphore = asyncio.Semaphore(self.config.max_concurrent)
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        # Papers sharing a URL share a staging file; the second one waits and revalidates
+        self._url_locks: dict[str, asyncio.Lock] = {}
+        self._names: set[str] = set()
+
+    def fetch(self, paper: Paper) -> Awaitable[DownloadResult]:
+        """Claim a file name for `paper` now, in call order, and return its download."""
+        name = pdf_filename(paper)
+        # Same-titled papers get distinct files instead of overwriting each other
+        for n in itertools.count(2):
+            if name not in self._names:
+                break
+            name = pdf_filename(paper, suffix=f" ({n})")
+        self._names.add(name)
+        return self._fetch(paper, self.output_dir / name)
+
+    async def _fetch(self, paper: Paper, target: Path) -> DownloadResult:
+        url = paper.pdf_url
+        host_slot = self._host_slots.setdefault(httpx.URL(url).host, asyncio.Semaphore(self.config.max_per_host))
+        async with self._url_locks.setdefault(url, asyncio.Lock()):
+            entry = self.store.lookup(url)
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+            async with self._semaphore, host_slot:
+                result = await download_pdf(self.client, url, self.store.staging_path(url), self.config, headers)
+            if result.status == "failed":
+                return result.model_copy(update={"paper_id": paper.id, "path": target})
+            if result.status == "not_modified":
+                self.store.touch(url)
+                sha256 = entry.sha256
+            else:
+                sha256 = self.store.ingest(result.path, url, paper.id, result.etag, result.last_modified).sha256
+        self.store.link(sha256, target)
+        return result.model_copy(update={"paper_id": paper.id, "path": target})
+
+async def download_pdf(client: httpx.AsyncClient, url: str, path: Path,
+                       config: DownloadConfig | None = None, headers: dict[str, str] | None = None) -> DownloadResult:
+    """Stream `url` to `path` through a `.part` file, resuming and retrying on failure.
+
+    The final file only appears once complete, so an existing `path` is always a
+    finished download and is skipped. `headers` may carry conditional-GET
+    validators; a 304 reply leaves `path` untouched and reports `not_modified`.
+    A `.part` file is only resumed with If-Range, so a file that changed on the
+    server since (or a `.part` without a saved validator) is fetched from the start.
+    """
+    config = config or DownloadConfig()
+    if path.exists():
+        return DownloadResult(url=url, path=path, status="skipped")
+    part = path.with_name(path.name + PART_SUFFIX)
+    saved = part.with_name(part.name + VALIDATOR_SUFFIX)
+    for attempt in range(config.max_retries + 1):
+        validator = saved.read_text() if saved.exists() else None
+        offset = part.stat().st_size if part.exists() and validator else 0
+        try:
+            result = await _fetch_into(client, url, part, offset, config, headers or {}, validator)
+        except httpx.HTTPStatusError as e:
+            return DownloadResult(url=url, path=path, status="failed", error=str(e))
+        except _RetryableStatus as e:
+            error = str(e)
+            delay = min(config.backoff_max, e.delay) if e.delay is not None else _backoff(config, attempt)
+        except (httpx.TransportError, OSError) as e:
+            error = str(e) or type(e).__name__
+            delay = _backoff(config, attempt)
+        else:
+            if result.status != "not_modified":
+                os.replace(part, path)
+                saved.unlink(missing_ok=True)
+            return result.model_copy(update={"path": path})
+        if attempt < config.max_retries:
+            await asyncio.sleep(delay)
+    return DownloadResult(url=url, path=path, status="failed", error=error)
+
+async def _fetch_into(client: httpx.AsyncClient, url: str, part: Path, offset: int,
+                      config: DownloadConfig, conditional: dict[str, str], validator: str | None = None) -> DownloadResult:
+    """Write the rest of `url` to `part`, appending when the server honours the Range.
+
+    The Range is conditional on `validator`, the one saved when `part` was started;
+    a server whose file no longer matches it sends the whole new body with 200.
+    """
+    headers = dict(PDF_HEADERS)
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    else:
+        # Validators describe the stored copy, not a half-finished new one
+        headers.update(conditional)
+    async with client.stream("GET", url, headers=headers, follow_redirects=True, timeout=config.timeout) as response:
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        if response.status_code == 304:
+            return DownloadResult(url=url, path=part, status="not_modified", **validators)
+        if response.status_code == 416 and offset:
+            # The part file already holds the whole body
+            return DownloadResult(url=url, path=part, status="resumed", **validators)
+        if response.status_code in RETRY_STATUSES:
+            raise _RetryableStatus(response.status_code, retry_after(response))
+        response.raise_for_status()
+        # A server that ignores Range, or whose file changed, sends the full body with 200; start over
+        appended = response.status_code == 206
+        if not appended:
+            _save_validator(part, response)
+        written = 0
+        with open(part, "ab" if appended else "wb") as f:
+            async for chunk in response.aiter_bytes(config.chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+        status = "resumed" if appended else "downloaded"
+        return DownloadResult(url=url, path=part, status=status, bytes_written=written, **validators)
+
+def _save_validator(part: Path, response: httpx.Response) -> None:
+    """Keep what a later If-Range can name this body by: a strong ETag, else Last-Modified."""
+    etag = response.headers.get("ETag")
+    validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+    saved = part.with_name(part.name + VALIDATOR_SUFFIX)
+    if validator:
+        saved.write_text(validator)
+    else:
+        saved.unlink(missing_ok=True)
+
+def pdf_filename(paper: Paper, suffix: str = "") -> str:
+    safe_title = "".join(c for c in paper.title if c.isalnum() or c in " _-")
+    return f"{safe_title}{suffix}.pdf"
+
+def _backoff(config: DownloadConfig, attempt: int) -> float:
+    delay = min(config.backoff_max, config.backoff_base * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
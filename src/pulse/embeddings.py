@@ -0,0 +1,312 @@
+import importlib.util
+import math
+import sqlite3
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Protocol, Sequence
+
+from .config import EmbeddingConfig
+from .models import Paper
+from .relevance import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the optional extra
+    np = None
+
+DIMENSIONS = 256
+
+# Below this many stored vectors an exact scan beats probing an index
+IVF_MIN_VECTORS = 20_000
+# The index is retrained once the store has grown this much since the last training
+IVF_RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 8
+# Vectors sampled per centroid when training
+KMEANS_SAMPLE_PER_LIST = 32
+# Rows scored per matrix product, bounding the memory of a full pass
+CHUNK_ROWS = 16_384
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    paper_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    checksum INTEGER NOT NULL,
+    list INTEGER
+);
+CREATE INDEX IF NOT EXISTS embeddings_list ON embeddings (list);
+CREATE TABLE IF NOT EXISTS centroids (
+    list INTEGER PRIMARY KEY,
+    vector BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class Embedder(Protocol):
+    name: str
+    dimensions: int
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        """One L2-normalized float32 row per text."""
+        ...
+
+class HashingEmbedder:
+    """Feature hashing of words, word pairs and character trigrams into a unit vector.
+
+    Needs no model and has no randomness, so vectors cached by one run stay valid
+    for the next. It captures shared vocabulary and word forms ("twin", "twins"),
+    not synonyms; a sentence-transformers model does that.
+    """
+
+    def __init__(self, dimensions: int = DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        _require_numpy()
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        # Abstracts repeat words heavily, so each distinct word's trigrams are hashed once per batch
+        word_buckets: dict[str, list[tuple[int, float]]] = {}
+        for row, text in enumerate(texts):
+            words = tokenize(text)
+            indices, weights = [], []
+            for word, count in Counter(words).items():
+                buckets = word_buckets.get(word)
+                if buckets is None:
+                    padded = f"<{word}>"
+                    trigrams = (padded[i:i + 3] for i in range(len(padded) - 2))
+                    buckets = word_buckets[word] = [self._bucket(feature) for feature in (word, *trigrams)]
+                for index, sign in buckets:
+                    indices.append(index)
+                    weights.append(sign * count)
+            for pair, count in Counter(zip(words, words[1:])).items():
+                index, sign = self._bucket(" ".join(pair))
+                indices.append(index)
+                weights.append(sign * count)
+            if indices:
+                matrix[row] = np.bincount(indices, weights=weights, minlength=self.dimensions)
+        return _normalize(matrix)
+
+    def _bucket(self, feature: str) -> tuple[int, float]:
+        # The top bit picks the sign, so colliding features tend to cancel out
+        h = zlib.crc32(feature.encode())
+        return h % self.dimensions, 1.0 if h & 0x80000000 else -1.0
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model, run on the CPU."""
+
+    def __init__(self, model_name: str):
+        _require_numpy()
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("Model embeddings need sentence-transformers: pip install sentence-transformers") from None
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dimensions = self._model.get_sentence_embedding_dimension()
+        self.name = model_name.replace("/", "--")
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        vectors = self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+def get_embedder(model: str = "hashing") -> Embedder:
+    return HashingEmbedder() if model == "hashing" else SentenceTransformerEmbedder(model)
+
+def check_dependencies(config: EmbeddingConfig) -> None:
+    """Raise the ImportError building the configured embedder would, without loading a model."""
+    _require_numpy()
+    if config.model != "hashing" and importlib.util.find_spec("sentence_transformers") is None:
+        raise ImportError("Model embeddings need sentence-transformers: pip install sentence-transformers")
+
+def paper_text(paper: Paper) -> str:
+    return f"{paper.title}\n{paper.abstract}"
+
+def query_text(keywords: Sequence[str]) -> str:
+    return " ".join(keywords)
+
+def semantic_scores(papers: Sequence[Paper], keywords: Sequence[str],
+                    store: "EmbeddingStore | None" = None) -> list[float]:
+    """Cosine similarity of each paper to the query keywords, clipped to [0, 1].
+
+    With a store only the papers it has not embedded yet are embedded; without
+    one every paper is embedded with the hashing embedder.
+    """
+    if not papers:
+        return []
+    embedder = store.embedder if store is not None else HashingEmbedder()
+    vectors = store.vectors(papers) if store is not None else embedder.embed([paper_text(p) for p in papers])
+    query = embedder.embed([query_text(keywords)])[0]
+    return np.clip(vectors @ query, 0.0, 1.0).astype(np.float64).tolist()
+
+class EmbeddingStore:
+    """Paper embeddings in a memory-mapped float32 matrix, with an IVF index for nearest neighbours.
+
+    Rows are appended to `vectors.f32` and never rewritten; `index.sqlite` maps
+    each paper id to its row plus a checksum of the embedded text, so a paper is
+    only embedded again when its title or abstract changes. Once the store holds
+    IVF_MIN_VECTORS papers, k-means centroids split it into inverted lists and a
+    query scans only the `nprobe` lists nearest to it. Each embedder gets its
+    own directory, since vectors from different models are not comparable.
+    """
+
+    def __init__(self, root: Path, embedder: Embedder, nprobe: int = 32):
+        _require_numpy()
+        self.embedder = embedder
+        self.nprobe = nprobe
+        self.directory = root / embedder.name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._vectors_path = self.directory / "vectors.f32"
+        self._vectors_path.touch()
+        self._conn = sqlite3.connect(self.directory / "index.sqlite", isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._matrix = None
+        self._centroids = self._load_centroids()
+
+    @classmethod
+    def from_config(cls, config: EmbeddingConfig) -> "EmbeddingStore":
+        return cls(Path(config.directory).expanduser(), get_embedder(config.model), config.nprobe)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def missing(self, paper_ids: Sequence[str]) -> list[str]:
+        """Those of `paper_ids` that have no stored embedding."""
+        stored = self._rows(paper_ids)
+        return [paper_id for paper_id in paper_ids if paper_id not in stored]
+
+    def vectors(self, papers: Sequence[Paper]) -> "np.ndarray":
+        """The embedding of each paper, embedding only those not stored already."""
+        texts = [paper_text(paper) for paper in papers]
+        checksums = [zlib.crc32(text.encode()) for text in texts]
+        stored = self._rows([paper.id for paper in papers])
+        pending = {}
+        for paper, text, checksum in zip(papers, texts, checksums):
+            if stored.get(paper.id, (None, None))[1] != checksum:
+                pending[paper.id] = (text, checksum)
+        if pending:
+            stored.update(self._add(pending))
+        return self._matrix_view()[[stored[paper.id][0] for paper in papers]]
+
+    def nearest(self, keywords: Sequence[str], k: int = 10) -> list[tuple[str, float]]:
+        """The `k` stored papers most similar to the query keywords, as (paper id, cosine), best first."""
+        query = self.embedder.embed([query_text(keywords)])[0]
+        if len(self) >= IVF_MIN_VECTORS:
+            self._ensure_index()
+            probed = np.argsort(-(self._centroids @ query))[:self.nprobe]
+            placeholders = ",".join("?" * len(probed))
+            rows = self._conn.execute(
+                f"SELECT row, paper_id FROM embeddings WHERE list IN ({placeholders})", probed.tolist()
+            ).fetchall()
+        else:
+            rows = self._conn.execute("SELECT row, paper_id FROM embeddings").fetchall()
+        if not rows:
+            return []
+        # Ascending row order turns the gather into mostly sequential reads of the map
+        rows.sort()
+        row_ids = np.fromiter((row for row, _ in rows), dtype=np.int64, count=len(rows))
+        scores = self._matrix_view()[row_ids] @ query
+        best = np.argsort(-scores)[:k] if k >= len(scores) else np.argpartition(-scores, k)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(rows[i][1], float(scores[i])) for i in best.tolist()]
+
+    def close(self) -> None:
+        self._matrix = None
+        self._conn.close()
+
+    def _rows(self, paper_ids: Sequence[str]) -> dict[str, tuple[int, int]]:
+        found = {}
+        ids = list(dict.fromkeys(paper_ids))
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            found.update(
+                (paper_id, (row, checksum)) for paper_id, row, checksum in self._conn.execute(
+                    f"SELECT paper_id, row, checksum FROM embeddings WHERE paper_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return found
+
+    def _add(self, pending: dict[str, tuple[str, int]]) -> dict[str, tuple[int, int]]:
+        vectors = self.embedder.embed([text for text, _ in pending.values()]).astype(np.float32, copy=False)
+        start = self._vectors_path.stat().st_size // (4 * self.embedder.dimensions)
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        self._matrix = None
+        lists = self._assign(vectors) if self._centroids is not None else [None] * len(vectors)
+        added = {paper_id: (start + i, checksum) for i, (paper_id, (_, checksum)) in enumerate(pending.items())}
+        # A re-embedded paper's old row stays in the file but is no longer referenced
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (paper_id, row, checksum, list) VALUES (?, ?, ?, ?)",
+                ((paper_id, row, checksum, lst) for (paper_id, (row, checksum)), lst in zip(added.items(), lists)),
+            )
+        return added
+
+    def _matrix_view(self) -> "np.ndarray":
+        rows = self._vectors_path.stat().st_size // (4 * self.embedder.dimensions)
+        if self._matrix is None or len(self._matrix) != rows:
+            if rows == 0:
+                self._matrix = np.empty((0, self.embedder.dimensions), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r",
+                                         shape=(rows, self.embedder.dimensions))
+        return self._matrix
+
+    def _ensure_index(self) -> None:
+        size = len(self)
+        trained = self._conn.execute("SELECT value FROM meta WHERE key = 'trained_size'").fetchone()
+        if self._centroids is None or trained is None or size > IVF_RETRAIN_GROWTH * trained[0]:
+            self._train(size)
+
+    def _train(self, size: int) -> None:
+        """Spherical k-means on a sample of the stored vectors, then file every vector under its centroid."""
+        stored = self._conn.execute("SELECT row, paper_id FROM embeddings ORDER BY row").fetchall()
+        rows = np.fromiter((row for row, _ in stored), dtype=np.int64, count=len(stored))
+        matrix = self._matrix_view()
+        lists = max(1, int(math.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+        sample = matrix[np.sort(rng.choice(rows, size=min(len(rows), lists * KMEANS_SAMPLE_PER_LIST), replace=False))]
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.linalg.norm(sums, axis=1) > 0
+            # A centroid that attracted nothing keeps its old position
+            centroids[filled] = _normalize(sums[filled])
+        self._centroids = centroids
+        assignment = np.concatenate([
+            np.argmax(matrix[rows[i:i + CHUNK_ROWS]] @ centroids.T, axis=1) for i in range(0, len(rows), CHUNK_ROWS)
+        ])
+        with self._conn:
+            # Rebuilding the list index once is far cheaper than updating it row by row
+            self._conn.execute("DROP INDEX IF EXISTS embeddings_list")
+            self._conn.execute("DELETE FROM centroids")
+            self._conn.executemany("INSERT INTO centroids (list, vector) VALUES (?, ?)",
+                                   ((i, vector.tobytes()) for i, vector in enumerate(centroids)))
+            self._conn.executemany("UPDATE embeddings SET list = ? WHERE paper_id = ?",
+                                   zip(assignment.tolist(), (paper_id for _, paper_id in stored)))
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('trained_size', ?)", (size,))
+            self._conn.execute("CREATE INDEX embeddings_list ON embeddings (list)")
+
+    def _assign(self, vectors: "np.ndarray") -> list[int]:
+        return np.argmax(vectors @ self._centroids.T, axis=1).tolist()
+
+    def _load_centroids(self) -> "np.ndarray | None":
+        blobs = [vector for (vector,) in self._conn.execute("SELECT vector FROM centroids ORDER BY list")]
+        if not blobs:
+            return None
+        return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), self.embedder.dimensions)
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Semantic ranking needs numpy: install the semantic extra, e.g. uv sync --extra semantic")
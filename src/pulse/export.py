@@ -1,92 +1,220 @@
 from pulse.models import Paper
 from pathlib import Path
 from datetime import datetime
-from typing import List
-import httpx
+from typing import TYPE_CHECKING, AsyncIterable, Callable, Iterable, List, NamedTuple, TextIO
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
 import asyncio
+import csv
+import functools
+import gzip
+import io
+import itertools
+from pulse.columnar import COLUMNAR_FORMATS, ColumnarWriter
+from pulse.config import DownloadConfig, HttpConfig
 
-def export_markdown(papers: List[Paper], output_path: str = "./digest.md") -> Path:
-    output_dir = Path(output_path).parent
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("# Scholar Pulse Digest\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
+# httpx and the downloader load with the first PDF export; text exports never need them
+if TYPE_CHECKING:
+    import httpx
+    from pulse.download import DownloadResult
+
+# Rendered records accumulate here and reach the disk in large writes
+WRITE_BUFFER = 1024 * 1024
+# Papers handed to the renderer threads at a time by export_many
+EXPORT_BATCH = 500
+PDF_DIRECTORY = "papers"
+
+def export_markdown(papers: Iterable[Paper], output_path: str = "./digest.md") -> Path:
+    """Write papers as a Markdown digest; a `.gz` output path is gzip-compressed."""
+    with _open_output(output_path) as f:
+        f.write(_markdown_header())
         for i, paper in enumerate(papers, 1):
-            f.write(f"## {i}. {paper.title}\n")
-            
-            authors_str = ", ".join(paper.authors) if paper.authors else "Unknown"
-            f.write(f"- **Authors:** {authors_str}\n")
-            f.write(f"- **Published:** {paper.published_date}\n")
-            f.write(f"- **Citations:** {paper.citation_count}\n")
-            
-            score_str = f"{paper.relevance_score:.3f}" if paper.relevance_score is not None else "N/A"
-            f.write(f"- **Score:** {score_str}\n")
-            
-            link = paper.url or paper.doi or paper.pdf_url or paper.openalex_id or paper.arxiv_id or ""
-            if link:
-                f.write(f"- **Link:** {link}\n")
-                
-            f.write(f"- **Source:** {paper.source_provider}\n\n")
-            
-            if paper.abstract:
-                f.write(f"> {paper.abstract}\n\n")
-                
-            f.write("---\n\n")
-            
+            f.write(render_markdown(i, paper))
+    return Path(output_path)
+
+async def export_markdown_async(papers: AsyncIterable[Paper], output_path: str = "./digest.md") -> Path:
+    with _open_output(output_path) as f:
+        f.write(_markdown_header())
+        i = 0
+        async for paper in papers:
+            i += 1
+            f.write(render_markdown(i, paper))
     return Path(output_path)
 
-def export_bibtex(papers: List[Paper], output_path: str = "./digest.bib") -> Path:
-    output_dir = Path(output_path).parent
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_path, "w", encoding="utf-8") as f:
+def export_bibtex(papers: Iterable[Paper], output_path: str = "./digest.bib") -> Path:
+    """Write papers as BibTeX entries; a `.gz` output path is gzip-compressed."""
+    with _open_output(output_path) as f:
         for paper in papers:
-            f.write(f"@article{{{paper.id},\n")
-            f.write(f"  title = {{{paper.title}}},\n")
-            f.write(f"  author = {{{' and '.join(paper.authors)}}},\n")
-            f.write(f"  journal = {{{paper.source_provider}}},\n")
-            f.write(f"  year = {{{paper.published_date.year}}},\n")
-            
-            if paper.doi:
-                f.write(f"  doi = {{{paper.doi}}},\n")
-            if paper.url:
-                f.write(f"  url = {{{paper.url}}},\n")
-            if paper.abstract:
-                f.write(f"  abstract = {{{paper.abstract}}},\n")
-            
-            score_str = f"{paper.relevance_score:.3f}" if paper.relevance_score is not None else "N/A"
-            f.write(f"  note = {{Citations: {paper.citation_count}, Score: {score_str}}}\n")
-            f.write("}\n\n")
-            
+            f.write(render_bibtex(paper))
+    return Path(output_path)
+
+async def export_bibtex_async(papers: AsyncIterable[Paper], output_path: str = "./digest.bib") -> Path:
+    with _open_output(output_path) as f:
+        async for paper in papers:
+            f.write(render_bibtex(paper))
     return Path(output_path)
 
-async def export_pdfs(papers: List[Paper], output_path: str = "./papers") -> Path:
-    output_dir = Path(output_path)
-    output_dir.mkdir(parents=True, exist_ok=True)
-    paper_with_pdf = [p for p in papers if p.pdf_url]
-    
-    # Use a standard User-Agent to prevent 403 Forbidden errors from publishers
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-    
-    async with httpx.AsyncClient(headers=headers) as client:
-        tasks = []
-        for paper in paper_with_pdf:
-            safe_title = "".join(c for c in paper.title if c.isalnum() or c in " _-")
-            tasks.append(download_pdfs(client, paper.pdf_url, output_dir / f"{safe_title}.pdf"))
-        await asyncio.gather(*tasks)
-    return output_dir
-
-async def download_pdfs(client:httpx.AsyncClient, url: str, path: Path):
-    if path.exists():
-        return
-    try:
-        response = await client.get(url, timeout=10, follow_redirects=True)
-        response.raise_for_status()
-        with open(path, "wb") as f:
-            f.write(response.content)
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
\ No newline at end of file
+def render_markdown(i: int, paper: Paper) -> str:
+    authors_str = ", ".join(paper.authors) if paper.authors else "Unknown"
+    score_str = f"{paper.relevance_score:.3f}" if paper.relevance_score is not None else "N/A"
+    link = paper.url or paper.doi or paper.pdf_url or paper.openalex_id or paper.arxiv_id or ""
+    link_line = f"- **Link:** {link}\n" if link else ""
+    abstract = f"> {paper.abstract}\n\n" if paper.abstract else ""
+    return (
+        f"## {i}. {paper.title}\n"
+        f"- **Authors:** {authors_str}\n"
+        f"- **Published:** {paper.published_date}\n"
+        f"- **Citations:** {paper.citation_count}\n"
+        f"- **Score:** {score_str}\n"
+        f"{link_line}"
+        f"- **Source:** {paper.source_provider}\n\n"
+        f"{abstract}"
+        "---\n\n"
+    )
+
+def render_bibtex(paper: Paper) -> str:
+    doi = f"  doi = {{{paper.doi}}},\n" if paper.doi else ""
+    url = f"  url = {{{paper.url}}},\n" if paper.url else ""
+    abstract = f"  abstract = {{{paper.abstract}}},\n" if paper.abstract else ""
+    score_str = f"{paper.relevance_score:.3f}" if paper.relevance_score is not None else "N/A"
+    return (
+        f"@article{{{paper.id},\n"
+        f"  title = {{{paper.title}}},\n"
+        f"  author = {{{' and '.join(paper.authors)}}},\n"
+        f"  journal = {{{paper.source_provider}}},\n"
+        f"  year = {{{paper.published_date.year}}},\n"
+        f"{doi}{url}{abstract}"
+        f"  note = {{Citations: {paper.citation_count}, Score: {score_str}}}\n"
+        "}\n\n"
+    )
+
+def _write_columnar_batch(writer: ColumnarWriter, batch: tuple[Paper, ...], start: int) -> None:
+    writer.write(batch)
+
+def _markdown_header() -> str:
+    return f"# Scholar Pulse Digest\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+
+def render_jsonl(paper: Paper) -> str:
+    return paper.model_dump_json() + "\n"
+
+CSV_COLUMNS = (
+    "id", "title", "authors", "published_date", "citation_count", "relevance_score", "doi",
+    "arxiv_id", "openalex_id", "url", "pdf_url", "source_provider", "keywords",
+)
+
+def render_csv(paper: Paper) -> str:
+    row = [getattr(paper, column) for column in CSV_COLUMNS]
+    row[CSV_COLUMNS.index("authors")] = "; ".join(paper.authors)
+    row[CSV_COLUMNS.index("keywords")] = "; ".join(paper.keywords)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow("" if value is None else value for value in row)
+    return buffer.getvalue()
+
+def render_ris(paper: Paper) -> str:
+    lines = ["TY  - JOUR", f"TI  - {paper.title}"]
+    lines.extend(f"AU  - {author}" for author in paper.authors)
+    lines.append(f"PY  - {paper.published_date.year}")
+    lines.append(f"DA  - {paper.published_date:%Y/%m/%d}")
+    if paper.doi:
+        lines.append(f"DO  - {paper.doi}")
+    if paper.url:
+        lines.append(f"UR  - {paper.url}")
+    if paper.pdf_url:
+        lines.append(f"L1  - {paper.pdf_url}")
+    if paper.abstract:
+        lines.append(f"AB  - {paper.abstract}")
+    lines.extend(f"KW  - {keyword}" for keyword in paper.keywords)
+    lines.append("ER  - ")
+    return "\n".join(lines) + "\n\n"
+
+class TextFormat(NamedTuple):
+    filename: str
+    header: Callable[[], str]
+    render: Callable[[int, Paper], str]
+
+TEXT_FORMATS = {
+    "md": TextFormat("digest.md", _markdown_header, render_markdown),
+    "bibtex": TextFormat("digest.bib", str, lambda i, paper: render_bibtex(paper)),
+    "jsonl": TextFormat("digest.jsonl", str, lambda i, paper: render_jsonl(paper)),
+    "csv": TextFormat("digest.csv", lambda: ",".join(CSV_COLUMNS) + "\n", lambda i, paper: render_csv(paper)),
+    "ris": TextFormat("digest.ris", str, lambda i, paper: render_ris(paper)),
+}
+FORMATS = (*TEXT_FORMATS, *COLUMNAR_FORMATS, "pdf")
+COLUMNAR_FILENAMES = {"parquet": "digest.parquet", "arrow": "digest.arrow"}
+
+def export_paths(formats: List[str], output_path: str | None = None) -> dict[str, Path]:
+    """Where each format goes: a single format uses `output_path` as-is, several share it as a directory."""
+    if output_path and len(formats) == 1:
+        return {formats[0]: Path(output_path)}
+    base = Path(output_path or ".")
+    filenames = {"pdf": PDF_DIRECTORY, **COLUMNAR_FILENAMES, **{fmt: spec.filename for fmt, spec in TEXT_FORMATS.items()}}
+    return {fmt: base / filenames[fmt] for fmt in formats}
+
+async def export_many(papers: Iterable[Paper], formats: Iterable[str], output_path: str | None = None,
+                      client: "httpx.AsyncClient | None" = None, config: DownloadConfig | None = None,
+                      http: HttpConfig | None = None) -> tuple[dict[str, Path], List["DownloadResult"]]:
+    """Produce every requested format in a single pass over `papers`.
+
+    Text and columnar formats render batch by batch in a thread pool, one worker per format,
+    while PDF downloads start as their papers stream past and run on the event
+    loop, so wall time approaches max(render, download) rather than the sum.
+    Without a `client`, the downloads share one built from `http`.
+    """
+    formats = list(dict.fromkeys(formats))
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format: {', '.join(unknown)}")
+    paths = export_paths(formats, output_path)
+    loop = asyncio.get_running_loop()
+    downloads = []
+    async with AsyncExitStack() as stack:
+        downloader = None
+        if "pdf" in formats:
+            from pulse.client import borrow_client
+            from pulse.download import PdfDownloader
+            from pulse.pdfstore import PdfStore
+            config = config or DownloadConfig()
+            store = PdfStore.from_config(config)
+            stack.callback(store.close)
+            client = await stack.enter_async_context(borrow_client(client, http))
+            downloader = PdfDownloader(client, paths["pdf"], store, config)
+        writers = {}
+        for fmt in formats:
+            if fmt in TEXT_FORMATS:
+                f = stack.enter_context(_open_output(paths[fmt]))
+                f.write(TEXT_FORMATS[fmt].header())
+                writers[fmt] = functools.partial(_write_batch, f, TEXT_FORMATS[fmt])
+            elif fmt in COLUMNAR_FORMATS:
+                columnar = stack.enter_context(ColumnarWriter(paths[fmt], fmt))
+                writers[fmt] = functools.partial(_write_columnar_batch, columnar)
+        pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, len(writers))))
+
+        start = 1
+        try:
+            for batch in itertools.batched(papers, EXPORT_BATCH):
+                if downloader is not None:
+                    downloads.extend(asyncio.ensure_future(downloader.fetch(paper)) for paper in batch if paper.pdf_url)
+                await asyncio.gather(*(loop.run_in_executor(pool, write, batch, start) for write in writers.values()))
+                start += len(batch)
+            results = await asyncio.gather(*downloads)
+        except BaseException:
+            for download in downloads:
+                download.cancel()
+            raise
+    return paths, list(results)
+
+def _write_batch(f: TextIO, fmt: TextFormat, batch: tuple[Paper, ...], start: int) -> None:
+    f.write("".join(fmt.render(i, paper) for i, paper in enumerate(batch, start)))
+
+def _open_output(output_path: str) -> TextIO:
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".gz":
+        raw = io.BufferedWriter(gzip.GzipFile(path, "wb"), WRITE_BUFFER)
+        return io.TextIOWrapper(raw, encoding="utf-8", write_through=False)
+    return open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER)
+
+async def export_pdfs(papers: List[Paper], output_path: str = "./papers", client: "httpx.AsyncClient | None" = None,
+                      config: DownloadConfig | None = None, http: HttpConfig | None = None) -> List["DownloadResult"]:
+    from pulse.download import download_papers
+    return await download_papers(papers, Path(output_path), client, config, http=http)
@@ -1,14 +1,16 @@
 import typer
 from rich import print
-from rich.table import Table
-import asyncio
-from pulse import service, config, storage
-from pulse import export as export_module
+import itertools
+from pulse import config, storage
 from pulse.models import Paper
-from typing import Annotated
+from typing import Annotated, Iterable
 from pathlib import Path
 from pydantic import BaseModel
 
+# Searching and exporting pull in httpx, asyncio, the providers and pyarrow, so
+# commands import what they need when they run: `pulse list` and `pulse config
+# show` start without paying for them. tests/test_startup.py holds the line.
+
 app = typer.Typer()
 config_app = typer.Typer()
 app.add_typer(config_app, name="config")
@@ -20,62 +22,76 @@ def callback():
 @app.command("digest")
 def digest(top_n: Annotated[int, typer.Option(min=1, max=100)] = 10,
            days: Annotated[int, typer.Option(min=1)] = 30,
-           export: Annotated[str, typer.Option(help="Export format: md or bibtex")] = None,
-           export_path: Annotated[str, typer.Option(help="Export path")] = None):
-    papers = asyncio.run(service.run_digest(top_n=top_n, days=days))
+           export: Annotated[str, typer.Option(help="Export formats, comma separated: md, bibtex, jsonl, csv, ris, parquet, arrow, pdf")] = None,
+           export_path: Annotated[str, typer.Option(help="Export path (a directory when exporting several formats)")] = None,
+           since_last_run: Annotated[bool, typer.Option(help="Only fetch papers published since the last digest")] = False):
+    import asyncio
+    from pulse import service
+    _check_semantic_dependencies()
+    papers = asyncio.run(service.run_digest(top_n=top_n, days=days, incremental=since_last_run))
     _render_table(papers, title=f"📚 Scholar Pulse Digest ({days} days)")
-    if export == "md":
-        kwargs = {"output_path": export_path} if export_path else {}
-        path = export_module.export_markdown(papers, **kwargs)
-        print(f"\n[green]Exported to {path.absolute()}[/green]")
-    elif export == "bibtex":
-        kwargs = {"output_path": export_path} if export_path else {}
-        path = export_module.export_bibtex(papers, **kwargs)
-        print(f"\n[green]Exported to {path.absolute()}[/green]")
-    elif export == "pdf":
-        kwargs = {"output_path": export_path} if export_path else {}
-        print("\n[cyan]Downloading PDFs...[/cyan]")
-        path = asyncio.run(export_module.export_pdfs(papers, **kwargs))
-        print(f"\n[green]Downloaded PDFs to {path.absolute()}[/green]")
-    elif export:
-        print(f"\n[red]Unknown export format: {export}[/red]")
+    if export:
+        _export(papers, export, export_path)
 
 @app.command("search")
-def search(query: Annotated[str, typer.Argument(help="Search query (comma separated)")], categories: Annotated[str, typer.Option(help="Categories (comma separated)")] = None):
+def search(query: Annotated[str, typer.Argument(help="Search query (comma separated)")], categories: Annotated[str, typer.Option(help="Categories (comma separated)")] = None,
+           offline: Annotated[bool, typer.Option(help="Search the saved library instead of the providers")] = False):
+    from pulse import service
+    _check_semantic_dependencies()
+    if offline:
+        papers = service.search_library(query, categories)
+        _render_table(papers, title="📚 Scholar Pulse Library Search")
+        return
+    import asyncio
     papers = asyncio.run(service.search(query, categories))
     _render_table(papers, title="📚 Scholar Pulse Search")
 
 @app.command("list")
-def list_papers():
-    papers = storage.load_papers()
+def list_papers(keyword: Annotated[str, typer.Option(help="Only papers mentioning any of these phrases in title, abstract or keywords (comma separated)")] = None,
+                author: Annotated[str, typer.Option(help="Only papers by this author")] = None,
+                year: Annotated[int, typer.Option(help="Only papers published in this year")] = None,
+                min_citations: Annotated[int, typer.Option(min=0, help="Only papers cited at least this often")] = None,
+                limit: Annotated[int, typer.Option(min=1, help="Show at most this many papers")] = None):
+    if keyword or author or year is not None or min_citations is not None or limit is not None:
+        phrases = [k.strip() for k in keyword.split(",")] if keyword else []
+        papers = storage.search_papers(phrases, author, year, min_citations, limit)
+    else:
+        papers = storage.load_papers()
     _render_table(papers, title="📚 Scholar Pulse Papers")
 
+@app.command("refresh")
+def refresh():
+    import asyncio
+    from pulse import service
+    if not storage.count_papers():
+        print("[yellow]No papers found.[/yellow]")
+        return
+    changed = asyncio.run(service.refresh_library())
+    print(f"[green]Updated {changed} of {storage.count_papers()} papers[/green]")
+
 @app.command("export")
-def export(format: Annotated[str, typer.Option(help="Export format: md or bibtex")] = None, output_path: Annotated[str, typer.Option(help="Export path")] = None):
-    papers = storage.load_papers()
+def export(format: Annotated[str, typer.Option(help="Export formats, comma separated: md, bibtex, jsonl, csv, ris, parquet, arrow, pdf")] = None, output_path: Annotated[str, typer.Option(help="Export path (.gz to compress; a directory when exporting several formats)")] = None):
     if format is None:
         format = config.load_config().export.default_format
-    if not papers:
+    if not storage.count_papers():
         print("[yellow]No papers found.[/yellow]")
         return
-    if format == "md":
-        kwargs = {"output_path": output_path} if output_path else {}
-        path = export_module.export_markdown(papers, **kwargs)
-        print(f"\n[green]Exported to {path.absolute()}[/green]")
-    elif format == "bibtex":
-        kwargs = {"output_path": output_path} if output_path else {}
-        path = export_module.export_bibtex(papers, **kwargs)
-        print(f"\n[green]Exported to {path.absolute()}[/green]")
-    elif format == "pdf":
-        kwargs = {"output_path": output_path} if output_path else {}
-        print("\n[cyan]Downloading PDFs...[/cyan]")
-        path = asyncio.run(export_module.export_pdfs(papers, **kwargs))
-        print(f"\n[green]Downloaded PDFs to {path.absolute()}[/green]")
-    elif format:
-        print(f"\n[red]Unknown export format: {format}[/red]")
+    # Read the library page by page so exports run in bounded memory
+    papers = itertools.chain.from_iterable(storage.iter_papers())
+    _export(papers, format, output_path)
+
+@app.command("import")
+def import_library(path: Annotated[Path, typer.Argument(help="Parquet or Arrow file written by `pulse export`")]):
+    from pulse import columnar
+    imported = 0
+    for batch in columnar.read_columnar(path):
+        storage.upsert_papers(batch)
+        imported += len(batch)
+    print(f"[green]Imported {imported} papers from {path}[/green]")
 
 @config_app.command("show")
 def config_show():
+    from rich.table import Table
     settings = config.load_config()
     # setting is a nested dictionary
     table = Table(title="📚 Scholar Pulse Config", show_lines=True, expand=True)
@@ -153,7 +169,44 @@ def config_init():
     print("[green]Config initialized[/green]")
     config_show()
 
+def _check_semantic_dependencies():
+    """Stop with a one-line error, before any fetching, when semantic ranking is on but cannot run."""
+    settings = config.load_config()
+    if settings.ranking.weight_semantic <= 0:
+        return
+    from pulse.embeddings import check_dependencies
+    try:
+        check_dependencies(settings.embeddings)
+    except ImportError as e:
+        print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+def _export(papers: Iterable[Paper], formats: str, output_path: str | None):
+    import asyncio
+    from pulse import export as export_module
+    formats = [fmt.strip() for fmt in formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in export_module.FORMATS]
+    if unknown:
+        print(f"\n[red]Unknown export format: {', '.join(unknown)}[/red]")
+        return
+    if "pdf" in formats:
+        print("\n[cyan]Downloading PDFs...[/cyan]")
+    settings = config.load_config()
+    paths, downloads = asyncio.run(export_module.export_many(papers, formats, output_path, config=settings.download,
+                                                                      http=settings.http))
+    for fmt, path in paths.items():
+        if fmt != "pdf":
+            print(f"\n[green]Exported {fmt} to {path.absolute()}[/green]")
+    if "pdf" in paths:
+        for result in downloads:
+            if result.status == "failed":
+                print(f"[red]Failed {result.url}: {result.error}[/red]")
+        counts = {status: sum(1 for r in downloads if r.status == status) for status in ("downloaded", "resumed", "not_modified", "skipped", "failed")}
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+        print(f"\n[green]PDFs in {paths['pdf'].absolute()}: {summary or 'nothing to download'}[/green]")
+
 def _render_table(papers: list[Paper], title: str = "📚 Scholar Pulse Papers"):
+    from rich.table import Table
     table = Table(title=title, show_lines=True, expand=True)
     table.add_column("#", justify="right", style="bold cyan", width=3)
     table.add_column("Title", style="white", ratio=3, no_wrap=False)
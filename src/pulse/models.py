@@ -16,8 +16,18 @@ class Paper(BaseModel):
     keywords: list[str]
     source_provider: str
     relevance_score: float | None
+    # Providers whose records were merged into this one; empty for a single-source paper
+    sources: list[str] = Field(default_factory=list)
     saved_at: datetime = Field(default_factory=datetime.now)
 
+class Citations(BaseModel):
+    """Citation edges around some papers, with the neighbouring papers a provider described.
+
+    Edges are (citing, cited) graph node keys; see `graph.node_key`.
+    """
+    edges: list[tuple[str, str]] = Field(default_factory=list)
+    papers: list[Paper] = Field(default_factory=list)
+
 class Query(BaseModel):
     keywords: list[str]
     categories: list[str]
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from .config import DownloadConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdfs (
+    url TEXT PRIMARY KEY,
+    paper_id TEXT,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdfs_paper_id ON pdfs (paper_id);
+CREATE INDEX IF NOT EXISTS pdfs_sha256 ON pdfs (sha256);
+"""
+
+HASH_CHUNK = 1024 * 1024
+
+class ManifestEntry(BaseModel):
+    url: str
+    paper_id: str | None
+    sha256: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+
+class PdfStore:
+    """Content-addressed PDF blobs keyed by SHA-256, with a manifest of where each came from.
+
+    Blobs live at `blobs/<first two hex chars>/<sha256>.pdf`; the SQLite manifest
+    maps source URLs and paper ids to a blob plus the validators (ETag,
+    Last-Modified) needed to revalidate it with a conditional GET. Export
+    directories receive hardlinks, so every copy of a PDF shares one blob.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        (root / "blobs").mkdir(parents=True, exist_ok=True)
+        (root / "staging").mkdir(exist_ok=True)
+        self._conn = sqlite3.connect(root / "manifest.sqlite", isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls, config: DownloadConfig) -> "PdfStore":
+        return cls(Path(config.store_directory).expanduser())
+
+    def lookup(self, url: str) -> ManifestEntry | None:
+        """The manifest entry for `url`, provided its blob is still on disk."""
+        row = self._conn.execute(
+            "SELECT url, paper_id, sha256, size, etag, last_modified FROM pdfs WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = ManifestEntry(**dict(zip(ManifestEntry.model_fields, row)))
+        return entry if self.blob_path(entry.sha256).exists() else None
+
+    def staging_path(self, url: str) -> Path:
+        """Where a download of `url` is assembled; stable, so interrupted downloads resume."""
+        return self.root / "staging" / f"{hashlib.sha256(url.encode()).hexdigest()}.pdf"
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / f"{sha256}.pdf"
+
+    def ingest(self, path: Path, url: str, paper_id: str | None = None,
+               etag: str | None = None, last_modified: str | None = None) -> ManifestEntry:
+        """Move a finished download into the store, dropping it if the blob already exists."""
+        sha256, size = _file_digest(path)
+        blob = self.blob_path(sha256)
+        if blob.exists():
+            path.unlink()
+        else:
+            blob.parent.mkdir(exist_ok=True)
+            os.replace(path, blob)
+        self._conn.execute(
+            """INSERT OR REPLACE INTO pdfs (url, paper_id, sha256, size, etag, last_modified, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (url, paper_id, sha256, size, etag, last_modified, time.time()),
+        )
+        return ManifestEntry(url=url, paper_id=paper_id, sha256=sha256, size=size,
+                             etag=etag, last_modified=last_modified)
+
+    def touch(self, url: str) -> None:
+        """Record that `url` was revalidated without change."""
+        self._conn.execute("UPDATE pdfs SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def link(self, sha256: str, target: Path) -> None:
+        """Place blob `sha256` at `target` as a hardlink, copying when linking isn't possible."""
+        blob = self.blob_path(sha256)
+        if target.exists() and os.path.samefile(blob, target):
+            return
+        tmp = target.with_name(target.name + ".link")
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            # Different filesystem, or one without hardlinks
+            shutil.copyfile(blob, tmp)
+        os.replace(tmp, target)
+
+    def close(self) -> None:
+        self._conn.close()
+
+def _file_digest(path: Path) -> tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
@@ -1,11 +1,69 @@
-from typing import Protocol, List
-from ..models import Paper, Query
+import json
+from typing import Any, Protocol, Iterable, List, AsyncIterator
+import httpx
+from ..models import Citations, Paper, Query
+from ..cache import ResponseCache
+from ..ratelimit import RateLimiter
 
 class Provider(Protocol):
     async def search(self, query: Query) -> List[Paper]:
         """Search for papers matching the query."""
         ...
 
+    def search_pages(self, query: Query) -> AsyncIterator[List[Paper]]:
+        """Yield batches of papers page by page until `query.max_results` is reached."""
+        ...
+
+    async def get_citations(self, papers: List[Paper], limit: int) -> Citations:
+        """Edges to the works citing and cited by `papers`, up to `limit` each way per paper."""
+        ...
+
     async def get_paper(self, paper_id: str) -> Paper | None:
         """Get a paper by its ID."""
-        ...
\ No newline at end of file
+        ...
+
+    async def get_papers(self, paper_ids: Iterable[str]) -> List[Paper]:
+        """Get many papers in as few requests as the API allows; unknown ids are skipped."""
+        ...
+
+    def lookup_id(self, paper: Paper) -> str | None:
+        """The id `get_papers` finds `paper` by, or None when the paper has none this provider knows."""
+        ...
+
+async def get_json(client: httpx.AsyncClient, rate_limiter: RateLimiter, cache: ResponseCache | None,
+                   url: str, params: dict, headers: dict | None = None) -> dict:
+    """GET a provider endpoint, serving and filling the response cache when one is given."""
+    key = ResponseCache.key(url, params) if cache else None
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    response = await rate_limiter.request(client, "GET", url, params=params, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    if cache:
+        cache.set(key, data)
+    return data
+
+async def post_json(client: httpx.AsyncClient, rate_limiter: RateLimiter, cache: ResponseCache | None,
+                    url: str, params: dict, body: Any, headers: dict | None = None) -> Any:
+    """POST to a provider endpoint; cached like `get_json`, with the body as part of the key."""
+    key = ResponseCache.key(url, {**params, "body": json.dumps(body, sort_keys=True)}) if cache else None
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    response = await rate_limiter.request(client, "POST", url, params=params, json=body, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+    if cache:
+        cache.set(key, data)
+    return data
+
+def bare_doi(identifier: str) -> str | None:
+    """The DOI in `identifier` (bare, `doi:`-prefixed or a doi.org URL), or None if it is not one."""
+    lowered = identifier.lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "doi:"):
+        if lowered.startswith(prefix):
+            return identifier[len(prefix):]
+    return identifier if identifier.startswith("10.") else None
@@ -1,16 +1,37 @@
 import httpx
-from typing import List
-from ..models import Paper, Query
+import asyncio
+from typing import Iterable, List, AsyncIterator
+from ..graph import paper_node
+from ..models import Citations, Paper, Query
+from ..client import borrow_client
+from ..ratelimit import RateLimiter
+from ..cache import ResponseCache
+from .base import bare_doi, get_json
+
+PAGE_SIZE = 200
+# Values per OR filter (`cites:W1|W2|...`), the most OpenAlex allows
+FILTER_BATCH = 100
 
 class OpenAlexProvider:
-    def __init__(self, email:str | None = None):
+    def __init__(self, email:str | None = None, client: httpx.AsyncClient | None = None,
+                 rate_limiter: RateLimiter | None = None, cache: ResponseCache | None = None):
         self.base_url = "https://api.openalex.org/works"
         self.email = email
+        self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
 
     async def search(self, query: Query) -> List[Paper]:
+        papers = []
+        async for batch in self.search_pages(query):
+            papers.extend(batch)
+        return papers
+
+    async def search_pages(self, query: Query) -> AsyncIterator[List[Paper]]:
         query_string = " ".join(query.keywords)
         params = {"search": query_string, 
-            "per_page": query.max_results, 
+            "per_page": min(query.max_results, PAGE_SIZE), 
+            "cursor": "*",
             "mailto": (self.email if self.email else "")}
         if query.date_from or query.date_to:
             filters = []
@@ -19,20 +40,134 @@ class OpenAlexProvider:
             if query.date_to:
                 filters.append(f"to_publication_date:{query.date_to}")
             params["filter"] = ",".join(filters)    
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}", params=params)
-            response.raise_for_status()
-            return [self._to_paper(paper) for paper in response.json()["results"]]
+        remaining = query.max_results
+        async with borrow_client(self.client) as client:
+            while remaining > 0:
+                params["per_page"] = min(remaining, PAGE_SIZE)
+                data = await get_json(client, self.rate_limiter, self.cache, f"{self.base_url}", params)
+                results = data["results"][:remaining]
+                if not results:
+                    return
+                remaining -= len(results)
+                yield self._to_papers(results)
+                cursor = data.get("meta", {}).get("next_cursor")
+                if not cursor:
+                    return
+                params["cursor"] = cursor
     
+    async def get_paper(self, paper_id: str) -> Paper | None:
+        papers = await self.get_papers([paper_id])
+        return papers[0] if papers else None
+
+    async def get_papers(self, paper_ids: Iterable[str]) -> List[Paper]:
+        """Look works up by OpenAlex id or DOI, FILTER_BATCH per `openalex_id:`/`doi:` OR filter.
+
+        Batches run concurrently under the rate limiter. The result follows the
+        order of `paper_ids`, without the ids OpenAlex does not know.
+        """
+        keys = list(dict.fromkeys(self._key(paper_id) for paper_id in paper_ids))
+        dois = [key for key in keys if bare_doi(key)]
+        works = [key for key in keys if not bare_doi(key)]
+        batches = [("doi", dois[i:i + FILTER_BATCH]) for i in range(0, len(dois), FILTER_BATCH)]
+        batches += [("openalex_id", works[i:i + FILTER_BATCH]) for i in range(0, len(works), FILTER_BATCH)]
+        async with borrow_client(self.client) as client:
+            results = await asyncio.gather(*(self._lookup(client, field, batch) for field, batch in batches))
+        found = {}
+        for paper in (paper for result in results for paper in result):
+            found[self._key(paper.openalex_id)] = paper
+            if paper.doi:
+                found[self._key(paper.doi)] = paper
+        return [found[key] for key in keys if key in found]
+
+    def lookup_id(self, paper: Paper) -> str | None:
+        return paper.openalex_id or paper.doi
+
+    async def _lookup(self, client: httpx.AsyncClient, field: str, values: list[str]) -> List[Paper]:
+        data = await get_json(client, self.rate_limiter, self.cache, self.base_url, {
+            "filter": f"{field}:{'|'.join(values)}", "per_page": PAGE_SIZE, "mailto": self.email if self.email else ""})
+        return self._to_papers(data["results"])
+
+    def _key(self, identifier: str) -> str:
+        # Short work ids ("W123") and lower-case DOIs, however they were written
+        doi = bare_doi(identifier)
+        return doi.lower() if doi else identifier.rsplit("/", 1)[-1]
+
+    async def get_citations(self, papers: List[Paper], limit: int) -> Citations:
+        """References and citing works of each paper with an OpenAlex id, FILTER_BATCH papers per query.
+
+        References come from `referenced_works`, so they are bare OpenAlex ids;
+        citing works come back as full records. Batches run concurrently under
+        the rate limiter.
+        """
+        works = {paper.openalex_id.rsplit("/", 1)[-1]: paper_node(paper) for paper in papers if paper.openalex_id}
+        batches = list(works.items())
+        batches = [dict(batches[i:i + FILTER_BATCH]) for i in range(0, len(batches), FILTER_BATCH)]
+        async with borrow_client(self.client) as client:
+            results = await asyncio.gather(*(self._batch_citations(client, batch, limit) for batch in batches))
+        return Citations(
+            edges=[edge for result in results for edge in result.edges],
+            papers=[paper for result in results for paper in result.papers],
+        )
+
+    async def _batch_citations(self, client: httpx.AsyncClient, works: dict[str, str], limit: int) -> Citations:
+        ids = "|".join(works)
+        mailto = self.email if self.email else ""
+        data = await get_json(client, self.rate_limiter, self.cache, self.base_url, {
+            "filter": f"openalex_id:{ids}", "select": "id,referenced_works", "per_page": len(works), "mailto": mailto})
+        edges = []
+        for work in data["results"]:
+            citing = works.get(work["id"].rsplit("/", 1)[-1])
+            if citing:
+                edges.extend((citing, reference) for reference in (work.get("referenced_works") or [])[:limit])
+
+        # One OR query finds the citing works of the whole batch; each one's
+        # referenced_works says which of the batch it cites
+        papers = []
+        params = {"filter": f"cites:{ids}", "cursor": "*", "mailto": mailto}
+        remaining = limit * len(works)
+        while remaining > 0:
+            params["per_page"] = min(remaining, PAGE_SIZE)
+            data = await get_json(client, self.rate_limiter, self.cache, self.base_url, params)
+            results = data["results"][:remaining]
+            if not results:
+                break
+            remaining -= len(results)
+            for work in results:
+                try:
+                    paper = self._to_paper(work)
+                except Exception:
+                    continue
+                papers.append(paper)
+                citing = paper_node(paper)
+                for reference in work.get("referenced_works") or []:
+                    cited = works.get(reference.rsplit("/", 1)[-1])
+                    if cited:
+                        edges.append((citing, cited))
+            cursor = data.get("meta", {}).get("next_cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+        return Citations(edges=edges, papers=papers)
+
+    def _to_papers(self, works: list[dict]) -> List[Paper]:
+        """Parse a page of works, skipping (and reporting) any that do not parse."""
+        papers = []
+        for work in works:
+            try:
+                papers.append(self._to_paper(work))
+            except Exception as e:
+                print(f"Skipping OpenAlex work {work.get('id')}: {e!r}")
+        return papers
+
     def _to_paper(self, paper: dict) -> Paper:
         return Paper(
             id=paper["id"],
             title=paper["title"],
             authors=[author["author"]["display_name"] for author in (paper["authorships"] or [])],
-            doi=paper.get("doi", "").removeprefix("https://doi.org/") if paper.get("doi") else "",
-            abstract=paper.get("abstract") or "",
+            doi=paper["doi"].removeprefix("https://doi.org/") if paper.get("doi") else None,
+            abstract=abstract_text(paper.get("abstract_inverted_index")),
             url=paper.get("doi") or f"https://openalex.org/works/{paper['id']}",
-            pdf_url=paper.get("primary_location", {}).get("pdf_url"),
+            pdf_url=(paper.get("primary_location") or {}).get("pdf_url"),
             citation_count=paper["cited_by_count"] or 0,
             arxiv_id=None,
             openalex_id=paper["id"],
@@ -40,4 +175,11 @@ class OpenAlexProvider:
             source_provider="openalex",
             relevance_score=None,
             published_date=paper["publication_date"],
-        )
\ No newline at end of file
+        )
+
+def abstract_text(inverted_index: dict[str, list[int]] | None) -> str:
+    """Rebuild an abstract from OpenAlex's inverted index, which maps each word to its positions."""
+    if not inverted_index:
+        return ""
+    positions = {i: word for word, indices in inverted_index.items() for i in indices}
+    return " ".join(positions[i] for i in sorted(positions))
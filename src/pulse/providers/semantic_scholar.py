@@ -1,36 +1,152 @@
-from typing import List
-from .base import Provider
-from ..models import Paper, Query
+from typing import Iterable, List, AsyncIterator
+from contextlib import aclosing
+import asyncio
+from .base import Provider, bare_doi, get_json, post_json
+from ..graph import node_key, paper_node
+from ..models import Citations, Paper, Query
+from ..client import borrow_client
+from ..ratelimit import RateLimiter
+from ..cache import ResponseCache
 import httpx
 from datetime import date
 
+PAGE_SIZE = 100
+# The relevance-ranked endpoint refuses offset + limit > 1000; bigger sweeps use /search/bulk
+RELEVANCE_SEARCH_LIMIT = 1000
+# Ids accepted per POST /paper/batch
+BATCH_SIZE = 500
+FIELDS = "title,authors,abstract,externalIds,url,openAccessPdf,citationCount,publicationDate"
+
 class SemanticScholarProvider:
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, client: httpx.AsyncClient | None = None,
+                 rate_limiter: RateLimiter | None = None, cache: ResponseCache | None = None):
         self.base_url = "https://api.semanticscholar.org/graph/v1/paper"
         self.api_key = api_key
+        self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
 
     async def search(self, query: Query) -> List[Paper]:
+        papers = []
+        async for batch in self.search_pages(query):
+            papers.extend(batch)
+        return papers
+
+    async def search_pages(self, query: Query) -> AsyncIterator[List[Paper]]:
         query_string = " ".join(query.keywords)
         headers = {"x-api-key": self.api_key} if self.api_key else {}
         params = {
             "query": query_string,
-            "limit": query.max_results,
-            "fields": "title,authors,abstract,externalIds,url,openAccessPdf,citationCount,publicationDate"
+            "fields": FIELDS
         }
         if query.date_from:
             params["year"] = f"{query.date_from.year}-{query.date_to.year}" if query.date_to else f"{query.date_from.year}-"        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{self.base_url}/search", 
-            params=params,
-            headers=headers)
-            response.raise_for_status()
-            papers = []
-            for item in response.json()["data"]:
-                try:
-                    papers.append(self._to_paper(item))
-                except Exception:
-                    continue
-            return papers
+        remaining = query.max_results
+        async with borrow_client(self.client) as client:
+            if query.max_results <= RELEVANCE_SEARCH_LIMIT:
+                pages = self._relevance_pages(client, params, headers, query.max_results)
+            else:
+                pages = self._bulk_pages(client, params, headers)
+            async with aclosing(pages):
+                async for items in pages:
+                    items = items[:remaining]
+                    if not items:
+                        return
+                    remaining -= len(items)
+                    yield self._to_papers(items)
+                    if remaining <= 0:
+                        return
+
+    async def _relevance_pages(self, client: httpx.AsyncClient, params: dict, headers: dict, max_results: int) -> AsyncIterator[list[dict]]:
+        offset = 0
+        while offset < max_results:
+            data = await get_json(client, self.rate_limiter, self.cache, f"{self.base_url}/search",
+            {**params, "offset": offset, "limit": min(PAGE_SIZE, max_results - offset)},
+            headers)
+            yield data.get("data") or []
+            if data.get("next") is None:
+                return
+            offset = data["next"]
+
+    async def _bulk_pages(self, client: httpx.AsyncClient, params: dict, headers: dict) -> AsyncIterator[list[dict]]:
+        params = dict(params)
+        while True:
+            data = await get_json(client, self.rate_limiter, self.cache, f"{self.base_url}/search/bulk",
+            params, headers)
+            yield data.get("data") or []
+            if not data.get("token"):
+                return
+            params["token"] = data["token"]
+
+    async def get_paper(self, paper_id: str) -> Paper | None:
+        papers = await self.get_papers([paper_id])
+        return papers[0] if papers else None
+
+    async def get_papers(self, paper_ids: Iterable[str]) -> List[Paper]:
+        """Look papers up through POST /paper/batch, BATCH_SIZE ids per request, requests run concurrently.
+
+        Ids are Semantic Scholar ids, bare DOIs or prefixed ids the API knows
+        (`DOI:`, `ARXIV:`, `CorpusId:`...). The result follows the order of
+        `paper_ids`, without the ids Semantic Scholar does not know.
+        """
+        ids = list(dict.fromkeys(f"DOI:{bare_doi(i)}" if bare_doi(i) else i for i in paper_ids))
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+        async with borrow_client(self.client) as client:
+            results = await asyncio.gather(*(
+                post_json(client, self.rate_limiter, self.cache, f"{self.base_url}/batch", {"fields": FIELDS},
+                          {"ids": ids[i:i + BATCH_SIZE]}, headers)
+                for i in range(0, len(ids), BATCH_SIZE)
+            ))
+        # Each response lists one entry per requested id, null where the id is unknown
+        return self._to_papers([item for items in results for item in items if item])
+
+    async def get_citations(self, papers: List[Paper], limit: int) -> Citations:
+        """Citations and references of each paper, one request pair per paper, run concurrently under the rate limiter."""
+        headers = {"x-api-key": self.api_key} if self.api_key else {}
+        async with borrow_client(self.client) as client:
+            results = await asyncio.gather(*(
+                self._paper_citations(client, paper, limit, headers) for paper in papers if self.lookup_id(paper)
+            ))
+        return Citations(
+            edges=[edge for result in results for edge in result.edges],
+            papers=[paper for result in results for paper in result.papers],
+        )
+
+    async def _paper_citations(self, client: httpx.AsyncClient, paper: Paper, limit: int, headers: dict) -> Citations:
+        url = f"{self.base_url}/{self.lookup_id(paper)}"
+        params = {"fields": FIELDS, "limit": limit}
+        citations = await get_json(client, self.rate_limiter, self.cache, f"{url}/citations", params, headers)
+        references = await get_json(client, self.rate_limiter, self.cache, f"{url}/references", params, headers)
+        citing = [item["citingPaper"] for item in citations.get("data") or [] if (item.get("citingPaper") or {}).get("paperId")]
+        cited = [item["citedPaper"] for item in references.get("data") or [] if (item.get("citedPaper") or {}).get("paperId")]
+        key = paper_node(paper)
+        # Edges come from the raw items, so neighbours too incomplete to parse still count
+        return Citations(
+            edges=[(self._node(item), key) for item in citing] + [(key, self._node(item)) for item in cited],
+            papers=self._to_papers(citing + cited),
+        )
+
+    def lookup_id(self, paper: Paper) -> str | None:
+        # The graph API resolves DOIs and arXiv ids itself, so merged records need no S2 id
+        if paper.doi:
+            return f"DOI:{paper.doi}"
+        if paper.arxiv_id:
+            return f"ARXIV:{paper.arxiv_id}"
+        if paper.source_provider == "semantic_scholar":
+            return paper.id
+        return None
+
+    def _node(self, item: dict) -> str:
+        return node_key(item["paperId"], (item.get("externalIds") or {}).get("DOI"))
+
+    def _to_papers(self, items: list[dict]) -> List[Paper]:
+        papers = []
+        for item in items:
+            try:
+                papers.append(self._to_paper(item))
+            except Exception:
+                continue
+        return papers
     
     def _to_paper(self, paper: dict) -> Paper:
         external_ids = paper.get("externalIds") or {}
@@ -0,0 +1,88 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from .config import RateLimitConfig
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """Token bucket shared by every request a provider makes, with retry on throttling.
+
+    A 429/503 pauses the whole bucket (not just the failing request) until the
+    server's Retry-After, or a jittered exponential backoff, has elapsed.
+    """
+
+    def __init__(self, config: RateLimitConfig | None = None):
+        self.config = config or RateLimitConfig()
+        self._tokens = float(self.config.burst)
+        self._updated_at: float | None = None
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        rate = self.config.requests_per_second
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                if not rate:
+                    return
+                if self._updated_at is not None:
+                    elapsed = now - self._updated_at
+                    self._tokens = min(float(self.config.burst), self._tokens + elapsed * rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / rate)
+
+    def pause(self, seconds: float) -> None:
+        until = asyncio.get_running_loop().time() + seconds
+        self._blocked_until = max(self._blocked_until, until)
+        self._tokens = 0.0
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the bucket, retrying throttled and transient failures."""
+        for attempt in range(self.config.max_retries + 1):
+            await self.acquire()
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            delay = retry_after(response)
+            if delay is None:
+                delay = self._backoff(attempt)
+            await response.aclose()
+            self.pause(delay)
+        raise AssertionError("unreachable")
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.config.backoff_max, self.config.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+def retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
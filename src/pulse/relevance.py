@@ -0,0 +1,109 @@
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+from .models import Paper, Query
+
+TOKEN = re.compile(r"\w+")
+
+# Words too common in titles and abstracts to say anything about relevance
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the their this to
+was were which with we our these those using based via than can also not
+""".split())
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+def document_terms(paper: Paper) -> list[str]:
+    return text_terms(paper.title, paper.abstract)
+
+def text_terms(title: str, abstract: str) -> list[str]:
+    return tokenize(f"{title} {abstract}")
+
+def query_terms(query: Query) -> list[str]:
+    return list(dict.fromkeys(tokenize(" ".join(query.keywords))))
+
+@dataclass
+class CorpusStats:
+    """Document frequencies and lengths of a corpus: the statistics BM25 weighs terms by."""
+    documents: int = 0
+    total_length: int = 0
+    document_frequency: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_papers(cls, papers: Iterable[Paper]) -> "CorpusStats":
+        stats = cls()
+        for paper in papers:
+            terms = document_terms(paper)
+            stats.add(set(terms), len(terms))
+        return stats
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / self.documents if self.documents else 0.0
+
+    def add(self, unique_terms: Iterable[str], length: int) -> None:
+        self.documents += 1
+        self.total_length += length
+        frequency = self.document_frequency
+        for term in unique_terms:
+            frequency[term] = frequency.get(term, 0) + 1
+
+    def idf(self, term: str) -> float:
+        # The "+1" form never goes negative, so a term in most documents still counts a little
+        df = self.document_frequency.get(term, 0)
+        return math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+
+class BM25Index:
+    """Inverted index over the title and abstract of a fixed list of papers.
+
+    Building it tokenizes every paper once; after that a query only walks the
+    postings of its own terms, so scoring costs O(matching postings) rather than
+    O(papers x vocabulary). Term statistics come from the indexed papers unless a
+    larger corpus (e.g. the whole library) is passed to `scores`.
+    """
+
+    def __init__(self, papers: Sequence[Paper], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.stats = CorpusStats()
+        self.lengths: list[int] = []
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        for i, paper in enumerate(papers):
+            terms = document_terms(paper)
+            counts = Counter(terms)
+            self.stats.add(counts, len(terms))
+            self.lengths.append(len(terms))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+
+    def scores(self, terms: Iterable[str], corpus: CorpusStats | None = None) -> list[float]:
+        """Raw BM25 score of every indexed paper against `terms`."""
+        stats = corpus or self.stats
+        k1, b = self.k1, self.b
+        average_length = stats.average_length or 1.0
+        lengths = self.lengths
+        scores = [0.0] * len(lengths)
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            weight = stats.idf(term) * (k1 + 1)
+            for i, tf in postings:
+                scores[i] += weight * tf / (tf + k1 * (1 - b + b * lengths[i] / average_length))
+        return scores
+
+def bm25_scores(papers: Sequence[Paper], query: Query, corpus: CorpusStats | None = None,
+                k1: float = 1.2, b: float = 0.75) -> list[float]:
+    """BM25 of each paper's title and abstract against the query, scaled so the best paper scores 1."""
+    terms = query_terms(query)
+    if not terms or not papers:
+        return [0.0] * len(papers)
+    scores = BM25Index(papers, k1, b).scores(terms, corpus)
+    best = max(scores)
+    if best <= 0:
+        return scores
+    return [score / best for score in scores]
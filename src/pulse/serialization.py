@@ -0,0 +1,74 @@
+import json
+from typing import Any, Protocol
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without the optional extra
+    msgpack = None
+
+# Every encoded blob starts with MAGIC, the format version and the codec id, so
+# readers can tell codecs apart and reject blobs from an incompatible version
+MAGIC = b"SP"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+class Serializer(Protocol):
+    name: str
+    code: int
+
+    def dumps(self, value: Any) -> bytes: ...
+
+    def loads(self, data: bytes) -> Any: ...
+
+class JsonSerializer:
+    """Compact JSON; readable with any tool, so handy for debugging the cache."""
+    name = "json"
+    code = 1
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class MsgpackSerializer:
+    name = "msgpack"
+    code = 2
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+SERIALIZERS: dict[str, Serializer] = {s.name: s for s in (JsonSerializer(), MsgpackSerializer())}
+_BY_CODE = {s.code: s for s in SERIALIZERS.values()}
+
+def get_serializer(name: str = "auto") -> Serializer:
+    """Look a serializer up by name; "auto" picks msgpack when installed, else JSON."""
+    if name == "auto":
+        name = "msgpack" if msgpack is not None else "json"
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer: {name}")
+    if name == "msgpack" and msgpack is None:
+        raise ImportError("The msgpack serializer needs msgpack: install the msgpack extra, e.g. uv sync --extra msgpack")
+    return SERIALIZERS[name]
+
+def encode(value: Any, serializer: Serializer) -> bytes:
+    return MAGIC + bytes((FORMAT_VERSION, serializer.code)) + serializer.dumps(value)
+
+def decode(blob: bytes) -> Any:
+    """Decode a blob written by `encode` with whichever codec wrote it.
+
+    Blobs without a header predate versioning and are read as JSON. Raises
+    ValueError for a version or codec this build can't read.
+    """
+    if not blob.startswith(MAGIC):
+        return json.loads(blob)
+    version, code = blob[len(MAGIC)], blob[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported serialization version {version}")
+    serializer = _BY_CODE.get(code)
+    if serializer is None or (serializer.name == "msgpack" and msgpack is None):
+        raise ValueError(f"Unreadable serializer code {code}")
+    return serializer.loads(blob[HEADER_SIZE:])
@@ -1,66 +1,167 @@
 from pulse.models import Paper, Query
-from pulse.config import RankingConfig, load_config, Settings
-import math
+from pulse.config import RankingConfig, SearchConfig, load_config, Settings
+import hashlib
+import heapq
+import itertools
+from contextlib import contextmanager
 import json
-from datetime import date, datetime, timedelta
-from pathlib import Path
+from typing import Iterable, Iterator
+import math
+from datetime import date, timedelta
 import asyncio
 from pulse.providers import get_provider
+from pulse.client import create_client
+from pulse.ratelimit import RateLimiter
+from pulse.cache import ResponseCache
+from pulse.dedup import Deduplicator, deduplicate, merge_papers
+from pulse.relevance import CorpusStats, bm25_scores, query_terms
+from pulse.embeddings import EmbeddingStore, semantic_scores
+from pulse.graph import CitationGraph, paper_node
+from pulse import storage
+import httpx
 
-def rank_papers(papers: list[Paper], query: Query, config: RankingConfig) -> list[Paper]:
-    
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the optional extra
+    np = None
+
+# Below this size the pure-Python scorer beats the cost of building arrays
+VECTORIZE_MIN_PAPERS = 256
+
+def rank_papers(papers: list[Paper], query: Query, config: RankingConfig, top_n: int | None = None,
+                corpus: CorpusStats | None = None, embeddings: EmbeddingStore | None = None,
+                graph: CitationGraph | None = None) -> list[Paper]:
+    """Score and sort papers.
+
+    `corpus` supplies BM25 term statistics when ranking against a library,
+    `embeddings` caches the vectors of the semantic stage so re-ranking only
+    embeds papers it has not seen, and `graph` supplies PageRank scores.
+    """
     if not papers:
         return []
     
-    max_citations_in_set = max(p.citation_count for p in papers)
+    rank = _rank_papers_vectorized if np is not None and len(papers) >= VECTORIZE_MIN_PAPERS else _rank_papers_python
+    return rank(papers, query, config, top_n, corpus=corpus, embeddings=embeddings, graph=graph)
+
+def _ranking_weights(config: RankingConfig, max_citations_in_set: int) -> tuple[float, float, float]:
     if max_citations_in_set > 0:
-        wc = config.weight_citation
-        wr = config.weight_recency
-        wk = config.weight_keyword
-    else:
-        wk = config.weight_keyword + (config.weight_citation/2)
-        wr = config.weight_recency + (config.weight_citation/2)
-        wc = 0
+        return config.weight_citation, config.weight_recency, config.weight_keyword
+    # No citation data: split its weight between recency and keywords
+    return 0, config.weight_recency + (config.weight_citation/2), config.weight_keyword + (config.weight_citation/2)
 
+def _keyword_scores(papers: list[Paper], query: Query, config: RankingConfig,
+                    corpus: CorpusStats | None = None) -> list[float]:
+    """The keyword component S of each paper's score, in [0, 1]."""
+    if config.keyword_scorer == "bm25":
+        return bm25_scores(papers, query, corpus, config.bm25_k1, config.bm25_b)
     query_keyword = set(keyword.lower() for keyword in query.keywords)
+    if not query_keyword:
+        return [0] * len(papers)
+    return [len(query_keyword.intersection(map(str.lower, p.keywords))) / len(query_keyword) for p in papers]
+
+def _semantic_scores(papers: list[Paper], query: Query, config: RankingConfig,
+                     embeddings: EmbeddingStore | None = None) -> list[float] | None:
+    """The semantic component of each paper's score, or None when its weight is zero."""
+    if config.weight_semantic <= 0:
+        return None
+    return semantic_scores(papers, query.keywords, embeddings)
+
+def _graph_scores(papers: list[Paper], config: RankingConfig, graph: CitationGraph | None = None) -> list[float] | None:
+    """PageRank of each paper in the citation graph, scaled so the best paper scores 1; None when unused."""
+    if config.weight_graph <= 0 or graph is None:
+        return None
+    pagerank = graph.pagerank()
+    scores = [pagerank.get(paper_node(paper), 0.0) for paper in papers]
+    best = max(scores)
+    return [score / best for score in scores] if best > 0 else scores
+
+def _rank_papers_python(papers: list[Paper], query: Query, config: RankingConfig, top_n: int | None = None,
+                        corpus: CorpusStats | None = None, embeddings: EmbeddingStore | None = None,
+                        graph: CitationGraph | None = None) -> list[Paper]:
+    max_citations_in_set = max(p.citation_count for p in papers)
+    wc, wr, wk = _ranking_weights(config, max_citations_in_set)
+    log_max_citations = math.log(1 + max_citations_in_set)
+
+    keyword_scores = _keyword_scores(papers, query, config, corpus)
+    semantic = _semantic_scores(papers, query, config, embeddings)
+    citation_graph = _graph_scores(papers, config, graph)
+    ws, wg = config.weight_semantic, config.weight_graph
+    today = date.today()
     
-    for paper in papers:
+    for paper, S, Sem, G in zip(papers, keyword_scores, semantic or itertools.repeat(0.0),
+                                citation_graph or itertools.repeat(0.0)):
         if max_citations_in_set > 0:
-            C_norm = math.log( 1 + paper.citation_count) / math.log(1 + max_citations_in_set)
+            C_norm = math.log( 1 + paper.citation_count) / log_max_citations
         else:
             C_norm = 0
 
-        paper_keyword = set(keyword.lower() for keyword in paper.keywords)
-        matching_keywords = query_keyword.intersection(paper_keyword)
-        S = len(matching_keywords)/len(query_keyword) if query_keyword else 0
-       
 
-        days_since_publication = (date.today() - paper.published_date).days
+        days_since_publication = (today - paper.published_date).days
         Recency = 1 / (days_since_publication + 1)
         
         R = wc * C_norm + wr * Recency + wk * S
+        if semantic is not None:
+            R += ws * Sem
+        if citation_graph is not None:
+            R += wg * G
        
         paper.relevance_score = R
 
+    if top_n is not None and top_n < len(papers):
+        # Bounded heap; the negated index keeps ties in input order like the stable sort
+        best = heapq.nlargest(top_n, enumerate(papers), key=lambda item: (item[1].relevance_score, -item[0]))
+        return [paper for _, paper in best]
     return sorted(papers, key=lambda p: p.relevance_score, reverse=True)
 
-def deduplicate(papers: list[Paper]) -> list[Paper]:
-    unique_papers = {}
-    for paper in papers:
-        key = paper.doi or paper.arxiv_id or paper.openalex_id or paper.id
-        
-        if key:
-            if key not in unique_papers:
-                unique_papers[key] = paper
-            else:
-                existing = unique_papers[key]   
-                existing_metadata_field_count = sum((1 for value in existing.model_dump().values() if value not in [None, ""]))
-                new_metadata_field_count = sum((1 for value in paper.model_dump().values() if value not in [None, ""]))
-                if new_metadata_field_count > existing_metadata_field_count:
-                    unique_papers[key] = paper
-    return list(unique_papers.values())
-
-async def run_digest(top_n: int = 5, days: int = 30) -> list[Paper]:
+def _rank_papers_vectorized(papers: list[Paper], query: Query, config: RankingConfig, top_n: int | None = None,
+                            corpus: CorpusStats | None = None, embeddings: EmbeddingStore | None = None,
+                            graph: CitationGraph | None = None) -> list[Paper]:
+    """Array version of `_rank_papers_python`; produces bit-identical scores and order."""
+    citations = np.fromiter((p.citation_count for p in papers), dtype=np.int64, count=len(papers))
+    max_citations_in_set = int(citations.max())
+    wc, wr, wk = _ranking_weights(config, max_citations_in_set)
+
+    if max_citations_in_set > 0:
+        # math.log per distinct count keeps scores identical to the scalar path
+        counts, inverse = np.unique(citations, return_inverse=True)
+        logs = np.array([math.log(1 + int(c)) for c in counts])
+        C_norm = logs[inverse] / math.log(1 + max_citations_in_set)
+    else:
+        C_norm = np.zeros(len(papers))
+
+    S = np.array(_keyword_scores(papers, query, config, corpus), dtype=np.float64)
+
+    today = date.today().toordinal()
+    days = np.fromiter((today - p.published_date.toordinal() for p in papers), dtype=np.int64, count=len(papers))
+    Recency = 1 / (days + 1)
+
+    scores = wc * C_norm + wr * Recency + wk * S
+    semantic = _semantic_scores(papers, query, config, embeddings)
+    if semantic is not None:
+        scores += config.weight_semantic * np.array(semantic, dtype=np.float64)
+    citation_graph = _graph_scores(papers, config, graph)
+    if citation_graph is not None:
+        scores += config.weight_graph * np.array(citation_graph, dtype=np.float64)
+    order = _top_indices(scores, top_n)
+    ranked = []
+    for i, score in zip(order.tolist(), scores[order].tolist()):
+        papers[i].relevance_score = score
+        ranked.append(papers[i])
+    return ranked
+
+def _top_indices(scores, top_n: int | None):
+    """Indices of the best `top_n` scores, descending, ties broken by input order like `sorted`."""
+    if top_n is None or top_n >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if top_n <= 0:
+        return np.array([], dtype=np.int64)
+    threshold = -np.partition(-scores, top_n - 1)[top_n - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:top_n - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+async def run_digest(top_n: int = 5, days: int = 30, incremental: bool = False) -> list[Paper]:
     settings = load_config()
     query = Query(
         keywords=settings.search.default_keywords,
@@ -70,17 +171,41 @@ async def run_digest(top_n: int = 5, days: int = 30) -> list[Paper]:
         date_to=date.today()
     )
 
-    cache_dir = Path("~/.scholar-pulse/cache").expanduser()
-    _cleanup_stale_cache(cache_dir)
-    cache_key = _cache_key(query, days)
-    cache_file = cache_dir / f"{cache_key}.json"
-    cached_papers = _load_cache(cache_file)
-    if cached_papers:
-        return cached_papers[:top_n]
-    
-    ranked_papers = await _fetch_and_rank(query, settings)
-    _save_cache(cache_file, ranked_papers)
-    return ranked_papers[:top_n]
+    if incremental:
+        return await _run_incremental_digest(query, settings, top_n)
+    return await _fetch_and_rank(query, settings, top_n=top_n)
+
+async def _run_incremental_digest(query: Query, settings: Settings, top_n: int) -> list[Paper]:
+    """Fetch only what was published since the last digest and merge it into that digest's candidates.
+
+    The saved candidates still inside the window seed the dedup/ranking pass, so
+    new copies of known papers merge with them. A window reaching further back
+    than the saved candidates do is fetched in full. The watermark only advances
+    when every provider succeeded, otherwise the next run retries the same range.
+    """
+    key = _digest_key(query, settings)
+    window_start = query.date_from
+    seed = []
+    previous = storage.load_digest(key)
+    if previous is not None:
+        covered_from, watermark, candidates = previous
+        seed = [paper for paper in candidates if paper.published_date >= window_start]
+        if covered_from is not None and covered_from <= window_start:
+            overlap = timedelta(days=settings.search.watermark_overlap_days)
+            query = query.model_copy(update={"date_from": max(window_start, watermark - overlap)})
+
+    errors = []
+    pool = await _fetch_and_rank(query, settings, seed=seed, errors=errors)
+    if not errors:
+        storage.save_digest(key, window_start, query.date_to, pool)
+    elif previous is not None:
+        # The pool still covers no more than the saved candidates did
+        storage.save_digest(key, covered_from and max(covered_from, window_start), previous[1], pool)
+    return pool[:top_n]
+
+def _digest_key(query: Query, settings: Settings) -> str:
+    raw = json.dumps([sorted(query.keywords), sorted(query.categories), sorted(settings.providers.enabled)])
+    return hashlib.sha256(raw.encode()).hexdigest()
 
 async def search(query: str, categories: str | None = None) -> list[Paper]:
     settings = load_config()
@@ -97,64 +222,251 @@ async def search(query: str, categories: str | None = None) -> list[Paper]:
     ranked_papers = await _fetch_and_rank(query, settings)
     return ranked_papers
 
-async def _fetch_and_rank(query: Query, settings: Settings) -> list[Paper]:
+def search_library(query: str, categories: str | None = None) -> list[Paper]:
+    """`search` against the saved library's full-text index instead of the providers."""
+    settings = load_config()
+    keywords = [q.strip() for q in query.split(",") if q.strip()]
+    limit = settings.search.max_results_per_provider
+    matches = storage.search_papers(keywords, limit=limit)
+    query = Query(
+        keywords=keywords,
+        categories=[c.strip() for c in categories.split(",") if c] if categories else settings.search.default_categories,
+        max_results=limit,
+    )
+    with _embedding_store(settings) as embeddings:
+        if embeddings is not None:
+            # Nearest neighbours find papers that say the same thing in other words
+            matched = {paper.id for paper in matches}
+            matches += [paper for paper in _nearest_in_library(embeddings, keywords, limit) if paper.id not in matched]
+        return rank_papers(matches, query, settings.ranking, embeddings=embeddings)
+
+def _nearest_in_library(embeddings: EmbeddingStore, keywords: list[str], k: int) -> list[Paper]:
+    """The `k` saved papers closest to the keywords, embedding any the store has not seen yet."""
+    missing = embeddings.missing(storage.paper_ids())
+    for start in range(0, len(missing), 500):
+        embeddings.vectors(storage.get_papers(missing[start:start + 500]))
+    # The store also holds digest candidates that were never saved, so ask for extra
+    neighbours = embeddings.nearest(keywords, 4 * k)
+    return storage.get_papers(paper_id for paper_id, _ in neighbours)[:k]
+
+@contextmanager
+def _embedding_store(settings: Settings) -> Iterator[EmbeddingStore | None]:
+    """The configured embedding store, or None when ranking has no semantic stage."""
+    if settings.ranking.weight_semantic <= 0:
+        yield None
+        return
+    embeddings = EmbeddingStore.from_config(settings.embeddings)
+    try:
+        yield embeddings
+    finally:
+        embeddings.close()
+
+async def _fetch_and_rank(query: Query, settings: Settings, client: httpx.AsyncClient | None = None,
+                          cache: ResponseCache | None = None, top_n: int | None = None,
+                          seed: Iterable[Paper] = (), errors: list[Exception] | None = None) -> list[Paper]:
+    """Search every enabled provider and rank the deduplicated results.
+
+    `seed` papers (e.g. a previous digest's candidates) are merged in as if a
+    provider had returned them first. Provider failures are reported and, when
+    `errors` is given, appended to it.
+    """
+    if client is None:
+        async with create_client(settings.http) as client:
+            return await _fetch_and_rank(query, settings, client, cache, top_n, seed, errors)
+    if cache is None and settings.cache.enabled:
+        cache = ResponseCache.from_config(settings.cache)
+        cache.purge_expired()
+        try:
+            return await _fetch_and_rank(query, settings, client, cache, top_n, seed, errors)
+        finally:
+            cache.close()
+
+    providers = _providers(settings, client, cache)
+    corpus = _library_corpus(settings.ranking, query)
+    # The graph stage re-ranks a wider cut, since its seeds are the best candidates
+    cut = max(top_n, settings.graph.seeds) if top_n is not None and settings.graph.enabled else top_n
+    if settings.search.fan_out and len(query.keywords) > 1:
+        papers = await _fan_out(providers, query, settings.search, errors)
+        with _embedding_store(settings) as embeddings:
+            ranked = rank_papers(deduplicate([*seed, *papers]), query, settings.ranking, cut, corpus, embeddings)
+        return await _with_citations(ranked, query, settings, providers, top_n, corpus)
+
+    # Pages are deduplicated as they arrive and ranked once every provider is done.
+    # The Deduplicator keeps every cluster, so memory grows with the candidates,
+    # not with top_n; only the final selection is a bounded heap
+    deduplicator = Deduplicator()
+
+    def offer(batch):
+        for paper in batch:
+            deduplicator.add(paper)
+
+    async def consume(provider):
+        async for batch in provider.search_pages(query):
+            offer(batch)
+
+    offer(seed)
+    tasks = [consume(provider) for provider in providers]
+    _report_errors(await asyncio.gather(*tasks, return_exceptions=True), errors)
+    with _embedding_store(settings) as embeddings:
+        ranked = rank_papers(deduplicator.papers(), query, settings.ranking, cut, corpus, embeddings)
+    return await _with_citations(ranked, query, settings, providers, top_n, corpus)
+
+async def _with_citations(ranked: list[Paper], query: Query, settings: Settings, providers: list,
+                          top_n: int | None = None, corpus: CorpusStats | None = None) -> list[Paper]:
+    """Re-rank with the citation graph around the best candidates, adding related papers to them.
+
+    Every provider fetches the edges of the top `graph.seeds` candidates at
+    once, and each provider's edges join the graph as they arrive. Neighbours
+    tied to the seeds by links, co-citation or shared references join the
+    candidates when they fall inside the query's date window. Failures are
+    reported but never fail the search.
+    """
+    config = settings.graph
+    if not config.enabled or not ranked:
+        return ranked[:top_n]
+    seeds = ranked[:config.seeds]
+    graph = CitationGraph(config.damping)
+    neighbours: dict[str, Paper] = {}
+    # Provider ids of known papers, so bare OpenAlex references land on DOI nodes
+    aliases: dict[str, str] = {}
+
+    def learn(paper: Paper) -> None:
+        graph.add_paper(paper)
+        aliases.update((alias, paper_node(paper)) for alias in (paper.id, paper.openalex_id) if alias)
+
+    for paper in ranked:
+        learn(paper)
+    for result in asyncio.as_completed([provider.get_citations(seeds, config.neighbours_per_paper)
+                                        for provider in providers]):
+        try:
+            citations = await result
+        except Exception as e:
+            _report_errors([e])
+            continue
+        for paper in citations.papers:
+            if paper_node(paper) not in neighbours:
+                neighbours[paper_node(paper)] = paper
+                learn(paper)
+        graph.add_edges((aliases.get(citing, citing), aliases.get(cited, cited)) for citing, cited in citations.edges)
+
+    candidates = {paper_node(paper) for paper in ranked}
+    related = [
+        neighbours[key] for key, _ in graph.related(paper_node(paper) for paper in seeds)
+        if key in neighbours and key not in candidates and _in_window(neighbours[key], query)
+    ][:config.related]
+    with _embedding_store(settings) as embeddings:
+        return rank_papers(deduplicate([*ranked, *related]), query, settings.ranking, top_n, corpus, embeddings, graph)
+
+def _in_window(paper: Paper, query: Query) -> bool:
+    return ((query.date_from is None or paper.published_date >= query.date_from)
+            and (query.date_to is None or paper.published_date <= query.date_to))
+
+def _providers(settings: Settings, client: httpx.AsyncClient, cache: ResponseCache | None = None) -> list:
     provider_credentials = {
         "semantic_scholar": {"api_key": settings.semantic_scholar_api_key},
         "openalex": {"email": settings.openalex_email},
     }
-    providers = [
-        get_provider(name)(**provider_credentials.get(name, {}))
+    return [
+        get_provider(name)(
+            **provider_credentials.get(name, {}),
+            client=client,
+            rate_limiter=RateLimiter(settings.providers.rate_limits.get(name)),
+            cache=cache,
+        )
         for name in settings.providers.enabled
     ]
-    tasks = [provider.search(query) for provider in providers]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    all_papers = []
-    for result in results:
-        if isinstance(result, Exception):
-            print(f"Error fetching papers: {result}")
-        else:
-            all_papers.extend(result)
-    
-    unique_papers = deduplicate(all_papers)
-    ranked_papers = rank_papers(unique_papers, query, settings.ranking)
 
-    return ranked_papers
+async def refresh_library(client: httpx.AsyncClient | None = None) -> int:
+    """Re-fetch the metadata of every saved paper and merge it in; returns how many papers changed.
 
-def _cache_key(query: Query, days: int) -> str:
-    import hashlib, json
-    raw = json.dumps({
-        "keywords": query.keywords,
-        "categories": query.categories,
-        "max_results": query.max_results,
-        "date_from": (date.today() - timedelta(days=days)).isoformat(),
-        "date_to": query.date_to.isoformat(),
-    }, sort_keys=True).encode()
-    return hashlib.sha256(raw).hexdigest()[:16]
-
-def _load_cache(cache_file: Path) -> list[Paper] | None:
-    if not cache_file.exists():
-        return None
-    try:
-        with open(cache_file) as f:
-            return [Paper(**p) for p in json.load(f)]
-    except Exception as e:
-        print(f"Error loading cache: {e}")
+    Each provider looks the whole library up with its batched `get_papers`,
+    so a 10k-paper library costs tens of requests. Responses bypass the cache,
+    since stale metadata is what a refresh replaces.
+    """
+    settings = load_config()
+    if client is None:
+        async with create_client(settings.http) as client:
+            return await refresh_library(client)
+    saved = storage.load_papers()
+    providers = _providers(settings, client)
+    lookups = [[provider.lookup_id(paper) for paper in saved] for provider in providers]
+    results = await asyncio.gather(
+        *(provider.get_papers([i for i in ids if i]) for provider, ids in zip(providers, lookups)),
+        return_exceptions=True,
+    )
+    _report_errors(results)
+
+    # Match fresh records to saved papers by any identifier they share
+    by_identifier = {}
+    for i, paper in enumerate(saved):
+        for identifier in _identifiers(paper):
+            by_identifier.setdefault(identifier, i)
+    fresh: dict[int, list[Paper]] = {}
+    for paper in (paper for result in results if not isinstance(result, Exception) for paper in result):
+        match = next((by_identifier[i] for i in _identifiers(paper) if i in by_identifier), None)
+        if match is not None:
+            fresh.setdefault(match, []).append(paper)
+
+    changed = []
+    for i, papers in fresh.items():
+        old = saved[i]
+        # Provider metadata comes from the fresh records alone, so their corrections
+        # win; the saved record keeps only its id, save time and score
+        new = merge_papers(papers).model_copy(update={"id": old.id, "saved_at": old.saved_at,
+                                                      "relevance_score": old.relevance_score})
+        # Merging always lists the contributing providers, which alone is no change
+        if new.model_dump(exclude={"sources"}) != old.model_dump(exclude={"sources"}):
+            if storage.dedup_key(new) != storage.dedup_key(old):
+                storage.remove_paper(storage.dedup_key(old))
+            changed.append(new)
+    storage.upsert_papers(changed)
+    return len(changed)
+
+def _identifiers(paper: Paper) -> list[str]:
+    return [identifier for identifier in (paper.doi and paper.doi.lower(), paper.openalex_id, paper.arxiv_id, paper.id)
+            if identifier]
+
+def _library_corpus(config: RankingConfig, query: Query) -> CorpusStats | None:
+    """Term statistics of the saved library for the query's terms, when BM25 is configured to use them."""
+    if config.keyword_scorer != "bm25" or config.bm25_corpus != "library":
         return None
+    corpus = storage.corpus_stats(query_terms(query))
+    return corpus if corpus.documents else None
 
-def _save_cache(cache_file: Path, papers: list[Paper]) -> None:
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(cache_file, "w") as f:
-        json.dump([p.model_dump(mode="json") for p in papers], f, indent=2)
+async def _fan_out(providers: list, query: Query, search: SearchConfig,
+                   errors: list[Exception] | None = None) -> list[Paper]:
+    """Search every keyword on every provider concurrently and fuse the result lists.
 
-def _cleanup_stale_cache(cache_dir: Path) -> None:
-    if not cache_dir.exists():
-        return
-    now = datetime.now().timestamp()
-    for f in cache_dir.glob("*.json"):
-        try:
-            age = now - f.stat().st_mtime
-            if age > 3600:
-                f.unlink()
-        except Exception as e:
-            print(f"Error cleaning up cache: {e}")
\ No newline at end of file
+    Each (provider, keyword) list contributes `1 / (rrf_k + rank)` to a paper's
+    fused score. The best `max_results` per provider survive, so the ranker sees
+    as many candidates as a joined-keyword search but drawn from every keyword.
+    """
+    semaphore = asyncio.Semaphore(search.max_concurrent_searches)
+    deduplicator = Deduplicator()
+    fused: dict[int, float] = {}
+
+    async def consume(provider, subquery: Query):
+        async with semaphore:
+            rank = 0
+            async for batch in provider.search_pages(subquery):
+                for paper in batch:
+                    rank += 1
+                    cluster, absorbed = deduplicator.add(paper)
+                    score = fused.pop(cluster, 0.0) + sum(fused.pop(gone, 0.0) for gone in absorbed)
+                    fused[cluster] = score + 1 / (search.rrf_k + rank)
+
+    tasks = [
+        consume(provider, query.model_copy(update={"keywords": [keyword]}))
+        for provider in providers
+        for keyword in query.keywords
+    ]
+    _report_errors(await asyncio.gather(*tasks, return_exceptions=True), errors)
+    best = heapq.nlargest(query.max_results * len(providers), fused.items(), key=lambda item: item[1])
+    return [deduplicator.merged(cluster) for cluster, _ in best]
+
+def _report_errors(results: list, errors: list[Exception] | None = None) -> None:
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Error fetching papers: {result}")
+            if errors is not None:
+                errors.append(result)
@@ -1,19 +1,308 @@
 import json
+import sqlite3
+from contextlib import closing
+from datetime import date
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
+
+from pydantic import TypeAdapter
 
 from .models import Paper
+from .relevance import CorpusStats, text_terms
+
+_PAPER_LIST = TypeAdapter(List[Paper])
 
+# Legacy JSON library; migrated once into the SQLite store that sits beside it
 DATA_FILE = Path.home() / ".scholar-pulse" / "papers.json"
-if not DATA_FILE.exists():
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+# The full-text columns of a `papers` row, with keyword and author lists flattened to text
+FTS_COLUMNS = """json_extract({row}.data, '$.title'), json_extract({row}.data, '$.abstract'),
+        (SELECT group_concat(value, ' ; ') FROM json_each({row}.data, '$.keywords')),
+        (SELECT group_concat(value, ' ; ') FROM json_each({row}.data, '$.authors'))"""
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS papers (
+    dedup_key TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    doi TEXT,
+    arxiv_id TEXT,
+    openalex_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_id ON papers (id);
+CREATE INDEX IF NOT EXISTS papers_doi ON papers (doi);
+CREATE INDEX IF NOT EXISTS papers_arxiv_id ON papers (arxiv_id);
+CREATE INDEX IF NOT EXISTS papers_openalex_id ON papers (openalex_id);
+CREATE TABLE IF NOT EXISTS digests (
+    query_key TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    data TEXT NOT NULL,
+    window_start TEXT
+);
+-- BM25 statistics of the library (see relevance.CorpusStats), kept current by _upsert and remove_paper
+CREATE TABLE IF NOT EXISTS corpus (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    documents INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO corpus (id, documents, total_length) VALUES (0, 0, 0);
+CREATE TABLE IF NOT EXISTS term_frequencies (
+    term TEXT PRIMARY KEY,
+    documents INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS papers_published_date ON papers (json_extract(data, '$.published_date'));
+CREATE INDEX IF NOT EXISTS papers_citation_count ON papers (json_extract(data, '$.citation_count'));
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5 (
+    title, abstract, keywords, authors, tokenize = 'porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, abstract, keywords, authors) VALUES (
+        new.rowid, {FTS_COLUMNS.format(row='new')});
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF data ON papers BEGIN
+    DELETE FROM papers_fts WHERE rowid = old.rowid;
+    INSERT INTO papers_fts (rowid, title, abstract, keywords, authors) VALUES (
+        new.rowid, {FTS_COLUMNS.format(row='new')});
+END;
+CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+    DELETE FROM papers_fts WHERE rowid = old.rowid;
+END;
+"""
+
+# Bumped when existing libraries need a one-off backfill; see _migrate_schema
+SCHEMA_VERSION = 3
+
+# Columns `search_papers` matches free text against
+TEXT_COLUMNS = "{title abstract keywords}"
+
+# The (title, abstract) of a `papers` row: the text BM25 statistics are counted over
+TEXT_FIELDS = "json_extract(data, '$.title'), json_extract(data, '$.abstract')"
+
+def db_path() -> Path:
+    return DATA_FILE.with_suffix(".sqlite")
+
+def dedup_key(paper: Paper) -> str:
+    return paper.doi or paper.arxiv_id or paper.openalex_id or paper.id
 
 def load_papers() -> List[Paper]:
-    if not DATA_FILE.exists():
-        return []
-    with open(DATA_FILE, "r") as f:
-        return [Paper.model_validate(paper) for paper in json.load(f)]
+    with closing(_connect()) as conn:
+        return _validate_rows(data for (data,) in conn.execute("SELECT data FROM papers ORDER BY rowid"))
 
 def save_papers(papers: List[Paper]) -> None:
-    with open(DATA_FILE, "w") as f:
-        json.dump([paper.model_dump(mode='json') for paper in papers], f, indent=4)
\ No newline at end of file
+    """Replace the whole library with `papers`."""
+    with closing(_connect()) as conn, conn:
+        conn.execute("DELETE FROM papers")
+        _reset_corpus(conn)
+        _upsert(conn, papers)
+
+def upsert_papers(papers: Iterable[Paper]) -> None:
+    """Insert new papers and overwrite existing ones that share a dedup key."""
+    with closing(_connect()) as conn, conn:
+        _upsert(conn, papers)
+
+def remove_paper(paper_id: str) -> bool:
+    with closing(_connect()) as conn, conn:
+        where = "FROM papers WHERE id = ? OR dedup_key = ?"
+        _count_terms(conn, conn.execute(f"SELECT {TEXT_FIELDS} {where}", (paper_id, paper_id)).fetchall(), -1)
+        cursor = conn.execute(f"DELETE {where}", (paper_id, paper_id))
+        return cursor.rowcount > 0
+
+def find_paper(identifier: str) -> Paper | None:
+    """Look a paper up by its id, DOI, arXiv id or OpenAlex id."""
+    with closing(_connect()) as conn:
+        for column in ("id", "doi", "arxiv_id", "openalex_id"):
+            row = conn.execute(f"SELECT data FROM papers WHERE {column} = ? LIMIT 1", (identifier,)).fetchone()
+            if row:
+                return Paper.model_validate_json(row[0])
+    return None
+
+def count_papers() -> int:
+    with closing(_connect()) as conn:
+        return conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+def paper_ids() -> List[str]:
+    with closing(_connect()) as conn:
+        return [paper_id for (paper_id,) in conn.execute("SELECT id FROM papers ORDER BY rowid")]
+
+def get_papers(paper_ids: Iterable[str]) -> List[Paper]:
+    """The saved papers with the given ids, in the order asked for; unknown ids are skipped."""
+    ids = list(dict.fromkeys(paper_ids))
+    found = {}
+    with closing(_connect()) as conn:
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = conn.execute(f"SELECT data FROM papers WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((paper.id, paper) for paper in _validate_rows(data for (data,) in rows))
+    return [found[paper_id] for paper_id in ids if paper_id in found]
+
+def iter_papers(page_size: int = 500) -> Iterator[List[Paper]]:
+    """Yield the library in pages so callers never hold more than `page_size` papers."""
+    last_rowid = 0
+    with closing(_connect()) as conn:
+        while True:
+            rows = conn.execute(
+                "SELECT rowid, data FROM papers WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, page_size),
+            ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            yield _validate_rows(data for _, data in rows)
+
+def corpus_stats(terms: Iterable[str]) -> CorpusStats:
+    """The library's BM25 statistics, with document frequencies for `terms` only.
+
+    BM25 looks up the frequencies of the query's terms and nothing else, so
+    this costs a handful of primary-key reads however large the library is.
+    """
+    terms = list(dict.fromkeys(terms))
+    with closing(_connect()) as conn:
+        documents, total_length = conn.execute("SELECT documents, total_length FROM corpus WHERE id = 0").fetchone()
+        rows = conn.execute(
+            f"SELECT term, documents FROM term_frequencies WHERE term IN ({','.join('?' * len(terms))})", terms
+        ) if terms else ()
+        return CorpusStats(documents, total_length, dict(rows))
+
+def search_papers(text: Iterable[str] = (), author: str | None = None, year: int | None = None,
+                  min_citations: int | None = None, limit: int | None = None) -> List[Paper]:
+    """Papers matching every given filter, best full-text match first.
+
+    `text` phrases match title, abstract or keywords (any one of them is enough)
+    and `author` matches author names; both are stemmed, so "twins" finds
+    "twin". Only the matching rows are read, through the FTS5 index kept in
+    step with `papers` by triggers.
+    """
+    match = []
+    phrases = [phrase for phrase in text if phrase.strip()]
+    if phrases:
+        match.append(f"{TEXT_COLUMNS} : ({' OR '.join(_fts_phrase(phrase) for phrase in phrases)})")
+    if author:
+        match.append(f"authors : {_fts_phrase(author)}")
+    where, params = [], []
+    if match:
+        where.append("papers_fts MATCH ?")
+        params.append(" AND ".join(match))
+    if year is not None:
+        where.append("json_extract(p.data, '$.published_date') BETWEEN ? AND ?")
+        params.extend((f"{year:04d}-01-01", f"{year:04d}-12-31"))
+    if min_citations is not None:
+        where.append("json_extract(p.data, '$.citation_count') >= ?")
+        params.append(min_citations)
+    source = "papers_fts JOIN papers p ON p.rowid = papers_fts.rowid" if match else "papers p"
+    sql = f"SELECT p.data FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY papers_fts.rank" if match else " ORDER BY p.rowid"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with closing(_connect()) as conn:
+        return _validate_rows(data for (data,) in conn.execute(sql, params))
+
+def _fts_phrase(text: str) -> str:
+    # Quoting makes user input a plain phrase, never FTS5 query syntax
+    return '"' + text.replace('"', '""') + '"'
+
+def load_digest(query_key: str) -> tuple[date | None, date, List[Paper]] | None:
+    """The window start, watermark and candidate papers saved by the last incremental digest for `query_key`.
+
+    The candidates cover publications from the window start up to the watermark;
+    digests saved before the window start was recorded return None for it.
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT window_start, watermark, data FROM digests WHERE query_key = ?",
+                           (query_key,)).fetchone()
+    if row is None:
+        return None
+    window_start = date.fromisoformat(row[0]) if row[0] else None
+    return window_start, date.fromisoformat(row[1]), _PAPER_LIST.validate_json(row[2])
+
+def save_digest(query_key: str, window_start: date | None, watermark: date, papers: List[Paper]) -> None:
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO digests (query_key, window_start, watermark, data) VALUES (?, ?, ?, ?)",
+            (query_key, window_start and window_start.isoformat(), watermark.isoformat(), _PAPER_LIST.dump_json(papers).decode()),
+        )
+
+def _validate_rows(rows: Iterable[str]) -> List[Paper]:
+    # Rows are JSON we wrote ourselves: validating them as one array is a single
+    # pass through pydantic-core instead of one call per paper
+    return _PAPER_LIST.validate_json("[" + ",".join(rows) + "]")
+
+def _upsert(conn: sqlite3.Connection, papers: Iterable[Paper]) -> None:
+    # The last copy of a dedup key is the one that ends up stored
+    papers = list({dedup_key(p): p for p in papers}.values())
+    replaced = [conn.execute(f"SELECT {TEXT_FIELDS} FROM papers WHERE dedup_key = ?", (dedup_key(p),)).fetchone()
+                for p in papers]
+    _count_terms(conn, [row for row in replaced if row], -1)
+    _count_terms(conn, [(p.title, p.abstract) for p in papers], 1)
+    conn.executemany(
+        """INSERT INTO papers (dedup_key, id, doi, arxiv_id, openalex_id, data) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (dedup_key) DO UPDATE SET
+            id = excluded.id, doi = excluded.doi, arxiv_id = excluded.arxiv_id,
+            openalex_id = excluded.openalex_id, data = excluded.data""",
+        ((dedup_key(p), p.id, p.doi or None, p.arxiv_id, p.openalex_id, p.model_dump_json()) for p in papers),
+    )
+
+def _count_terms(conn: sqlite3.Connection, texts: List[tuple[str, str]], sign: int) -> None:
+    """Add (sign 1) or take away (sign -1) the (title, abstract) documents in `texts` from the corpus statistics."""
+    if not texts:
+        return
+    stats = CorpusStats()
+    for title, abstract in texts:
+        terms = text_terms(title, abstract)
+        stats.add(set(terms), len(terms))
+    conn.execute("UPDATE corpus SET documents = documents + ?, total_length = total_length + ? WHERE id = 0",
+                 (sign * stats.documents, sign * stats.total_length))
+    conn.executemany(
+        "INSERT INTO term_frequencies (term, documents) VALUES (?, ?) "
+        "ON CONFLICT (term) DO UPDATE SET documents = documents + excluded.documents",
+        ((term, sign * count) for term, count in stats.document_frequency.items()),
+    )
+    if sign < 0:
+        conn.execute("DELETE FROM term_frequencies WHERE documents <= 0")
+
+def _reset_corpus(conn: sqlite3.Connection) -> None:
+    conn.execute("UPDATE corpus SET documents = 0, total_length = 0 WHERE id = 0")
+    conn.execute("DELETE FROM term_frequencies")
+
+def _connect() -> sqlite3.Connection:
+    path = db_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _migrate_schema(conn)
+    _migrate_json(conn)
+    return conn
+
+def _migrate_schema(conn: sqlite3.Connection) -> None:
+    (version,) = conn.execute("PRAGMA user_version").fetchone()
+    if version >= SCHEMA_VERSION:
+        return
+    with conn:
+        if version < 1:
+            # Libraries saved before the full-text index existed: index their rows once
+            conn.execute("DELETE FROM papers_fts")
+            conn.execute(f"""INSERT INTO papers_fts (rowid, title, abstract, keywords, authors)
+                SELECT papers.rowid, {FTS_COLUMNS.format(row="papers")} FROM papers""")
+        if version < 3:
+            # Libraries saved before the corpus statistics were kept: count them once
+            _reset_corpus(conn)
+            _count_terms(conn, conn.execute(f"SELECT {TEXT_FIELDS} FROM papers").fetchall(), 1)
+        columns = {name for _, name, *_ in conn.execute("PRAGMA table_info(digests)")}
+        if "window_start" not in columns:
+            # Digests saved before their window start was recorded; NULL makes the next run refetch the window
+            conn.execute("ALTER TABLE digests ADD COLUMN window_start TEXT")
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _migrate_json(conn: sqlite3.Connection) -> None:
+    if not DATA_FILE.exists():
+        return
+    with open(DATA_FILE, "r") as f:
+        papers = [Paper.model_validate(paper) for paper in json.load(f)]
+    with conn:
+        _upsert(conn, papers)
+    DATA_FILE.rename(DATA_FILE.with_suffix(".json.migrated"))
@@ -0,0 +1,44 @@
+from benchmarks.payloads import PayloadFactory
+from benchmarks.run import BENCHMARKS, Workload, compare, report, run_benchmarks
+
+
+def test_every_benchmark_runs_on_a_small_workload():
+    results = run_benchmarks(sizes=[50], memory=False)
+    assert [r.benchmark for r in results] == list(BENCHMARKS)
+    assert all(r.papers_per_second > 0 for r in results)
+
+
+def test_memory_pass_records_peak_heap():
+    [result] = run_benchmarks(sizes=[20], names=["dedup"])
+    assert result.peak_bytes > 0
+
+
+def test_fetch_replays_the_requested_number_of_papers(tmp_path):
+    # 1500 takes Semantic Scholar down the /search/bulk path
+    workload = Workload(1500, tmp_path, PayloadFactory())
+    assert len(BENCHMARKS["fetch_openalex"](workload)()) == 1500
+    assert len(BENCHMARKS["fetch_semantic_scholar"](workload)()) == 1500
+
+
+def test_synthetic_papers_include_cross_provider_duplicates():
+    papers = PayloadFactory().papers(100)
+    dois = [p.doi for p in papers if p.doi]
+    assert len(papers) == 100
+    assert len(set(dois)) < len(dois)
+    assert all(p.abstract for p in papers)
+
+
+def test_compare_flags_slowdowns_past_threshold():
+    baseline = {"results": [{"benchmark": "dedup", "size": 100, "seconds": 1.0},
+                            {"benchmark": "rank", "size": 100, "seconds": 1.0}]}
+    current = {"results": [{"benchmark": "dedup", "size": 100, "seconds": 1.5},
+                           {"benchmark": "rank", "size": 100, "seconds": 1.05},
+                           {"benchmark": "export_md", "size": 100, "seconds": 9.0}]}
+    assert compare(baseline, current) == [("dedup", 100, 1.5)]
+
+
+def test_report_is_json_ready():
+    [result] = run_benchmarks(sizes=[10], names=["rank"], memory=False)
+    data = report([result])
+    assert data["results"][0]["benchmark"] == "rank"
+    assert "python" in data and "commit" in data
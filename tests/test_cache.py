@@ -1,94 +1,185 @@
-import json
 import time
-from datetime import date, timedelta
-from pathlib import Path
 
 import pytest
 
-from pulse.service import _cache_key, _load_cache, _save_cache, _cleanup_stale_cache
-from helpers import make_paper, make_query
+from pulse.cache import ResponseCache
+from pulse.config import CacheConfig
+from pulse.serialization import encode
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=3600, max_bytes=10_000)
+    yield cache
+    cache.close()
 
 
 # --- Cache key tests ---
 
 def test_cache_key_is_stable():
-    """Same query always produces the same key."""
-    q = make_query(days=30)
-    assert _cache_key(q, 30) == _cache_key(q, 30)
+    """Same request always produces the same key, regardless of param order."""
+    a = ResponseCache.key("https://api.test/works", {"search": "BIM", "per_page": 20})
+    b = ResponseCache.key("https://api.test/works", {"per_page": 20, "search": "BIM"})
+    assert a == b
+
+
+def test_cache_key_differs_by_params():
+    a = ResponseCache.key("https://api.test/works", {"search": "BIM"})
+    b = ResponseCache.key("https://api.test/works", {"search": "digital twin"})
+    assert a != b
+
+
+def test_cache_key_differs_by_url():
+    assert ResponseCache.key("https://a.test/", {}) != ResponseCache.key("https://b.test/", {})
+
 
+def test_cache_key_ignores_identity_params():
+    """The polite-pool email does not change the response, so it must not split the cache."""
+    a = ResponseCache.key("https://api.test/works", {"search": "BIM", "mailto": "a@uni.edu"})
+    b = ResponseCache.key("https://api.test/works", {"search": "BIM", "mailto": ""})
+    assert a == b
 
-def test_cache_key_differs_by_days():
-    """Different day ranges produce different cache keys."""
-    q30 = make_query(days=30)
-    q365 = make_query(days=365)
-    assert _cache_key(q30, 30) != _cache_key(q365, 365)
 
+# --- Set / Get round-trip ---
 
-def test_cache_key_differs_by_keywords():
-    """Different keywords produce different cache keys."""
-    q1 = make_query(keywords=["BIM"], days=30)
-    q2 = make_query(keywords=["digital twin"], days=30)
-    assert _cache_key(q1, 30) != _cache_key(q2, 30)
+def test_set_and_get(cache):
+    cache.set("k", {"results": [1, 2, 3]})
+    assert cache.get("k") == {"results": [1, 2, 3]}
 
 
-# --- Save / Load round-trip ---
+def test_get_miss(cache):
+    assert cache.get("missing") is None
 
-def test_save_and_load_cache(tmp_path):
-    """Papers saved to cache can be loaded back."""
-    cache_file = tmp_path / "test_cache.json"
-    papers = [make_paper("p1"), make_paper("p2")]
 
-    _save_cache(cache_file, papers)
-    loaded = _load_cache(cache_file)
+def test_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    first = ResponseCache(path)
+    first.set("k", [1])
+    first.close()
+    second = ResponseCache(path)
+    assert second.get("k") == [1]
+    second.close()
 
-    assert loaded is not None
-    assert len(loaded) == 2
-    assert loaded[0].id == "p1"
-    assert loaded[1].id == "p2"
 
+def test_from_config_uses_directory(tmp_path):
+    cache = ResponseCache.from_config(CacheConfig(directory=str(tmp_path / "c"), ttl_seconds=5))
+    assert cache.path == tmp_path / "c" / "responses.sqlite"
+    assert cache.ttl_seconds == 5
+    cache.close()
 
-def test_load_cache_miss_on_no_file(tmp_path):
-    """Returns None when cache file does not exist."""
-    cache_file = tmp_path / "nonexistent.json"
-    assert _load_cache(cache_file) is None
 
+# --- TTL ---
 
-def test_load_cache_returns_none_on_corrupt_file(tmp_path):
-    """Returns None (not a crash) when cache file is corrupt JSON."""
-    cache_file = tmp_path / "corrupt.json"
-    cache_file.write_text("not valid json {{{{")
-    assert _load_cache(cache_file) is None
+def test_get_expired_entry_returns_none(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=0.05)
+    cache.set("k", [1])
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    cache.close()
 
 
-# --- Stale TTL ---
+def test_purge_expired_removes_only_stale_entries(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite", ttl_seconds=0.05)
+    cache.set("old", [1])
+    time.sleep(0.1)
+    cache.set("fresh", [2])
+    cache.purge_expired()
+    assert cache.get("fresh") == [2]
+    assert cache.total_bytes() == len(encode([2], cache.serializer))
+    cache.close()
 
-def test_load_cache_stale_after_cleanup(tmp_path):
-    """After _cleanup_stale_cache removes old files, _load_cache returns None."""
-    cache_file = tmp_path / "old.json"
-    _save_cache(cache_file, [make_paper()])
 
-    # Make it look an hour and a bit old
-    old_mtime = time.time() - 3700
-    import os
-    os.utime(cache_file, (old_mtime, old_mtime))
+# --- Size cap / LRU ---
 
-    _cleanup_stale_cache(tmp_path)
+def test_eviction_keeps_total_under_cap(cache):
+    for i in range(20):
+        cache.set(f"k{i}", "x" * 1000)
+    assert cache.total_bytes() <= 10_000
 
-    # File should be gone now
-    assert not cache_file.exists()
-    assert _load_cache(cache_file) is None
 
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite", max_bytes=2500)
+    cache.set("a", "x" * 1000)
+    cache.set("b", "x" * 1000)
+    time.sleep(0.01)
+    cache.get("a")  # touch a, so b is now the LRU entry
+    cache.set("c", "x" * 1000)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    cache.close()
 
-def test_cleanup_preserves_fresh_files(tmp_path):
-    """Fresh cache files (under TTL) are NOT deleted during cleanup."""
-    fresh_file = tmp_path / "fresh.json"
-    _save_cache(fresh_file, [make_paper()])
 
-    _cleanup_stale_cache(tmp_path)
+def test_running_total_matches_stored_sizes(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    cache = ResponseCache(path, ttl_seconds=0.05, max_bytes=5_000)
+    cache.set("a", "x" * 1000)
+    cache.set("a", "x" * 10)  # replaced in place
+    for i in range(10):
+        cache.set(f"k{i}", "y" * 900)  # evicts
+    time.sleep(0.1)
+    cache.set("fresh", [1])
+    cache.purge_expired()
+    actual = cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    assert cache.total_bytes() == actual == len(encode([1], cache.serializer))
+    cache.close()
 
-    assert fresh_file.exists()
+
+def test_running_total_is_seeded_from_an_older_cache_file(tmp_path):
+    path = tmp_path / "responses.sqlite"
+    cache = ResponseCache(path)
+    cache.set("a", "x" * 1000)
+    cache._conn.executescript("DROP TABLE totals; DROP TRIGGER responses_added; "
+                              "DROP TRIGGER responses_resized; DROP TRIGGER responses_removed;")
+    cache.close()
+    reopened = ResponseCache(path)
+    assert reopened.total_bytes() == len(encode("x" * 1000, reopened.serializer))
+    reopened.close()
 
 
-def test_cleanup_on_missing_dir():
-    """Cleanup on a non-existent directory doesn't crash."""
-    _cleanup_stale_cache(Path("/nonexistent/path/to/cache"))  # should not raise
+def test_oversized_value_is_not_stored(cache):
+    cache.set("huge", "x" * 20_000)
+    assert cache.get("huge") is None
+
+
+# --- Serialization ---
+
+@pytest.mark.parametrize("serializer", ["json", "msgpack"])
+def test_round_trip_with_each_serializer(tmp_path, serializer):
+    pytest.importorskip(serializer)
+    cache = ResponseCache(tmp_path / "responses.sqlite", serializer=serializer)
+    value = {"results": [{"title": "BIM", "year": 2024, "score": 0.5, "doi": None}]}
+    cache.set("k", value)
+    assert cache.get("k") == value
+    cache.close()
+
+
+def test_entries_written_by_another_serializer_still_load(tmp_path):
+    pytest.importorskip("msgpack")
+    path = tmp_path / "responses.sqlite"
+    writer = ResponseCache(path, serializer="msgpack")
+    writer.set("k", [1, "two"])
+    writer.close()
+    reader = ResponseCache(path, serializer="json")
+    assert reader.get("k") == [1, "two"]
+    reader.close()
+
+
+def test_legacy_headerless_json_entry_is_read(cache):
+    """Entries cached before serialization was versioned are plain JSON."""
+    cache._conn.execute(
+        "INSERT INTO responses (key, size, created_at, accessed_at, value) VALUES (?, ?, ?, ?, ?)",
+        ("old", 3, time.time(), time.time(), b"[1]"),
+    )
+    assert cache.get("old") == [1]
+
+
+def test_unknown_format_version_is_a_miss(cache):
+    cache.set("k", [1])
+    cache._conn.execute("UPDATE responses SET value = ? WHERE key = ?", (b"SP\x09\x01[1]", "k"))
+    assert cache.get("k") is None
+
+
+def test_unknown_serializer_name_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResponseCache(tmp_path / "responses.sqlite", serializer="pickle")
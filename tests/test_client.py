@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+
+from pulse.client import HostLimitedTransport, borrow_client, create_client
+from pulse.config import HttpConfig
+
+
+# --- create_client ---
+
+def test_create_client_applies_timeouts():
+    client = create_client(HttpConfig(timeout=12.0, connect_timeout=3.0))
+    assert client.timeout.read == 12.0
+    assert client.timeout.connect == 3.0
+    asyncio.run(client.aclose())
+
+
+# --- borrow_client ---
+
+def test_borrow_client_reuses_given_client():
+    """A borrowed client is passed through and left open for the owner."""
+    async def run():
+        client = httpx.AsyncClient()
+        async with borrow_client(client) as borrowed:
+            assert borrowed is client
+        assert not client.is_closed
+        await client.aclose()
+    asyncio.run(run())
+
+
+def test_borrow_client_closes_owned_client():
+    async def run():
+        async with borrow_client() as owned:
+            pass
+        return owned
+    assert asyncio.run(run()).is_closed
+
+
+# --- Per-host limits ---
+
+def test_host_limited_transport_caps_concurrency():
+    """No more than max_per_host requests to one host are in flight at once."""
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, stream=httpx.ByteStream(b"ok"))
+
+    async def run():
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await asyncio.gather(*(client.get("http://example.com/") for _ in range(6)))
+
+    asyncio.run(run())
+    assert in_flight["peak"] == 2
+
+
+def test_host_limited_transport_releases_on_error():
+    """A failed request gives its slot back so later requests are not starved."""
+    calls = {"n": 0}
+
+    async def handler(request):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise httpx.ConnectError("boom")
+        return httpx.Response(200, stream=httpx.ByteStream(b""))
+
+    async def run():
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=1)
+        async with httpx.AsyncClient(transport=transport) as client:
+            try:
+                await client.get("http://example.com/")
+            except httpx.ConnectError:
+                pass
+            return await asyncio.wait_for(client.get("http://example.com/"), timeout=1)
+
+    assert asyncio.run(run()).status_code == 200
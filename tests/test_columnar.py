@@ -0,0 +1,58 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from pulse.columnar import ColumnarWriter, read_columnar, write_columnar
+from pulse.export import export_many
+from pulse.storage import load_papers, upsert_papers
+from helpers import make_paper
+
+
+def library():
+    return [
+        make_paper("p1", "First", doi="10.1/a", authors=["Smith, J.", "Doe, A."], keywords=["BIM"],
+                   published_date=date(2024, 5, 1), relevance_score=0.5),
+        make_paper("p2", "Second", arxiv_id="2401.00001", pdf_url="http://pdf", keywords=[]),
+    ]
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_round_trip_preserves_papers(tmp_path, format):
+    original = library()
+    path = write_columnar(original, tmp_path / f"library.{format}", format)
+    papers = [paper for batch in read_columnar(path) for paper in batch]
+    assert papers == original
+
+
+def test_parquet_has_typed_list_columns_and_row_groups(tmp_path):
+    path = tmp_path / "library.parquet"
+    with ColumnarWriter(path, "parquet", row_group_size=2) as writer:
+        writer.write([make_paper(str(i)) for i in range(3)])
+        writer.write([make_paper("3"), make_paper("4")])
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    schema = parquet.schema_arrow
+    assert schema.field("authors").type.value_type == pa.string()
+    assert schema.field("published_date").type == pa.date32()
+    assert pq.read_table(path, columns=["id"]).column("id").to_pylist() == ["0", "1", "2", "3", "4"]
+
+
+def test_read_columnar_rejects_other_files(tmp_path):
+    path = tmp_path / "digest.md"
+    path.write_text("# not columnar")
+    with pytest.raises(ValueError):
+        list(read_columnar(path))
+
+
+def test_export_many_writes_parquet_and_imports_into_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    paths, _ = asyncio.run(export_many(library(), ["parquet", "md"], str(tmp_path / "out")))
+    for batch in read_columnar(paths["parquet"]):
+        upsert_papers(batch)
+    assert [p.id for p in load_papers()] == ["p1", "p2"]
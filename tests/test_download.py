@@ -0,0 +1,265 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+
+from pulse.config import DownloadConfig
+from pulse.download import download_papers, download_pdf
+from pulse.pdfstore import PdfStore
+from helpers import make_paper
+
+BODY = b"%PDF-1.7 " + bytes(range(256)) * 40
+
+fast_config = DownloadConfig(backoff_base=0.0, chunk_size=1024)
+
+
+def serve(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+# --- Skip guard ---
+
+def test_download_pdf_skips_existing_file(tmp_path):
+    """download_pdf should skip the download if the file already exists."""
+    existing_pdf = tmp_path / "paper.pdf"
+    existing_pdf.write_bytes(b"existing content")
+
+    mock_client = MagicMock()
+    mock_client.stream = MagicMock()
+
+    result = asyncio.run(download_pdf(mock_client, "http://example.com/paper.pdf", existing_pdf))
+
+    # The HTTP client should never have been called
+    mock_client.stream.assert_not_called()
+    # And the file should remain unchanged
+    assert existing_pdf.read_bytes() == b"existing content"
+    assert result.status == "skipped"
+
+
+# --- Streaming, resume and retry ---
+
+def test_download_pdf_streams_to_final_path(tmp_path):
+    path = tmp_path / "paper.pdf"
+
+    async def run():
+        async with serve(lambda request: httpx.Response(200, content=BODY)) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    result = asyncio.run(run())
+    assert result.status == "downloaded"
+    assert path.read_bytes() == BODY
+    assert not (tmp_path / "paper.pdf.part").exists()
+
+
+def test_download_pdf_resumes_partial_file_with_range(tmp_path):
+    path = tmp_path / "paper.pdf"
+    (tmp_path / "paper.pdf.part").write_bytes(BODY[:1000])
+    (tmp_path / "paper.pdf.part.validator").write_text('"v1"')
+    ranges = []
+
+    def handler(request):
+        ranges.append((request.headers.get("Range"), request.headers.get("If-Range")))
+        return httpx.Response(206, content=BODY[1000:])
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    result = asyncio.run(run())
+    assert ranges == [("bytes=1000-", '"v1"')]
+    assert result.status == "resumed"
+    assert path.read_bytes() == BODY
+    assert not (tmp_path / "paper.pdf.part.validator").exists()
+
+
+def test_download_pdf_restarts_when_range_is_ignored(tmp_path):
+    path = tmp_path / "paper.pdf"
+    (tmp_path / "paper.pdf.part").write_bytes(b"stale bytes")
+    (tmp_path / "paper.pdf.part.validator").write_text('"v1"')
+
+    async def run():
+        async with serve(lambda request: httpx.Response(200, content=BODY)) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    assert asyncio.run(run()).status == "downloaded"
+    assert path.read_bytes() == BODY
+
+
+def test_download_pdf_restarts_when_the_file_changed(tmp_path):
+    path = tmp_path / "paper.pdf"
+    (tmp_path / "paper.pdf.part").write_bytes(b"old version's first bytes")
+    (tmp_path / "paper.pdf.part.validator").write_text('"old"')
+
+    def handler(request):
+        # If-Range no longer matches, so the Range is ignored
+        assert request.headers["If-Range"] == '"old"'
+        return httpx.Response(200, content=BODY, headers={"ETag": '"new"'})
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    assert asyncio.run(run()).status == "downloaded"
+    assert path.read_bytes() == BODY
+
+
+def test_download_pdf_does_not_resume_without_a_saved_validator(tmp_path):
+    path = tmp_path / "paper.pdf"
+    (tmp_path / "paper.pdf.part").write_bytes(b"bytes of unknown origin")
+    ranges = []
+
+    def handler(request):
+        ranges.append(request.headers.get("Range"))
+        return httpx.Response(200, content=BODY)
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    assert asyncio.run(run()).status == "downloaded"
+    assert ranges == [None]
+    assert path.read_bytes() == BODY
+
+
+class _BrokenStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield BODY[:2048]
+        raise httpx.ReadError("connection reset")
+
+
+def test_download_pdf_resumes_an_interrupted_body_against_its_validator(tmp_path):
+    path = tmp_path / "paper.pdf"
+    requests = []
+
+    def handler(request):
+        requests.append((request.headers.get("Range"), request.headers.get("If-Range")))
+        if len(requests) == 1:
+            return httpx.Response(200, stream=_BrokenStream(), headers={"ETag": 'W/"weak"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        return httpx.Response(206, content=BODY[2048:])
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", path, fast_config)
+
+    assert asyncio.run(run()).status == "resumed"
+    # A weak ETag cannot validate a Range, so the date is sent instead
+    assert requests == [(None, None), ("bytes=2048-", "Mon, 01 Jan 2024 00:00:00 GMT")]
+    assert path.read_bytes() == BODY
+
+
+def test_download_pdf_retries_then_reports_failure(tmp_path):
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(503, headers={"Retry-After": "0"})
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", tmp_path / "paper.pdf",
+                                      fast_config.model_copy(update={"max_retries": 2}))
+
+    result = asyncio.run(run())
+    assert calls["n"] == 3
+    assert result.status == "failed"
+    assert not (tmp_path / "paper.pdf").exists()
+
+
+def test_download_pdf_does_not_retry_not_found(tmp_path):
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(404)
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_pdf(client, "http://example.com/a.pdf", tmp_path / "paper.pdf", fast_config)
+
+    assert asyncio.run(run()).status == "failed"
+    assert calls["n"] == 1
+
+
+# --- Bounded parallelism ---
+
+def test_download_papers_caps_concurrency_per_host(tmp_path):
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, content=BODY)
+
+    papers = [make_paper(f"p{i}", f"Paper {i}", pdf_url=f"http://example.com/{i}.pdf") for i in range(6)]
+    papers.append(make_paper("nopdf", "No PDF"))
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_papers(papers, tmp_path / "out", client, fast_config.model_copy(update={"max_per_host": 2}),
+                                         PdfStore(tmp_path / "store"))
+
+    results = asyncio.run(run())
+    assert in_flight["peak"] == 2
+    assert [r.paper_id for r in results] == [f"p{i}" for i in range(6)]
+    assert all(r.status == "downloaded" for r in results)
+
+
+# --- Content-addressed store ---
+
+def test_repeat_export_revalidates_and_links_one_blob(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=BODY, headers={"ETag": '"v1"'})
+
+    store = PdfStore(tmp_path / "store")
+    papers = [make_paper("p1", "Same Title", pdf_url="http://example.com/a.pdf")]
+
+    async def run(output_dir):
+        async with serve(handler) as client:
+            return await download_papers(papers, output_dir, client, fast_config, store)
+
+    first = asyncio.run(run(tmp_path / "one"))
+    second = asyncio.run(run(tmp_path / "two"))
+    assert [r.status for r in first] == ["downloaded"]
+    assert [r.status for r in second] == ["not_modified"]
+    assert requests[1]["if-none-match"] == '"v1"'
+    one, two = tmp_path / "one" / "Same Title.pdf", tmp_path / "two" / "Same Title.pdf"
+    assert two.read_bytes() == BODY
+    assert one.stat().st_ino == two.stat().st_ino
+    assert store.lookup("http://example.com/a.pdf").paper_id == "p1"
+
+
+def test_same_title_papers_get_distinct_files(tmp_path):
+    def handler(request):
+        return httpx.Response(200, content=request.url.path.encode())
+
+    papers = [
+        make_paper("p1", "Editorial", pdf_url="http://example.com/1.pdf"),
+        make_paper("p2", "Editorial", pdf_url="http://example.com/2.pdf"),
+    ]
+
+    async def run():
+        async with serve(handler) as client:
+            return await download_papers(papers, tmp_path / "out", client, fast_config, PdfStore(tmp_path / "store"))
+
+    results = asyncio.run(run())
+    assert [r.path.name for r in results] == ["Editorial.pdf", "Editorial (2).pdf"]
+    assert results[1].path.read_bytes() == b"/2.pdf"
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = PdfStore(tmp_path / "store")
+    papers = [make_paper(f"p{i}", f"Mirror {i}", pdf_url=f"http://mirror{i}.org/a.pdf") for i in range(3)]
+
+    async def run():
+        async with serve(lambda request: httpx.Response(200, content=BODY)) as client:
+            return await download_papers(papers, tmp_path / "out", client, fast_config, store)
+
+    asyncio.run(run())
+    assert len(list((tmp_path / "store" / "blobs").rglob("*.pdf"))) == 1
@@ -0,0 +1,141 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from pulse import embeddings, storage
+from pulse.config import RankingConfig
+from pulse.embeddings import EmbeddingStore, HashingEmbedder, semantic_scores
+from pulse.service import _rank_papers_python, _rank_papers_vectorized, rank_papers
+from helpers import make_paper, make_query
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmbeddingStore(tmp_path, CountingEmbedder())
+    yield store
+    store.close()
+
+
+def _papers(n):
+    topics = ["digital twin bridge monitoring", "building information modeling compliance",
+              "concrete crack detection", "timber modular construction", "urban energy simulation"]
+    return [make_paper(f"p{i}", title=f"{topics[i % len(topics)]} study {i}",
+                       abstract=f"We examine {topics[i % len(topics)]} in case {i}.") for i in range(n)]
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    texts = ["Digital twins of bridges", "Concrete crack detection", ""]
+    first, second = HashingEmbedder().embed(texts), HashingEmbedder().embed(texts)
+    assert first.dtype == np.float32
+    assert np.array_equal(first, second)
+    assert np.allclose(np.linalg.norm(first[:2], axis=1), 1)
+    assert not first[2].any()
+
+
+def test_shared_vocabulary_is_more_similar():
+    query, near, far = HashingEmbedder().embed(["digital twin", "A digital twin for bridges", "Timber slab fire tests"])
+    assert query @ near > query @ far
+
+
+def test_store_only_embeds_new_or_changed_papers(store):
+    papers = _papers(3)
+    first = store.vectors(papers)
+    assert len(store.embedder.embedded) == 3
+
+    again = store.vectors([*papers, make_paper("new", title="Tunnel inspection")])
+    assert len(store.embedder.embedded) == 4
+    assert np.array_equal(again[:3], first)
+
+    changed = papers[0].model_copy(update={"abstract": "A revised abstract."})
+    store.vectors([changed])
+    assert len(store.embedder.embedded) == 5
+    assert len(store) == 4
+
+
+def test_store_persists_between_instances(tmp_path):
+    papers = _papers(5)
+    with_store = EmbeddingStore(tmp_path, HashingEmbedder())
+    expected = with_store.vectors(papers)
+    with_store.close()
+
+    reopened = EmbeddingStore(tmp_path, CountingEmbedder())
+    assert np.array_equal(reopened.vectors(papers), expected)
+    assert reopened.embedder.embedded == []
+    assert reopened.missing(["p0", "unknown"]) == ["unknown"]
+    reopened.close()
+
+
+def test_nearest_returns_the_closest_papers_first(store):
+    store.vectors(_papers(20))
+    neighbours = store.nearest(["concrete crack detection"], k=4)
+    assert len(neighbours) == 4
+    assert all(int(paper_id[1:]) % 5 == 2 for paper_id, _ in neighbours)
+    assert [score for _, score in neighbours] == sorted((score for _, score in neighbours), reverse=True)
+
+
+def test_ivf_index_matches_exact_search(store, monkeypatch):
+    store.vectors(_papers(400))
+    exact = store.nearest(["timber modular construction"], k=10)
+
+    monkeypatch.setattr(embeddings, "IVF_MIN_VECTORS", 100)
+    store.nprobe = 20  # sqrt(400) lists, so every list is probed
+    assert store.nearest(["timber modular construction"], k=10) == exact
+    assert store._centroids is not None
+
+    # Vectors added after training are filed under their nearest centroid
+    store.vectors([make_paper("late", title="Timber modular construction", abstract="")])
+    assert store.nearest(["timber modular construction"], k=1)[0][0] == "late"
+
+
+def test_semantic_scores_without_a_store_are_clipped_cosines():
+    papers = [make_paper("a", title="Digital twin", abstract=""), make_paper("b", title="Steel", abstract="")]
+    scores = semantic_scores(papers, ["digital twin"])
+    assert scores[0] > 0.5
+    assert 0 <= scores[1] < scores[0]
+
+
+def test_semantic_weight_reorders_ranking(store):
+    papers = [make_paper("cited", title="Steel fatigue", citation_count=100),
+              make_paper("similar", title="Digital twin for bridges", abstract="A digital twin.", citation_count=1)]
+    config = RankingConfig(weight_semantic=2.0)
+    assert rank_papers(papers, make_query(), RankingConfig())[0].id == "cited"
+    assert rank_papers(papers, make_query(), config, embeddings=store)[0].id == "similar"
+
+
+def test_semantic_python_and_vectorized_paths_agree(store):
+    config = RankingConfig(weight_semantic=0.5)
+    papers = _papers(300)
+    python = [(p.id, p.relevance_score) for p in _rank_papers_python(_papers(300), make_query(), config, embeddings=store)]
+    vectorized = [(p.id, p.relevance_score) for p in _rank_papers_vectorized(papers, make_query(), config, embeddings=store)]
+    assert python == vectorized
+
+
+def test_get_papers_keeps_requested_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_FILE", tmp_path / "papers.json")
+    storage.upsert_papers(_papers(3))
+    assert [p.id for p in storage.get_papers(["p2", "missing", "p0"])] == ["p2", "p0"]
+    assert storage.paper_ids() == ["p0", "p1", "p2"]
+
+
+def test_search_library_adds_semantic_neighbours(tmp_path, monkeypatch):
+    from pulse.config import EmbeddingConfig, Settings
+    from pulse.service import search_library
+    monkeypatch.setattr(storage, "DATA_FILE", tmp_path / "papers.json")
+    storage.upsert_papers([make_paper("twin", title="Digital twin of a bridge", abstract=""),
+                           make_paper("timber", title="Timber connections", abstract="")])
+    settings = Settings(ranking=RankingConfig(weight_semantic=1.0),
+                        embeddings=EmbeddingConfig(directory=str(tmp_path / "embeddings")))
+    monkeypatch.setattr("pulse.service.load_config", lambda: settings)
+    # The run-together spelling defeats the word index but shares most trigrams
+    assert storage.search_papers(["digitaltwin"]) == []
+    assert search_library("digitaltwin")[0].id == "twin"
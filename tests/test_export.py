@@ -1,9 +1,13 @@
 import asyncio
-from unittest.mock import AsyncMock, MagicMock
+import csv
+import gzip
 
+import httpx
 import pytest
 
-from pulse.export import export_markdown, export_bibtex, download_pdfs
+from pulse.config import DownloadConfig, HttpConfig
+from pulse.export import export_markdown, export_bibtex, export_markdown_async, export_many
+from pulse.models import Paper
 from helpers import make_paper
 
 
@@ -79,19 +83,94 @@ def test_export_bibtex_omits_none_doi(tmp_path):
     assert "  doi" not in content
 
 
-# --- PDF skip guard ---
 
-def test_download_pdfs_skips_existing_file(tmp_path):
-    """download_pdfs should skip the download if the file already exists."""
-    existing_pdf = tmp_path / "paper.pdf"
-    existing_pdf.write_bytes(b"existing content")
+# --- Streaming export ---
 
-    mock_client = MagicMock()
-    mock_client.get = AsyncMock()
+def test_export_markdown_accepts_generator(tmp_path):
+    papers = (make_paper(str(i), f"Paper {i}") for i in range(3))
+    out = export_markdown(papers, str(tmp_path / "digest.md"))
+    assert "3. Paper 2" in out.read_text()
+
+
+def test_export_bibtex_gzip_output(tmp_path):
+    out = export_bibtex([make_paper(id="p1")], str(tmp_path / "digest.bib.gz"))
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert "@article{p1," in f.read()
+
+
+def test_export_markdown_async_matches_sync(tmp_path):
+    papers = [make_paper("p1", "Paper One"), make_paper("p2", "Paper Two")]
+
+    async def stream():
+        for paper in papers:
+            yield paper
+
+    sync_out = export_markdown(papers, str(tmp_path / "sync.md"))
+    async_out = asyncio.run(export_markdown_async(stream(), str(tmp_path / "async.md")))
+    # Only the generated timestamp line may differ
+    assert sync_out.read_text().splitlines()[2:] == async_out.read_text().splitlines()[2:]
+
+
+# --- Multi-format export ---
+
+def test_export_many_single_pass_all_text_formats(tmp_path):
+    consumed = []
+
+    def papers():
+        for i in range(3):
+            consumed.append(i)
+            yield make_paper(f"p{i}", f"Paper {i}", doi=f"10.1/{i}", keywords=["BIM"])
+
+    formats = ["md", "bibtex", "jsonl", "csv", "ris"]
+    paths, downloads = asyncio.run(export_many(papers(), formats, str(tmp_path)))
+    assert consumed == [0, 1, 2]
+    assert downloads == []
+    assert set(paths) == set(formats)
+    assert "3. Paper 2" in paths["md"].read_text()
+    assert paths["bibtex"].read_text() == export_bibtex([make_paper(f"p{i}", f"Paper {i}", doi=f"10.1/{i}", keywords=["BIM"]) for i in range(3)],
+                                                       str(tmp_path / "single.bib")).read_text()
+    assert [Paper.model_validate_json(line).id for line in paths["jsonl"].read_text().splitlines()] == ["p0", "p1", "p2"]
+    rows = list(csv.DictReader(paths["csv"].open()))
+    assert rows[1]["doi"] == "10.1/1" and rows[1]["keywords"] == "BIM"
+    assert paths["ris"].read_text().count("ER  - ") == 3
+
+
+def test_export_many_single_format_uses_output_path(tmp_path):
+    paths, _ = asyncio.run(export_many([make_paper()], ["csv"], str(tmp_path / "library.csv")))
+    assert paths == {"csv": tmp_path / "library.csv"}
+
+
+def test_export_many_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        asyncio.run(export_many([make_paper()], ["md", "docx"], str(tmp_path)))
+
+
+def test_export_many_downloads_pdfs_alongside_text(tmp_path):
+    papers = [make_paper("p1", "Has PDF", pdf_url="http://example.com/1.pdf"), make_paper("p2", "No PDF")]
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"%PDF"))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await export_many(papers, ["md", "pdf"], str(tmp_path / "out"), client,
+                                     DownloadConfig(store_directory=str(tmp_path / "store")))
+
+    paths, downloads = asyncio.run(run())
+    assert [r.paper_id for r in downloads] == ["p1"]
+    assert (paths["pdf"] / "Has PDF.pdf").read_bytes() == b"%PDF"
+    assert paths["md"] == tmp_path / "out" / "digest.md"
+
+
+def test_export_many_builds_its_client_from_http_config(tmp_path, monkeypatch):
+    import pulse.client
+    configs = []
+    original = pulse.client.create_client
 
-    asyncio.run(download_pdfs(mock_client, "http://example.com/paper.pdf", existing_pdf))
+    def create_client(config=None):
+        configs.append(config)
+        return original(config)
 
-    # The HTTP client should never have been called
-    mock_client.get.assert_not_called()
-    # And the file should remain unchanged
-    assert existing_pdf.read_bytes() == b"existing content"
+    monkeypatch.setattr(pulse.client, "create_client", create_client)
+    http = HttpConfig(timeout=5.0)
+    asyncio.run(export_many([make_paper("p1")], ["pdf"], str(tmp_path / "papers"),
+                            config=DownloadConfig(store_directory=str(tmp_path / "store")), http=http))
+    assert configs == [http]
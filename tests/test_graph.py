@@ -0,0 +1,83 @@
+import pytest
+
+from pulse.graph import CitationGraph, node_key, paper_node
+from helpers import make_paper
+
+
+def test_node_key_prefers_the_doi():
+    assert node_key("W1", "10.1/ABC") == "doi:10.1/abc"
+    assert node_key("W1") == "W1"
+    assert paper_node(make_paper("s2-1", doi="10.1/x")) == "doi:10.1/x"
+
+
+def test_edges_compact_into_sorted_deduplicated_rows():
+    graph = CitationGraph()
+    graph.add_edges([("a", "c"), ("a", "b"), ("a", "c"), ("b", "c"), ("c", "c")])
+    assert graph.edge_count == 3
+    assert set(graph.references("a")) == {"b", "c"}
+    assert graph.cited_by("c") == ["a", "b"]
+
+    # Later batches merge into the existing rows
+    graph.add_edges([("a", "d"), ("d", "a")])
+    assert set(graph.references("a")) == {"b", "c", "d"}
+    assert graph.cited_by("a") == ["d"]
+    assert list(graph.indptr) == [0, 3, 3, 4, 5]  # rows a, c, b, d in order of first sighting
+
+
+def test_pagerank_sums_to_one_and_favours_cited_papers():
+    graph = CitationGraph()
+    graph.add_edges([("a", "c"), ("b", "c"), ("c", "d")])
+    rank = graph.pagerank()
+    assert sum(rank.values()) == pytest.approx(1)
+    assert rank["c"] > rank["a"]
+    assert rank["d"] > rank["a"]
+
+
+def test_citations_from_landmark_papers_outweigh_many_obscure_ones():
+    graph = CitationGraph()
+    for i in range(3):
+        graph.add_paper(make_paper(f"landmark{i}", citation_count=20_000))
+    for i in range(6):
+        graph.add_paper(make_paper(f"obscure{i}", citation_count=0))
+    graph.add_edges([(f"landmark{i}", "fresh") for i in range(3)])
+    graph.add_edges([(f"obscure{i}", "old") for i in range(6)])
+    rank = graph.pagerank()
+    assert rank["fresh"] > rank["old"]
+
+
+def _tree(graph):
+    # Every paper cites those at half and a third of its index: a few hubs, many leaves
+    graph.add_edges((f"n{i}", f"n{i // 2}") for i in range(1, 200))
+    graph.add_edges((f"n{i}", f"n{i // 3}") for i in range(1, 200))
+
+
+def test_pagerank_warm_starts_after_growth():
+    graph = CitationGraph()
+    _tree(graph)
+    cold = graph.pagerank()
+    cold_iterations = graph.iterations
+
+    graph.add_edges([("n1", "n2")])
+    graph.pagerank()
+    assert graph.iterations < cold_iterations
+
+    fresh = CitationGraph()
+    _tree(fresh)
+    assert fresh.pagerank() == pytest.approx(cold)
+
+
+def test_related_scores_links_co_citation_and_coupling():
+    graph = CitationGraph()
+    graph.add_edges([
+        ("seed", "ref"),          # cited by the seed
+        ("citer", "seed"),        # cites the seed
+        ("citer", "cocited"),     # cited together with the seed
+        ("coupled", "ref"),       # shares a reference with the seed
+        ("other", "unrelated"),
+    ])
+    related = dict(graph.related(["seed", "missing"]))
+    assert "seed" not in related
+    assert related["ref"] == 1 and related["citer"] == 1
+    assert related["cocited"] == 1 and related["coupled"] == 1
+    assert "unrelated" not in related and "other" not in related
+    assert graph.related(["seed"], limit=2)[0][1] == 1
@@ -128,4 +128,53 @@ def test_config_init_aborts_on_no_overwrite(tmp_path):
         result = runner.invoke(app, ["config", "init"], input="n\n")
 
     assert result.exit_code == 0
-    assert "Config initialized" not in result.output
\ No newline at end of file
+    assert "Config initialized" not in result.output
+
+# --- list filters and offline search ---
+
+def _library(tmp_path, monkeypatch):
+    from datetime import date
+    from pulse import storage
+    from helpers import make_paper
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    storage.upsert_papers([
+        make_paper("p1", "Digital twin of a bridge", 40, date(2024, 3, 1), authors=["Ada Lovelace"], doi="10.1/1"),
+        make_paper("p2", "Timber connections", 2, date(2021, 3, 1), authors=["Alan Turing"], doi="10.1/2"),
+    ])
+
+
+def test_list_filters_by_keyword_author_and_year(tmp_path, monkeypatch):
+    _library(tmp_path, monkeypatch)
+    assert "Digital twin" in runner.invoke(app, ["list", "--keyword", "bridge"]).output
+    result = runner.invoke(app, ["list", "--author", "turing", "--year", "2021"])
+    assert "Timber" in result.output and "Digital twin" not in result.output
+    assert "No papers found" in runner.invoke(app, ["list", "--min-citations", "100"]).output
+
+
+def test_search_offline_reads_the_library(tmp_path, monkeypatch):
+    _library(tmp_path, monkeypatch)
+    with patch("pulse.service.search") as online:
+        result = runner.invoke(app, ["search", "digital twin", "--offline"])
+    online.assert_not_called()
+    assert result.exit_code == 0
+    assert "Digital twin" in result.output and "Timber" not in result.output
+
+
+def test_search_reports_a_missing_semantic_extra(monkeypatch):
+    monkeypatch.setattr("pulse.embeddings.np", None)
+    with patch("pulse.main.config.load_config", return_value=Settings(ranking=RankingConfig(weight_semantic=0.5))), \
+         patch("pulse.service.search") as online:
+        result = runner.invoke(app, ["search", "digital twin"])
+    online.assert_not_called()
+    assert result.exit_code == 1
+    assert "needs numpy: install the semantic extra" in result.output
+    assert "Traceback" not in result.output
+
+
+def test_refresh_updates_the_library(tmp_path, monkeypatch):
+    _library(tmp_path, monkeypatch)
+    with patch("pulse.service.refresh_library", return_value=1) as refresh:
+        result = runner.invoke(app, ["refresh"])
+    refresh.assert_called_once()
+    assert result.exit_code == 0
+    assert "Updated 1 of 2 papers" in result.output
@@ -0,0 +1,246 @@
+import asyncio
+import json
+
+import httpx
+
+from pulse.cache import ResponseCache
+from pulse.providers.openalex import OpenAlexProvider
+from pulse.providers.semantic_scholar import SemanticScholarProvider
+from helpers import make_paper, make_query
+
+
+def openalex_work(i: int) -> dict:
+    return {
+        "id": f"https://openalex.org/W{i}",
+        "title": f"Work {i}",
+        "authorships": [{"author": {"display_name": "Author A"}}],
+        "doi": f"https://doi.org/10.1234/{i}",
+        "cited_by_count": i,
+        "keywords": [{"display_name": "BIM"}],
+        "publication_date": "2024-01-01",
+        "primary_location": {},
+    }
+
+
+def s2_paper(i: int) -> dict:
+    return {
+        "paperId": f"s2-{i}",
+        "title": f"Paper {i}",
+        "authors": [{"name": "Author A"}],
+        "abstract": None,
+        "externalIds": {"DOI": f"10.1234/{i}"},
+        "url": f"https://example.com/{i}",
+        "openAccessPdf": None,
+        "citationCount": i,
+        "publicationDate": "2024-01-01",
+    }
+
+
+def collect(provider, query) -> list[list]:
+    async def run():
+        return [batch async for batch in provider.search_pages(query)]
+    return asyncio.run(run())
+
+
+# --- OpenAlex cursor pagination ---
+
+def test_openalex_follows_cursor_until_max_results():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        cursor = request.url.params["cursor"]
+        start = 0 if cursor == "*" else int(cursor)
+        per_page = int(request.url.params["per_page"])
+        works = [openalex_work(i) for i in range(start, start + per_page)]
+        return httpx.Response(200, json={"meta": {"next_cursor": str(start + per_page)}, "results": works})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    batches = collect(OpenAlexProvider(client=client), make_query(max_results=450))
+
+    assert [len(b) for b in batches] == [200, 200, 50]
+    assert requests[0].url.params["cursor"] == "*"
+    assert requests[-1].url.params["per_page"] == "50"
+
+
+def test_openalex_stops_when_cursor_exhausted():
+    def handler(request):
+        return httpx.Response(200, json={"meta": {"next_cursor": None}, "results": [openalex_work(1)]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    batches = collect(OpenAlexProvider(client=client), make_query(max_results=500))
+    assert [len(b) for b in batches] == [1]
+
+
+def test_openalex_search_flattens_pages():
+    def handler(request):
+        return httpx.Response(200, json={"meta": {"next_cursor": None}, "results": [openalex_work(1), openalex_work(2)]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    papers = asyncio.run(OpenAlexProvider(client=client).search(make_query()))
+    assert [p.title for p in papers] == ["Work 1", "Work 2"]
+
+
+def test_openalex_skips_a_bad_work_without_losing_the_sweep(capsys):
+    pages = [
+        {"meta": {"next_cursor": "c2"}, "results": [openalex_work(1), {**openalex_work(2), "primary_location": None},
+                                                    {**openalex_work(3), "title": None}]},
+        {"meta": {"next_cursor": None}, "results": [openalex_work(4)]},
+    ]
+
+    def handler(request):
+        return httpx.Response(200, json=pages[request.url.params["cursor"] != "*"])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    batches = collect(OpenAlexProvider(client=client), make_query(max_results=500))
+    assert [[p.title for p in batch] for batch in batches] == [["Work 1", "Work 2"], ["Work 4"]]
+    assert "Skipping OpenAlex work https://openalex.org/W3" in capsys.readouterr().out
+
+def test_openalex_rebuilds_abstract_from_inverted_index():
+    work = {**openalex_work(1), "abstract_inverted_index": {"Digital": [0], "twins": [1, 3], "help": [2], "too.": [4]}}
+    assert OpenAlexProvider()._to_paper(work).abstract == "Digital twins help twins too."
+    assert OpenAlexProvider()._to_paper(openalex_work(2)).abstract == ""
+
+# --- Semantic Scholar pagination ---
+
+def test_semantic_scholar_pages_by_offset():
+    offsets = []
+
+    def handler(request):
+        offset = int(request.url.params["offset"])
+        limit = int(request.url.params["limit"])
+        offsets.append(offset)
+        data = [s2_paper(i) for i in range(offset, offset + limit)]
+        return httpx.Response(200, json={"offset": offset, "next": offset + limit, "data": data})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    batches = collect(SemanticScholarProvider(client=client), make_query(max_results=250))
+
+    assert offsets == [0, 100, 200]
+    assert sum(len(b) for b in batches) == 250
+
+
+def test_semantic_scholar_uses_bulk_token_beyond_relevance_limit():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        token = request.url.params.get("token")
+        start = int(token) if token else 0
+        data = [s2_paper(i) for i in range(start, start + 1000)]
+        return httpx.Response(200, json={"token": str(start + 1000), "data": data})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    batches = collect(SemanticScholarProvider(client=client), make_query(max_results=1500))
+
+    assert all(path.endswith("/search/bulk") for path in paths)
+    assert [len(b) for b in batches] == [1000, 500]
+
+
+# --- Batched lookups ---
+
+def test_semantic_scholar_get_papers_chunks_into_batch_posts():
+    bodies = []
+
+    def handler(request):
+        assert request.method == "POST" and request.url.path.endswith("/paper/batch")
+        ids = json.loads(request.content)["ids"]
+        bodies.append(ids)
+        return httpx.Response(200, json=[None if i.endswith("missing") else s2_paper(len(i)) for i in ids])
+
+    ids = [f"id{i:04d}" for i in range(1200)] + ["https://doi.org/10.1/X", "id-missing", "id0000"]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    papers = asyncio.run(SemanticScholarProvider(client=client).get_papers(ids))
+
+    assert [len(body) for body in bodies] == [500, 500, 202]
+    assert "DOI:10.1/X" in bodies[-1]
+    assert len(papers) == 1201
+
+
+def test_openalex_get_papers_filters_by_id_and_doi_in_request_order():
+    filters = []
+
+    def handler(request):
+        field, values = request.url.params["filter"].split(":", 1)
+        filters.append(field)
+        if field == "doi":
+            works = [{**openalex_work(7), "doi": "https://doi.org/10.1234/7"}]
+        else:
+            works = [openalex_work(int(value.removeprefix("W"))) for value in values.split("|") if value != "W404"]
+        return httpx.Response(200, json={"meta": {}, "results": works})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = OpenAlexProvider(client=client)
+    papers = asyncio.run(provider.get_papers(["https://openalex.org/W3", "10.1234/7", "W404", "W1"]))
+
+    assert sorted(filters) == ["doi", "openalex_id"]
+    assert [p.id for p in papers] == ["https://openalex.org/W3", "https://openalex.org/W7", "https://openalex.org/W1"]
+    assert asyncio.run(provider.get_paper("W404")) is None
+
+
+# --- Citation neighbourhoods ---
+
+def test_openalex_citations_batch_seeds_into_or_filters():
+    filters = []
+
+    def handler(request):
+        flt = request.url.params["filter"]
+        filters.append(flt)
+        if flt.startswith("openalex_id:"):
+            works = [{"id": f"https://openalex.org/{w}", "referenced_works": ["https://openalex.org/W900"]}
+                     for w in flt.removeprefix("openalex_id:").split("|")]
+            return httpx.Response(200, json={"meta": {}, "results": works})
+        citer = {**openalex_work(500), "referenced_works": ["https://openalex.org/W1", "https://openalex.org/W999"]}
+        return httpx.Response(200, json={"meta": {"next_cursor": None}, "results": [citer]})
+
+    seeds = [make_paper(f"s{i}", openalex_id=f"https://openalex.org/W{i}", doi=f"10.1/{i}") for i in range(150)]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    citations = asyncio.run(OpenAlexProvider(client=client).get_citations([*seeds, make_paper("no-id")], limit=5))
+
+    # 150 seeds need two batches, each one reference query and one citation query
+    assert sorted(f.split(":")[0] for f in filters) == ["cites", "cites", "openalex_id", "openalex_id"]
+    assert ("doi:10.1/0", "https://openalex.org/W900") in citations.edges
+    assert ("doi:10.1234/500", "doi:10.1/1") in citations.edges
+    assert not any(cited.endswith("W999") for _, cited in citations.edges)
+    assert {p.id for p in citations.papers} == {"https://openalex.org/W500"}
+
+
+def test_semantic_scholar_citations_resolve_seeds_by_doi():
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path.endswith("/citations"):
+            data = [{"citingPaper": s2_paper(1)}, {"citingPaper": {"paperId": None, "title": "Unresolved"}}]
+        else:
+            data = [{"citedPaper": {**s2_paper(2), "publicationDate": None}}]
+        return httpx.Response(200, json={"data": data})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = SemanticScholarProvider(client=client)
+    citations = asyncio.run(provider.get_citations([make_paper("x", doi="10.9/seed"), make_paper("y")], limit=10))
+
+    assert sorted(paths) == ["/graph/v1/paper/DOI:10.9/seed/citations", "/graph/v1/paper/DOI:10.9/seed/references"]
+    # The reference has no date, so it cannot become a Paper, but its edge still counts
+    assert citations.edges == [("doi:10.1234/1", "doi:10.9/seed"), ("doi:10.9/seed", "doi:10.1234/2")]
+    assert [p.id for p in citations.papers] == ["s2-1"]
+
+
+# --- Response cache ---
+
+def test_repeated_search_is_served_from_cache(tmp_path):
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(200, json={"meta": {"next_cursor": None}, "results": [openalex_work(1)]})
+
+    cache = ResponseCache(tmp_path / "responses.sqlite")
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = OpenAlexProvider(client=client, cache=cache)
+    first = asyncio.run(provider.search(make_query()))
+    second = asyncio.run(provider.search(make_query()))
+    cache.close()
+
+    assert calls["n"] == 1
+    assert [p.id for p in first] == [p.id for p in second]
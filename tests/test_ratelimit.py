@@ -0,0 +1,122 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from pulse.config import RateLimitConfig
+from pulse.ratelimit import RateLimiter, retry_after
+
+
+def fast_config(**overrides) -> RateLimitConfig:
+    return RateLimitConfig(**{"backoff_base": 0.0, **overrides})
+
+
+# --- Token bucket ---
+
+def test_acquire_paces_requests_to_rate():
+    """With burst 1, five requests at 50/s take roughly four intervals."""
+    limiter = RateLimiter(fast_config(requests_per_second=50.0, burst=1))
+
+    async def run():
+        for _ in range(5):
+            await limiter.acquire()
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - start >= 4 / 50 * 0.9
+
+
+def test_acquire_allows_burst_without_waiting():
+    limiter = RateLimiter(fast_config(requests_per_second=1.0, burst=5))
+
+    async def run():
+        await asyncio.wait_for(asyncio.gather(*(limiter.acquire() for _ in range(5))), timeout=0.5)
+
+    asyncio.run(run())
+
+
+# --- Retry handling ---
+
+def test_request_retries_429_then_succeeds():
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        if calls["n"] < 3:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"ok": True})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await RateLimiter(fast_config()).request(client, "GET", "http://api.test/")
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert calls["n"] == 3
+
+
+def test_request_returns_last_response_when_retries_exhausted():
+    def handler(request):
+        return httpx.Response(503)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await RateLimiter(fast_config(max_retries=2)).request(client, "GET", "http://api.test/")
+
+    assert asyncio.run(run()).status_code == 503
+
+
+def test_request_does_not_retry_client_errors():
+    calls = {"n": 0}
+
+    def handler(request):
+        calls["n"] += 1
+        return httpx.Response(404)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await RateLimiter(fast_config()).request(client, "GET", "http://api.test/")
+
+    assert asyncio.run(run()).status_code == 404
+    assert calls["n"] == 1
+
+
+def test_throttle_pauses_concurrent_requests():
+    """A Retry-After seen by one request delays every other request on the bucket."""
+    sent_at = []
+
+    def handler(request):
+        sent_at.append(time.perf_counter())
+        if len(sent_at) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.1"})
+        return httpx.Response(200)
+
+    async def run():
+        limiter = RateLimiter(fast_config())
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = asyncio.create_task(limiter.request(client, "GET", "http://api.test/a"))
+            await asyncio.sleep(0.01)
+            await limiter.request(client, "GET", "http://api.test/b")
+            await first
+
+    asyncio.run(run())
+    assert sent_at[1] - sent_at[0] >= 0.09
+
+
+# --- Retry-After parsing ---
+
+def test_retry_after_seconds():
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    delay = retry_after(httpx.Response(429, headers={"Retry-After": format_datetime(when, usegmt=True)}))
+    assert 25 <= delay <= 30
+
+
+def test_retry_after_missing_or_garbage():
+    assert retry_after(httpx.Response(429)) is None
+    assert retry_after(httpx.Response(429, headers={"Retry-After": "soon"})) is None
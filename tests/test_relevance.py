@@ -0,0 +1,54 @@
+import pytest
+
+from pulse.relevance import BM25Index, CorpusStats, bm25_scores, query_terms, tokenize
+from helpers import make_paper, make_query
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Digital-Twin of a BIM model, 2024") == ["digital", "twin", "bim", "model", "2024"]
+
+
+def test_query_terms_split_phrases_once():
+    assert query_terms(make_query(keywords=["digital twin", "Twin studies"])) == ["digital", "twin", "studies"]
+
+
+def test_rare_terms_outweigh_common_ones():
+    papers = [make_paper("rare", title="Seismic", abstract=""),
+              make_paper("common", title="Concrete", abstract="")]
+    papers += [make_paper(f"filler{i}", title="Concrete slab", abstract="") for i in range(10)]
+    scores = BM25Index(papers).scores(["seismic", "concrete"])
+    assert scores[0] > scores[1] > 0
+
+
+def test_term_frequency_saturates_and_long_documents_are_normalized():
+    papers = [make_paper("short", title="twin", abstract=""),
+              make_paper("long", title="twin", abstract=" ".join(f"word{i}" for i in range(50))),
+              make_paper("repeated", title="twin twin twin twin", abstract="")]
+    short, long, repeated = BM25Index(papers).scores(["twin"])
+    assert short > long
+    assert repeated < 4 * short
+
+
+def test_bm25_scores_are_scaled_to_the_best_paper():
+    papers = [make_paper("a", abstract="digital twin BIM"), make_paper("b", abstract="digital"),
+              make_paper("c", abstract="steel")]
+    scores = bm25_scores(papers, make_query())
+    assert scores[0] == 1.0
+    assert 0 < scores[1] < 1
+    assert scores[2] == 0
+
+
+def test_bm25_scores_without_matches_are_zero():
+    assert bm25_scores([make_paper(abstract="steel")], make_query()) == [0.0]
+    assert bm25_scores([], make_query()) == []
+
+
+def test_library_corpus_changes_term_weights():
+    papers = [make_paper("twin", title="twin", abstract=""), make_paper("digital", title="digital", abstract="")]
+    index = BM25Index(papers)
+    # In this library "twin" is everywhere and "digital" is rare
+    library = CorpusStats.from_papers([make_paper(f"l{i}", title="twin", abstract="") for i in range(20)]
+                                      + [make_paper("d", title="digital", abstract="")])
+    twin, digital = index.scores(["twin", "digital"], library)
+    assert digital > twin
+    assert index.scores(["twin", "digital"])[0] == pytest.approx(index.scores(["twin", "digital"])[1])
@@ -1,6 +1,13 @@
-from pulse.service import rank_papers, deduplicate
-from pulse.config import RankingConfig
-from datetime import date
+import asyncio
+import pytest
+from pulse.service import (
+    rank_papers, deduplicate, _fetch_and_rank, _rank_papers_python, _rank_papers_vectorized,
+    run_digest,
+)
+from pulse.config import RankingConfig, Settings, CacheConfig, SearchConfig, ProviderConfig, GraphConfig
+from pulse.models import Citations
+from pulse.dedup import merge_papers
+from datetime import date, timedelta
 from helpers import make_paper, make_query
 
 query = make_query()
@@ -66,8 +73,8 @@ def test_deduplicate_no_duplicates():
 
 def test_deduplicate_no_DOI_or_Arxiv_or_OpenAlex():
     papers = [
-        make_paper('orphan1'),
-        make_paper('orphan2'),
+        make_paper('orphan1', 'Timber frame fire safety'),
+        make_paper('orphan2', 'Concrete curing with sensors'),
     ]
     result = deduplicate(papers)
     assert len(result) == 2
@@ -81,7 +88,7 @@ def test_deduplicate_mixed_identifiers():
         make_paper('1', doi='10.1234/same'),
         make_paper('2', doi='10.1234/same', abstract='richer'),
         make_paper('3', doi='10.5678/unique'),
-        make_paper('4', arxiv_id='2401.99999'),
+        make_paper('4', 'Unrelated preprint', arxiv_id='2401.99999'),
     ]
     result = deduplicate(papers)
     assert len(result) == 3
@@ -89,4 +96,344 @@ def test_deduplicate_mixed_identifiers():
     winning_ids = {p.id for p in result}
     assert '1' not in winning_ids or '2' not in winning_ids  # only one of the dupes
     assert '3' in winning_ids
-    assert '4' in winning_ids
\ No newline at end of file
+    assert '4' in winning_ids
+
+def test_deduplicate_bridges_identifiers():
+    """A record carrying both a DOI and an arXiv id joins the DOI-only and arXiv-only copies."""
+    papers = [
+        make_paper('oa', 'A', doi='10.1/x'),
+        make_paper('ax', 'B', arxiv_id='2401.00001v2'),
+        make_paper('ss', 'C', doi='https://doi.org/10.1/X', arxiv_id='2401.00001'),
+    ]
+    assert len(deduplicate(papers)) == 1
+
+def test_deduplicate_fuzzy_title_without_doi():
+    papers = [
+        make_paper('oa', 'Digital Twins for BIM-based Compliance Checking', doi='10.1/dt', authors=['Smith, J.'],
+                   keywords=['BIM']),
+        make_paper('ss', 'Digital twins for BIM based compliance checking.', authors=['J. Smith'],
+                   published_date=date(2023, 12, 30), pdf_url='http://pdf'),
+    ]
+    result = deduplicate(papers)
+    assert len(result) == 1
+    assert result[0].keywords == ['BIM']
+    assert result[0].pdf_url == 'http://pdf'  # filled in from the other copy
+
+def test_deduplicate_merges_fields_across_providers():
+    papers = [
+        make_paper('oa', doi='10.1/m', citation_count=12, keywords=['BIM', 'Digital twin'],
+                   abstract='Short.', source_provider='openalex'),
+        make_paper('ss', doi='10.1/m', citation_count=30, keywords=['bim', 'IFC'], arxiv_id='2401.00002',
+                   pdf_url='http://pdf', abstract='A much longer abstract.', source_provider='semantic_scholar'),
+    ]
+    [merged] = deduplicate(papers)
+    assert merged.citation_count == 30
+    assert merged.keywords == ['bim', 'IFC', 'Digital twin']  # base record's spelling wins
+    assert merged.arxiv_id == '2401.00002'
+    assert merged.pdf_url == 'http://pdf'
+    assert merged.abstract == 'A much longer abstract.'
+    assert merged.sources == ['semantic_scholar', 'openalex']
+
+def test_deduplicate_folds_bridged_clusters_like_merge_papers():
+    """Clusters merged incrementally and then bridged match merging every record in one go."""
+    a = make_paper('a', 'A', doi='10.1/a', keywords=['BIM'], source_provider='openalex')
+    b = make_paper('b', 'B', arxiv_id='2401.00003', citation_count=40, abstract='A longer abstract.',
+                   keywords=['bim', 'IFC'], source_provider='arxiv')
+    c = make_paper('c', 'C', doi='10.1/a', pdf_url='http://a.pdf', source_provider='semantic_scholar')
+    d = make_paper('d', 'D', arxiv_id='2401.00003', citation_count=41, source_provider='crossref')
+    e = make_paper('e', 'E', doi='10.1/a', arxiv_id='2401.00003', source_provider='core')
+    [merged] = deduplicate([a, b, c, d, e])
+    assert merged == merge_papers([a, c, e, b, d])
+    assert merged.citation_count == 41 and merged.pdf_url == 'http://a.pdf'
+
+def test_deduplicate_same_title_conflicting_doi_not_merged():
+    papers = [
+        make_paper('1', 'Editorial', doi='10.1/a'),
+        make_paper('2', 'Editorial', doi='10.1/b'),
+    ]
+    assert len(deduplicate(papers)) == 2
+
+def test_deduplicate_different_titles_same_author_not_merged():
+    papers = [
+        make_paper('1', 'Digital twin for bridges'),
+        make_paper('2', 'Digital twin for tunnels and underground works'),
+    ]
+    assert len(deduplicate(papers)) == 2
+
+# --- Streaming fetch tests ---
+
+class FakeProvider:
+    def __init__(self, batches, fail_after=False, **kwargs):
+        self.batches = batches
+        self.fail_after = fail_after
+
+    async def search_pages(self, query):
+        for batch in self.batches:
+            yield batch
+        if self.fail_after:
+            raise RuntimeError("rate limited")
+
+def test_fetch_and_rank_keeps_pages_before_provider_failure(monkeypatch):
+    """Pages received before a provider error are still deduplicated and ranked."""
+    providers = {
+        "openalex": lambda **kw: FakeProvider([[make_paper('a', doi='10.1/a')], [make_paper('b', doi='10.1/b')]], fail_after=True),
+        "semantic_scholar": lambda **kw: FakeProvider([[make_paper('a2', doi='10.1/a')]]),
+    }
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: providers[name])
+    ranked = asyncio.run(_fetch_and_rank(query, Settings(cache=CacheConfig(enabled=False))))
+    assert sorted(p.doi for p in ranked) == ['10.1/a', '10.1/b']
+
+class KeywordProvider:
+    """Returns a different result list per keyword and records peak concurrency."""
+    active = 0
+    peak = 0
+
+    def __init__(self, results, **kwargs):
+        self.results = results
+
+    async def search_pages(self, query):
+        assert len(query.keywords) == 1
+        KeywordProvider.active += 1
+        KeywordProvider.peak = max(KeywordProvider.peak, KeywordProvider.active)
+        await asyncio.sleep(0)
+        KeywordProvider.active -= 1
+        yield self.results[query.keywords[0]]
+
+def test_fetch_and_rank_fan_out_fuses_keyword_lists(monkeypatch):
+    results = {
+        'digital twin': [make_paper('twin', 'Twins', doi='10.1/t'), make_paper('both', 'Both', doi='10.1/b')],
+        'BIM': [make_paper('bim', 'Models', doi='10.1/m'), make_paper('both2', 'Both', doi='10.1/b')],
+    }
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: KeywordProvider(results))
+    KeywordProvider.peak = 0
+    settings = Settings(cache=CacheConfig(enabled=False), providers=ProviderConfig(enabled=['openalex']),
+                        search=SearchConfig(fan_out=True, max_concurrent_searches=1))
+    ranked = asyncio.run(_fetch_and_rank(make_query(max_results=1), settings))
+    # The paper found under both keywords wins the fusion and is merged across lists
+    assert [p.doi for p in ranked] == ['10.1/b']
+    assert KeywordProvider.peak == 1
+
+class WindowProvider:
+    """Records the requested date window and returns one paper published that day."""
+    def __init__(self, calls, fail=False, **kwargs):
+        self.calls = calls
+        self.fail = fail
+
+    async def search_pages(self, query):
+        self.calls.append(query.date_from)
+        if self.fail:
+            raise RuntimeError("down")
+        yield [make_paper(f'p{query.date_to}', f'Paper of {query.date_to}', doi=f'10.1/{query.date_to}',
+                          published_date=query.date_to)]
+
+def test_incremental_digest_fetches_since_watermark(tmp_path, monkeypatch):
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    calls, failing = [], []
+    monkeypatch.setattr("pulse.service.load_config", lambda: Settings(
+        cache=CacheConfig(enabled=False), providers=ProviderConfig(enabled=['openalex'])))
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: WindowProvider(calls, bool(failing)))
+    today = date.today()
+
+    first = asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls == [today - timedelta(days=30)]
+    assert len(first) == 1
+
+    monkeypatch.setattr("pulse.service.date", type("FakeDate", (date,), {"today": staticmethod(lambda: today + timedelta(days=1))}))
+    second = asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls[-1] == today - timedelta(days=2)  # watermark minus the default overlap
+    assert len(second) == 2  # yesterday's candidate merged with today's
+
+    failing.append(True)
+    asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls[-1] == calls[-2]  # a failed run does not advance the watermark
+
+def test_incremental_digest_fetches_a_widened_window_in_full(tmp_path, monkeypatch):
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    calls = []
+    monkeypatch.setattr("pulse.service.load_config", lambda: Settings(
+        cache=CacheConfig(enabled=False), providers=ProviderConfig(enabled=['openalex'])))
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: WindowProvider(calls))
+    today = date.today()
+
+    asyncio.run(run_digest(top_n=5, days=7, incremental=True))
+    asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls[-1] == today - timedelta(days=30)  # days 8-30 were never fetched
+    asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls[-1] == today - timedelta(days=2)  # covered now: watermark minus the default overlap
+    asyncio.run(run_digest(top_n=5, days=7, incremental=True))
+    asyncio.run(run_digest(top_n=5, days=30, incremental=True))
+    assert calls[-1] == today - timedelta(days=30)  # narrowing dropped the older candidates
+
+# --- Vectorized ranking tests ---
+
+def _random_papers(n, seed=0):
+    import random
+    rng = random.Random(seed)
+    pool = ['digital twin', 'BIM', 'concrete', 'steel', 'IoT']
+    return [
+        make_paper(str(i), citation_count=rng.choice([0, 1, 5, 5, 40, 300]),
+                   published_date=date(2020, 1, 1) + timedelta(days=rng.randrange(2000)),
+                   keywords=rng.sample(pool, rng.randrange(3)))
+        for i in range(n)
+    ]
+
+def test_vectorized_ranking_matches_python():
+    pytest.importorskip("numpy")
+    expected = _rank_papers_python(_random_papers(2000), query, config)
+    actual = _rank_papers_vectorized(_random_papers(2000), query, config)
+    assert [p.id for p in actual] == [p.id for p in expected]
+    assert [p.relevance_score for p in actual] == [p.relevance_score for p in expected]
+
+def test_vectorized_top_n_matches_python_with_ties():
+    """Top-k selection breaks ties by input order, exactly like the full sort."""
+    pytest.importorskip("numpy")
+    for top_n in (1, 7, 50, 3000):
+        expected = _rank_papers_python(_random_papers(500, seed=1), query, config, top_n=top_n)
+        actual = _rank_papers_vectorized(_random_papers(500, seed=1), query, config, top_n=top_n)
+        assert [p.id for p in actual] == [p.id for p in expected]
+
+def test_vectorized_ranking_without_citations():
+    pytest.importorskip("numpy")
+    papers = [make_paper(str(i), citation_count=0, keywords=['BIM']) for i in range(5)]
+    ranked = _rank_papers_vectorized(papers, query, config)
+    assert all(p.relevance_score > 0 for p in ranked)
+
+def test_rank_papers_top_n():
+    papers = [make_paper(str(i), citation_count=i) for i in range(10)]
+    ranked = rank_papers(papers, query, config, top_n=3)
+    assert [p.id for p in ranked] == ['9', '8', '7']
+
+# --- Streaming top-k tests ---
+
+def test_rank_papers_heap_matches_full_sort_with_ties():
+    papers = _random_papers(300, seed=2)
+    full = _rank_papers_python(_random_papers(300, seed=2), query, config)
+    for top_n in (1, 10, 299):
+        assert [p.id for p in _rank_papers_python(papers, query, config, top_n=top_n)] == [p.id for p in full[:top_n]]
+
+def test_streamed_top_k_survives_merges_of_leaders(monkeypatch):
+    """A record bridging two leaders' identifiers brings back the papers they had pushed out."""
+    leaders = [make_paper('l1', 'First leader', 100, doi='10.1/l', keywords=['BIM']),
+               make_paper('l2', 'Second leader', 100, arxiv_id='2401.00001', keywords=['BIM'])]
+    others = [make_paper(name, f'Paper {name}', citations) for name, citations in (('x', 50), ('y', 20), ('z', 5))]
+    bridge = make_paper('p', 'Bridging record', 100, doi='10.1/l', arxiv_id='2401.00001', source_provider='other')
+    providers = {
+        "openalex": lambda **kw: FakeProvider([[*leaders, *others], [bridge]]),
+        "semantic_scholar": lambda **kw: FakeProvider([]),
+    }
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: providers[name])
+    streamed = asyncio.run(_fetch_and_rank(query, Settings(cache=CacheConfig(enabled=False)), top_n=2))
+    expected = rank_papers(deduplicate([*leaders, *others, bridge]), query, config, 2)
+    assert [p.id for p in streamed] == [p.id for p in expected]
+    assert len(streamed) == 2
+
+# --- BM25 keyword scoring ---
+
+bm25 = RankingConfig(keyword_scorer="bm25")
+
+def test_bm25_scores_papers_without_keywords_by_abstract():
+    """Semantic Scholar papers carry no keywords; with bm25 their abstracts still count."""
+    papers = [
+        make_paper('match', abstract='A digital twin for BIM-based compliance.', keywords=[]),
+        make_paper('other', abstract='Concrete creep under sustained load.', keywords=[]),
+    ]
+    exact = rank_papers(papers, query, config)
+    assert exact[0].relevance_score == exact[1].relevance_score
+    assert [p.id for p in rank_papers(papers, query, bm25)] == ['match', 'other']
+
+def test_bm25_vectorized_ranking_matches_python():
+    pytest.importorskip("numpy")
+    papers = [make_paper(str(i), abstract=f"{p.keywords} study {i % 7}", citation_count=p.citation_count,
+                         published_date=p.published_date) for i, p in enumerate(_random_papers(600, seed=5))]
+    expected = _rank_papers_python([p.model_copy() for p in papers], query, bm25)
+    actual = _rank_papers_vectorized([p.model_copy() for p in papers], query, bm25)
+    assert [(p.id, p.relevance_score) for p in actual] == [(p.id, p.relevance_score) for p in expected]
+
+def test_fetch_and_rank_uses_library_statistics_for_bm25(tmp_path, monkeypatch):
+    from pulse import storage, service
+    from pulse.relevance import CorpusStats
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    storage.upsert_papers([make_paper(f"lib{i}", abstract="digital twin") for i in range(5)])
+    corpus = service._library_corpus(RankingConfig(keyword_scorer="bm25", bm25_corpus="library"), query)
+    assert isinstance(corpus, CorpusStats) and corpus.documents == 5
+    assert corpus.document_frequency == {"digital": 5, "twin": 5}
+    assert service._library_corpus(bm25, query) is None
+
+class CitingProvider(FakeProvider):
+    """Search results plus a fixed citation neighbourhood."""
+    def __init__(self, batches, citations, **kwargs):
+        super().__init__(batches)
+        self.citations = citations
+        self.seeds = None
+
+    async def get_citations(self, papers, limit):
+        self.seeds = [p.id for p in papers]
+        return self.citations
+
+def test_graph_stage_adds_related_papers_and_ranks_by_pagerank(monkeypatch):
+    today = date.today()
+    landmark = make_paper('landmark', 'Landmark', 20_000, today, doi='10.1/landmark')
+    candidates = [make_paper('fresh', 'Fresh', 0, today, doi='10.1/fresh'),
+                  make_paper('old', 'Old', 50, today, doi='10.1/old')]
+    citations = Citations(
+        edges=[('doi:10.1/landmark', 'doi:10.1/fresh'), ('https://openalex.org/W7', 'doi:10.1/old')],
+        papers=[landmark, make_paper('stale', 'Stale', 5, date(2001, 1, 1), doi='10.1/stale')],
+    )
+    provider = CitingProvider([candidates], citations)
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: provider)
+    settings = Settings(cache=CacheConfig(enabled=False), providers=ProviderConfig(enabled=['openalex']),
+                        ranking=RankingConfig(weight_citation=0.1, weight_graph=1.0),
+                        graph=GraphConfig(enabled=True, seeds=2))
+    ranked = asyncio.run(_fetch_and_rank(make_query(days=30), settings, top_n=3))
+
+    assert sorted(provider.seeds) == ['fresh', 'old']
+    # The landmark joins as a related paper; the stale one falls outside the date window
+    assert [p.id for p in ranked] == ['landmark', 'fresh', 'old']
+
+class LookupProvider:
+    """Answers batched lookups from a fixed set of fresh records."""
+    def __init__(self, fresh, **kwargs):
+        self.fresh = fresh
+        self.requested = None
+
+    def lookup_id(self, paper):
+        return paper.doi
+
+    async def get_papers(self, ids):
+        self.requested = list(ids)
+        return [paper for paper in self.fresh if paper.doi in self.requested]
+
+def test_refresh_library_merges_fresh_metadata(tmp_path, monkeypatch):
+    from pulse import storage
+    from pulse.service import refresh_library
+    monkeypatch.setattr(storage, "DATA_FILE", tmp_path / "papers.json")
+    storage.upsert_papers([make_paper('a', 'A', 1, doi='10.1/a'), make_paper('b', 'B', 5, doi='10.1/b'),
+                           make_paper('c', 'C', 2)])
+    provider = LookupProvider([make_paper('fresh-a', 'A', 40, doi='10.1/a', pdf_url='http://pdf/a'),
+                               make_paper('fresh-b', 'B', 5, doi='10.1/b')])
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: provider)
+    monkeypatch.setattr("pulse.service.load_config", lambda: Settings(providers=ProviderConfig(enabled=['openalex'])))
+
+    assert asyncio.run(refresh_library()) == 1
+    assert provider.requested == ['10.1/a', '10.1/b']
+    refreshed = storage.find_paper('10.1/a')
+    assert (refreshed.id, refreshed.citation_count, refreshed.pdf_url) == ('a', 40, 'http://pdf/a')
+    assert storage.count_papers() == 3
+
+def test_refresh_library_takes_provider_corrections(tmp_path, monkeypatch):
+    from pulse import storage
+    from pulse.service import refresh_library
+    monkeypatch.setattr(storage, "DATA_FILE", tmp_path / "papers.json")
+    # The saved copy is the more complete record, which would win a merge as its base
+    old = make_paper('a', 'Digtal twins (preprint)', 3, doi='10.1/a', keywords=['BIM'], abstract='A longer saved abstract.',
+                     pdf_url='http://old/a.pdf', relevance_score=0.7)
+    storage.upsert_papers([old])
+    provider = LookupProvider([make_paper('fresh-a', 'Digital twins', 3, doi='10.1/a', pdf_url='http://new/a.pdf')])
+    monkeypatch.setattr("pulse.service.get_provider", lambda name: lambda **kw: provider)
+    monkeypatch.setattr("pulse.service.load_config", lambda: Settings(providers=ProviderConfig(enabled=['openalex'])))
+
+    assert asyncio.run(refresh_library()) == 1
+    refreshed = storage.find_paper('10.1/a')
+    assert (refreshed.title, refreshed.pdf_url) == ('Digital twins', 'http://new/a.pdf')
+    assert (refreshed.id, refreshed.saved_at, refreshed.relevance_score) == ('a', old.saved_at, 0.7)
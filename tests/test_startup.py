@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import pulse
+
+# Generous against the ~0.3s these commands take to import today: the budget
+# catches a heavy dependency creeping back in, not machine-to-machine noise
+STARTUP_BUDGET_SECONDS = 0.75
+
+# Only search, digest and export need these. asyncio is not among them: recent
+# pydantic-core releases import it themselves
+DEFERRED_MODULES = ("httpx", "pyarrow", "numpy", "pulse.providers", "pulse.service", "pulse.export")
+
+IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(tmp_path, *args):
+    """Run `pulse <args>` under -X importtime; map each imported module to its cumulative µs."""
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=str(Path(pulse.__file__).parents[1]))
+    # Mirrors the `pulse` console script, so pulse.main shows up as an import
+    entry_point = "from pulse.main import app; app(prog_name='pulse')"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", entry_point, *args],
+                            capture_output=True, text=True, env=env, cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    modules, total = {}, 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            cumulative, indent, name = int(match[1]), match[2], match[3]
+            modules[name] = cumulative
+            if not indent:
+                total += cumulative
+    return modules, total / 1e6
+
+
+@pytest.mark.parametrize("command", [["list"], ["config", "show"]])
+def test_cold_start_skips_network_and_export_stack(tmp_path, command):
+    modules, _ = import_times(tmp_path, *command)
+    assert "pulse.main" in modules
+    assert not [name for name in DEFERRED_MODULES if name in modules]
+
+
+@pytest.mark.parametrize("command", [["list"], ["config", "show"]])
+def test_cold_start_stays_within_budget(tmp_path, command):
+    _, seconds = import_times(tmp_path, *command)
+    assert seconds < STARTUP_BUDGET_SECONDS
@@ -1,6 +1,13 @@
+import json
 import pytest
-from pulse.storage import load_papers, save_papers
+from pulse.storage import (
+    load_papers, save_papers, upsert_papers, remove_paper, find_paper, count_papers, iter_papers,
+    load_digest, save_digest, search_papers, corpus_stats,
+)
+from datetime import date
 from pulse.models import Paper
+from pulse.relevance import CorpusStats
+from helpers import make_paper
 
 def test_load_papers(tmp_path, monkeypatch):
     monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
@@ -29,4 +36,153 @@ def test_save_papers(tmp_path, monkeypatch):
     )]
     save_papers(papers)
     loaded_papers = load_papers()
-    assert loaded_papers == papers
\ No newline at end of file
+    assert loaded_papers == papers
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr("pulse.storage.DATA_FILE", tmp_path / "papers.json")
+    return tmp_path
+
+def test_save_papers_replaces_library(library):
+    save_papers([make_paper("1", doi="10.1/a"), make_paper("2", doi="10.1/b")])
+    save_papers([make_paper("3", doi="10.1/c")])
+    assert [p.id for p in load_papers()] == ["3"]
+
+def test_upsert_merges_by_dedup_key(library):
+    upsert_papers([make_paper("1", title="Old", doi="10.1/a")])
+    upsert_papers([make_paper("1b", title="New", doi="10.1/a"), make_paper("2", doi="10.1/b")])
+    papers = load_papers()
+    assert count_papers() == 2
+    assert papers[0].title == "New"  # updated in place, original position kept
+
+def test_find_paper_by_any_identifier(library):
+    upsert_papers([make_paper("p1", doi="10.1/a", arxiv_id="2401.00001", openalex_id="W1")])
+    for identifier in ("p1", "10.1/a", "2401.00001", "W1"):
+        assert find_paper(identifier).id == "p1"
+    assert find_paper("nope") is None
+
+def test_remove_paper(library):
+    upsert_papers([make_paper("p1"), make_paper("p2")])
+    assert remove_paper("p1") is True
+    assert remove_paper("p1") is False
+    assert [p.id for p in load_papers()] == ["p2"]
+
+def test_iter_papers_pages_in_order(library):
+    upsert_papers([make_paper(f"p{i}") for i in range(7)])
+    pages = list(iter_papers(page_size=3))
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [p.id for page in pages for p in page] == [f"p{i}" for i in range(7)]
+
+def test_migrates_legacy_json_once(library):
+    legacy = library / "papers.json"
+    legacy.write_text(json.dumps([make_paper("old", doi="10.1/old").model_dump(mode="json")]))
+    assert [p.id for p in load_papers()] == ["old"]
+    assert not legacy.exists()
+    assert (library / "papers.json.migrated").exists()
+    assert count_papers() == 1
+
+def test_digest_round_trip(library):
+    assert load_digest("q") is None
+    save_digest("q", date(2026, 2, 1), date(2026, 3, 1), [make_paper("a"), make_paper("b")])
+    save_digest("q", date(2026, 2, 2), date(2026, 3, 2), [make_paper("c")])
+    window_start, watermark, papers = load_digest("q")
+    assert (window_start, watermark) == (date(2026, 2, 2), date(2026, 3, 2))
+    assert [p.id for p in papers] == ["c"]
+
+def test_digest_saved_before_window_start_was_recorded(library):
+    import sqlite3
+    conn = sqlite3.connect(library / "papers.sqlite")
+    conn.execute("CREATE TABLE digests (query_key TEXT PRIMARY KEY, watermark TEXT NOT NULL, data TEXT NOT NULL)")
+    conn.execute("INSERT INTO digests VALUES ('q', '2026-03-01', '[]')")
+    conn.commit()
+    conn.close()
+    assert load_digest("q") == (None, date(2026, 3, 1), [])
+
+# --- BM25 corpus statistics ---
+
+TERMS = ["digital", "twin", "bridges", "tunnels", "retrofit"]
+
+def _expected_stats():
+    stats = CorpusStats.from_papers(load_papers())
+    return CorpusStats(stats.documents, stats.total_length,
+                       {term: n for term, n in stats.document_frequency.items() if term in TERMS})
+
+def test_corpus_stats_follow_library_writes(library):
+    upsert_papers([make_paper("a", "Digital twin of bridges", abstract="Bridges.", doi="10.1/a"),
+                   make_paper("b", "Digital tunnels", doi="10.1/b"),
+                   make_paper("c", "Twin tunnels", doi="10.1/c")])
+    assert corpus_stats(TERMS) == _expected_stats()
+    upsert_papers([make_paper("a", "Seismic retrofit", doi="10.1/a")])  # replaced in place
+    remove_paper("10.1/b")
+    assert corpus_stats(TERMS) == _expected_stats()
+    assert corpus_stats(TERMS).document_frequency == {"retrofit": 1, "twin": 1, "tunnels": 1}
+    save_papers([make_paper("d", "Digital twin")])
+    assert corpus_stats(TERMS) == _expected_stats()
+    assert corpus_stats(TERMS).document_frequency == {"digital": 1, "twin": 1}
+
+def test_corpus_stats_are_counted_for_an_older_library(library):
+    import sqlite3
+    upsert_papers([make_paper("p1", "Digital twin", doi="10.1/a"), make_paper("p2", "Twin tunnels", doi="10.1/b")])
+    conn = sqlite3.connect(library / "papers.sqlite")
+    conn.execute("UPDATE corpus SET documents = 0, total_length = 0")
+    conn.execute("DELETE FROM term_frequencies")
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+    assert corpus_stats(TERMS) == _expected_stats()
+
+# --- Full-text search ---
+
+def test_search_papers_matches_title_abstract_and_keywords(library):
+    upsert_papers([
+        make_paper("t", title="Digital twins for bridges", abstract="", doi="10.1/t"),
+        make_paper("a", title="Other", abstract="We build a digital twin.", doi="10.1/a"),
+        make_paper("k", title="Other", abstract="", keywords=["Digital Twin"], doi="10.1/k"),
+        make_paper("x", title="Concrete creep", abstract="", doi="10.1/x"),
+    ])
+    assert sorted(p.id for p in search_papers(["digital twin"])) == ["a", "k", "t"]
+    assert [p.id for p in search_papers(["creep", "nothing"])] == ["x"]
+
+def test_search_papers_filters_by_author_year_and_citations(library):
+    upsert_papers([
+        make_paper("old", authors=["Ada Lovelace"], published_date=date(2019, 5, 1), citation_count=50, doi="10.1/o"),
+        make_paper("new", authors=["Ada Lovelace"], published_date=date(2024, 5, 1), citation_count=5, doi="10.1/n"),
+        make_paper("other", authors=["Alan Turing"], published_date=date(2024, 7, 1), citation_count=80, doi="10.1/x"),
+    ])
+    assert [p.id for p in search_papers(author="lovelace")] == ["old", "new"]
+    assert [p.id for p in search_papers(year=2024)] == ["new", "other"]
+    assert [p.id for p in search_papers(min_citations=50)] == ["old", "other"]
+    assert [p.id for p in search_papers(author="Ada Lovelace", year=2024)] == ["new"]
+
+def test_search_papers_orders_by_match_quality_and_limits(library):
+    upsert_papers([
+        make_paper("once", title="Sensor networks", abstract="A note on bridges.", doi="10.1/1"),
+        make_paper("often", title="Bridge monitoring", abstract="Bridges, bridges and more bridges.", doi="10.1/2"),
+    ])
+    assert [p.id for p in search_papers(["bridge"])] == ["often", "once"]
+    assert [p.id for p in search_papers(["bridge"], limit=1)] == ["often"]
+
+def test_search_index_follows_updates_and_deletes(library):
+    upsert_papers([make_paper("p1", title="Timber frames", doi="10.1/a")])
+    upsert_papers([make_paper("p1", title="Steel frames", doi="10.1/a")])
+    assert search_papers(["timber"]) == []
+    assert [p.id for p in search_papers(["steel"])] == ["p1"]
+    remove_paper("p1")
+    assert search_papers(["steel"]) == []
+    save_papers([make_paper("p2", title="Steel again", doi="10.1/b")])
+    assert [p.id for p in search_papers(["steel"])] == ["p2"]
+
+def test_search_treats_query_syntax_as_text(library):
+    upsert_papers([make_paper("p1", title='Using "NEAR" and OR operators', doi="10.1/a")])
+    assert [p.id for p in search_papers(['"near" and OR'])] == ["p1"]
+    assert search_papers(["title:foo*"]) == []
+
+def test_existing_library_is_indexed_on_first_open(library):
+    import sqlite3
+    upsert_papers([make_paper("p1", title="Seismic retrofit", doi="10.1/a")])
+    conn = sqlite3.connect(library / "papers.sqlite")
+    conn.execute("DELETE FROM papers_fts")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+    assert [p.id for p in search_papers(["seismic"])] == ["p1"]